@@ -0,0 +1,35 @@
+"""Inference cache
+
+Revision ID: 20241210101500_9c1e4b7d2a6f
+Revises: 20241127095409_625f792419e7
+Create Date: 2024-12-10 10:15:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20241210101500_9c1e4b7d2a6f"
+down_revision: Union[str, None] = "20241127095409_625f792419e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inference_cache",
+        sa.Column("cache_key", sa.String(length=64), nullable=False),
+        sa.Column("docstring", sa.Text(), nullable=False),
+        sa.Column("tags", sa.JSON(), nullable=False),
+        sa.Column("embedding", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("last_used_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("cache_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("inference_cache")
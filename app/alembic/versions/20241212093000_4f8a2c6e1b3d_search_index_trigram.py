@@ -0,0 +1,32 @@
+"""Trigram indexes for codebase search
+
+Revision ID: 20241212093000_4f8a2c6e1b3d
+Revises: 20241210101500_9c1e4b7d2a6f
+Create Date: 2024-12-12 09:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20241212093000_4f8a2c6e1b3d"
+down_revision: Union[str, None] = "20241210101500_9c1e4b7d2a6f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ILIKE '%word%' and similarity() in search_codebase are served by these
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in ("name", "file_path", "content"):
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_search_indices_{column}_trgm "
+            f"ON search_indices USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    for column in ("name", "file_path", "content"):
+        op.execute(f"DROP INDEX IF EXISTS ix_search_indices_{column}_trgm")
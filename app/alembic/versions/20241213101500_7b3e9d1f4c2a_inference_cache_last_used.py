@@ -0,0 +1,35 @@
+"""Index inference cache last use for eviction
+
+Revision ID: 20241213101500_7b3e9d1f4c2a
+Revises: 20241212093000_4f8a2c6e1b3d
+Create Date: 2024-12-13 10:15:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20241213101500_7b3e9d1f4c2a"
+down_revision: Union[str, None] = "20241212093000_4f8a2c6e1b3d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Eviction compares last_used_at, rows without one count from creation
+    op.execute(
+        "UPDATE inference_cache SET last_used_at = created_at "
+        "WHERE last_used_at IS NULL"
+    )
+    op.create_index(
+        op.f("ix_inference_cache_last_used_at"),
+        "inference_cache",
+        ["last_used_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_inference_cache_last_used_at"), table_name="inference_cache")
@@ -2,9 +2,11 @@ import logging
 import os
 
 from celery import Celery
+from celery.signals import worker_process_init
 from dotenv import load_dotenv
 
 from app.core.models import *  # noqa #This will import and initialize all models
+from app.modules.parsing.knowledge_graph.embedding_service import get_embedding_service
 
 # Load environment variables from a .env file if present
 load_dotenv()
@@ -66,3 +68,12 @@ from celery.contrib.abortable import AbortableTask  # noqa
 
 # Import tasks to ensure they are registered
 import app.celery.tasks.parsing_tasks  # noqa # Ensure the task module is imported
+
+
+@worker_process_init.connect
+def warm_up_embedding_model(**kwargs):
+    # Each forked worker loads its own copy once, before taking tasks
+    try:
+        get_embedding_service().warm_up()
+    except Exception as e:
+        logger.error(f"Failed to warm up embedding model: {str(e)}")
@@ -39,6 +39,7 @@ def process_parsing(
     user_email: str,
     project_id: str,
     cleanup_graph: bool = True,
+    incremental: bool = False,
 ) -> None:
     logger.info(f"Task received: Starting parsing process for project {project_id}")
     try:
@@ -55,6 +56,7 @@ def process_parsing(
                 user_email,
                 project_id,
                 cleanup_graph,
+                incremental,
             )
 
             end_time = time.time()
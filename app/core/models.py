@@ -6,6 +6,9 @@ from app.modules.intelligence.prompts.prompt_model import (  # noqa
     AgentPromptMapping,
     Prompt,
 )
+from app.modules.parsing.knowledge_graph.inference_cache_model import (  # noqa
+    InferenceCache,
+)
 from app.modules.projects.projects_model import Project  # noqa
 from app.modules.search.search_models import SearchIndex  # noqa
 from app.modules.tasks.task_model import Task  # noqa
@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from neo4j import READ_ACCESS, WRITE_ACCESS, Driver, GraphDatabase, Session
+
+from app.core.config_provider import config_provider
+
+logger = logging.getLogger(__name__)
+
+
+class Neo4jManager:
+    """
+    Process-wide Neo4j connection manager.
+
+    Owns the single pooled driver every tool and service borrows sessions
+    from, so requests and agents no longer pay for a driver, a connection
+    pool and a handshake each. Sessions opened through read_session and
+    write_session carry an access mode, so clustered deployments route reads
+    to followers, and execute_read/execute_write run managed transactions that
+    the driver retries on transient errors.
+    """
+
+    def __init__(self):
+        self.max_connection_pool_size = int(os.getenv("NEO4J_MAX_POOL_SIZE", 100))
+        self.connection_acquisition_timeout = float(
+            os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", 60)
+        )
+        self.max_transaction_retry_time = float(
+            os.getenv("NEO4J_MAX_TRANSACTION_RETRY_TIME", 30)
+        )
+        self._driver = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._sessions_opened = 0
+        self._sessions_active = 0
+        self._sessions_peak = 0
+        self._transaction_errors = 0
+
+    @property
+    def driver(self) -> Driver:
+        # A driver inherited through fork shares sockets with the parent
+        if self._driver is None or self._pid != os.getpid():
+            with self._lock:
+                if self._driver is None or self._pid != os.getpid():
+                    neo4j_config = config_provider.get_neo4j_config()
+                    self._driver = GraphDatabase.driver(
+                        neo4j_config["uri"],
+                        auth=(neo4j_config["username"], neo4j_config["password"]),
+                        max_connection_pool_size=self.max_connection_pool_size,
+                        connection_acquisition_timeout=self.connection_acquisition_timeout,
+                        max_transaction_retry_time=self.max_transaction_retry_time,
+                    )
+                    self._pid = os.getpid()
+        return self._driver
+
+    @contextmanager
+    def session(self, **kwargs) -> Session:
+        with self._stats_lock:
+            self._sessions_opened += 1
+            self._sessions_active += 1
+            self._sessions_peak = max(self._sessions_peak, self._sessions_active)
+        try:
+            with self.driver.session(**kwargs) as session:
+                yield session
+        finally:
+            with self._stats_lock:
+                self._sessions_active -= 1
+
+    def read_session(self, **kwargs) -> Session:
+        return self.session(default_access_mode=READ_ACCESS, **kwargs)
+
+    def write_session(self, **kwargs) -> Session:
+        return self.session(default_access_mode=WRITE_ACCESS, **kwargs)
+
+    def execute_read(self, work: Callable, *args, **kwargs) -> Any:
+        """Run work(tx, *args, **kwargs) in a retried read transaction."""
+        with self.read_session() as session:
+            try:
+                return session.execute_read(work, *args, **kwargs)
+            except Exception:
+                self._count_error()
+                raise
+
+    def execute_write(self, work: Callable, *args, **kwargs) -> Any:
+        """Run work(tx, *args, **kwargs) in a retried write transaction."""
+        with self.write_session() as session:
+            try:
+                return session.execute_write(work, *args, **kwargs)
+            except Exception:
+                self._count_error()
+                raise
+
+    def run_read(self, query: str, **parameters) -> List[Dict[str, Any]]:
+        """Run a read query in a retried transaction and return its records as dicts."""
+        return self.execute_read(lambda tx: tx.run(query, **parameters).data())
+
+    def run_write(self, query: str, **parameters) -> List[Dict[str, Any]]:
+        """Run a write query in a retried transaction and return its records as dicts."""
+        return self.execute_write(lambda tx: tx.run(query, **parameters).data())
+
+    def _count_error(self):
+        with self._stats_lock:
+            self._transaction_errors += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_connection_pool_size": self.max_connection_pool_size,
+                "sessions_opened": self._sessions_opened,
+                "sessions_active": self._sessions_active,
+                "sessions_peak": self._sessions_peak,
+                "transaction_errors": self._transaction_errors,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._driver is not None and self._pid == os.getpid():
+                self._driver.close()
+            self._driver = None
+
+
+_neo4j_manager: Optional[Neo4jManager] = None
+_neo4j_manager_lock = threading.Lock()
+
+
+def get_neo4j_manager() -> Neo4jManager:
+    global _neo4j_manager
+    if _neo4j_manager is None:
+        with _neo4j_manager_lock:
+            if _neo4j_manager is None:
+                _neo4j_manager = Neo4jManager()
+    return _neo4j_manager
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import subprocess
@@ -10,6 +11,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.core.base_model import Base
 from app.core.database import SessionLocal, engine
 from app.core.models import *  # noqa #necessary for models to not give import errors
+from app.core.neo4j_manager import get_neo4j_manager
 from app.modules.auth.auth_router import auth_router
 from app.modules.code_provider.github.github_router import router as github_router
 from app.modules.conversations.conversations_router import (
@@ -24,6 +26,7 @@ from app.modules.key_management.secret_manager import router as secret_manager_r
 from app.modules.parsing.graph_construction.parsing_router import (
     router as parsing_router,
 )
+from app.modules.parsing.knowledge_graph.embedding_service import get_embedding_service
 from app.modules.projects.projects_router import router as projects_router
 from app.modules.search.search_router import router as search_router
 from app.modules.usage.usage_router import router as usage_router
@@ -143,9 +146,22 @@ class MainApp:
         finally:
             db.close()
 
+        # Load the shared embedding model now instead of on the first query
+        try:
+            await asyncio.to_thread(get_embedding_service().warm_up)
+            logging.info("Embedding model warmed up")
+        except Exception as e:
+            logging.error(f"Failed to warm up embedding model: {str(e)}")
+
+    async def shutdown_event(self):
+        neo4j_manager = get_neo4j_manager()
+        logging.info(f"Neo4j connection metrics: {neo4j_manager.metrics()}")
+        neo4j_manager.close()
+
     def run(self):
         self.add_health_check()
         self.app.add_event_handler("startup", self.startup_event)
+        self.app.add_event_handler("shutdown", self.shutdown_event)
         return self.app
 
 
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import List, Optional
 
 from app.modules.code_provider.github.github_service import GithubService
 from app.modules.code_provider.local_repo.local_repo_service import LocalRepoService
@@ -28,3 +28,14 @@ class CodeProviderService:
         return self.service_instance.get_file_content(
             repo_name, file_path, start_line, end_line, branch_name, project_id
         )
+
+    @staticmethod
+    def select_lines(
+        lines: List[str], start_line: Optional[int], end_line: Optional[int]
+    ) -> str:
+        """Slice a file fetched whole with the same line range semantics as get_file_content."""
+        if (start_line == end_line == 0) or (start_line is None and end_line is None):
+            return "\n".join(lines)
+        # Include the definition/decorator lines above the node, as the providers do
+        start = start_line - 2 if start_line - 2 > 0 else 0
+        return "\n".join(lines[start:end_line])
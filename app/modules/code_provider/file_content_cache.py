@@ -0,0 +1,95 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class FileContentCache:
+    """
+    Cache of decoded repository files keyed by repo, commit SHA and path.
+
+    File content at a commit never changes, so entries are never invalidated,
+    only evicted: an in-process LRU bounded by total bytes sits in front of an
+    optional shared Redis tier.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_entry_bytes: Optional[int] = None,
+        redis_ttl: Optional[int] = None,
+    ):
+        self.max_bytes = max_bytes or int(
+            os.getenv("FILE_CONTENT_CACHE_MAX_BYTES", 128 * 1024 * 1024)
+        )
+        self.max_entry_bytes = max_entry_bytes or int(
+            os.getenv("FILE_CONTENT_CACHE_MAX_ENTRY_BYTES", 4 * 1024 * 1024)
+        )
+        # Only bounds Redis memory, the content itself can't go stale
+        self.redis_ttl = redis_ttl or int(
+            os.getenv("FILE_CONTENT_CACHE_REDIS_TTL", 7 * 24 * 3600)
+        )
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(repo_name: str, commit_id: str, file_path: str) -> str:
+        return f"file_content:{repo_name}:{commit_id}:{file_path.lstrip('/')}"
+
+    def get(self, key: str, redis: Optional[Redis] = None) -> Optional[str]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data.decode("utf-8")
+
+        if redis is None:
+            return None
+        try:
+            data = redis.get(key)
+        except RedisError as e:
+            logger.warning(f"File content cache lookup failed for {key}: {e}")
+            return None
+        if data is None:
+            return None
+        self._store(key, data)
+        return data.decode("utf-8")
+
+    def put(self, key: str, content: str, redis: Optional[Redis] = None):
+        data = content.encode("utf-8")
+        if len(data) > self.max_entry_bytes:
+            return
+        self._store(key, data)
+        if redis is not None:
+            try:
+                redis.set(key, data, ex=self.redis_ttl)
+            except RedisError as e:
+                logger.warning(f"File content cache write failed for {key}: {e}")
+
+    def _store(self, key: str, data: bytes):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_file_content_cache = None
+
+
+def get_file_content_cache() -> FileContentCache:
+    global _file_content_cache
+    if _file_content_cache is None:
+        _file_content_cache = FileContentCache()
+    return _file_content_cache
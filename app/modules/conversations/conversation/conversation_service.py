@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from typing import Any, AsyncGenerator, Dict, List, Optional, TypedDict
 
 from langchain.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, StateGraph
 from langgraph.types import Command, StreamWriter
 from sqlalchemy import func
@@ -32,9 +33,10 @@ from app.modules.conversations.message.message_schema import (
     MessageResponse,
     NodeContext,
 )
-from app.modules.intelligence.agents.agent_factory import AgentFactory
 from app.modules.intelligence.agents.agent_injector_service import AgentInjectorService
+from app.modules.intelligence.agents.agent_registry import AgentRegistry
 from app.modules.intelligence.agents.agents_service import AgentsService
+from app.modules.intelligence.agents.compiled_graphs import get_compiled_graph
 from app.modules.intelligence.agents.custom_agents.custom_agents_service import (
     CustomAgentsService,
 )
@@ -71,25 +73,23 @@ class AccessTypeReadError(ConversationServiceError):
 
 
 class SimplifiedAgentSupervisor:
-    def __init__(self, db, provider_service):
+    def __init__(self, db, provider_service, agent_registry: AgentRegistry):
         self.db = db
         self.provider_service = provider_service
-        self.agents = {}
+        self.agent_registry = agent_registry
+        self.agent_ids = []
         self.classifier = None
         self.agents_service = AgentsService(db)
-        self.agent_factory = AgentFactory(db, provider_service)
 
     async def initialize(self, user_id: str):
         available_agents = await self.agents_service.list_available_agents(
             current_user={"user_id": user_id}, list_system_agents=True
         )
 
-        self.agents = {
-            agent.id: self.agent_factory.get_agent(agent.id, user_id)
-            for agent in available_agents
-        }
+        # Only the routed-to agent gets built, in agent_node
+        self.agent_ids = [agent.id for agent in available_agents]
 
-        self.llm = self.provider_service.get_small_llm(user_id)
+        self.llm = self.agent_registry.mini_llm
 
         self.classifier_prompt = """
         Given the user query and the current agent ID, select the most appropriate agent by comparing the query’s requirements with each agent’s specialties.
@@ -147,18 +147,20 @@ class SimplifiedAgentSupervisor:
         user_id: str
         node_ids: List[NodeContext]
 
-    async def classifier_node(self, state: State) -> Command:
+    @staticmethod
+    async def classifier_node(state: State, config: RunnableConfig) -> Command:
         """Classifies the query and routes to appropriate agent"""
+        supervisor = config["configurable"]["supervisor"]
         if not state.get("query"):
             return Command(update={"response": "No query provided"}, goto=END)
 
         # Classification using LLM with enhanced prompt
-        prompt = self.classifier_prompt.format(
+        prompt = supervisor.classifier_prompt.format(
             query=state["query"],
             agent_id=state["agent_id"],
-            agent_descriptions=self.agent_descriptions,
+            agent_descriptions=supervisor.agent_descriptions,
         )
-        response = await self.llm.ainvoke(prompt)
+        response = await supervisor.llm.ainvoke(prompt)
         response = response.content.strip("`")
         try:
             agent_id, confidence = response.split("|")
@@ -167,16 +169,16 @@ class SimplifiedAgentSupervisor:
             return Command(
                 update={"response": "Error in classification format"}, goto=END
             )
-        if confidence < 0.5 or agent_id not in self.agents:
-            return Command(
-                update={"agent_id": state["agent_id"]}, goto=state["agent_id"]
-            )
+        if confidence < 0.5 or agent_id not in supervisor.agent_ids:
+            return Command(update={"agent_id": state["agent_id"]}, goto="agent")
 
-        return Command(update={"agent_id": agent_id}, goto=agent_id)
+        return Command(update={"agent_id": agent_id}, goto="agent")
 
-    async def agent_node(self, state: State, writer: StreamWriter):
-        """Creates a node function for a specific agent"""
-        agent = self.agents[state["agent_id"]]
+    @staticmethod
+    async def agent_node(state: State, config: RunnableConfig, writer: StreamWriter):
+        """Runs the agent the classifier routed to"""
+        supervisor = config["configurable"]["supervisor"]
+        agent = supervisor.agent_registry.get_agent(state["agent_id"])
         async for chunk in agent.run(
             query=state["query"],
             project_id=state["project_id"],
@@ -187,20 +189,21 @@ class SimplifiedAgentSupervisor:
             if isinstance(chunk, str):
                 writer(chunk)
 
-    def build_graph(self) -> StateGraph:
+    @classmethod
+    def build_graph(cls) -> StateGraph:
         """Builds the graph with classifier and agent nodes"""
-        builder = StateGraph(self.State)
+        builder = StateGraph(cls.State)
 
         # Add classifier as entry point
-        builder.add_node("classifier", self.classifier_node)
+        builder.add_node("classifier", cls.classifier_node)
 
-        # Add agent nodes
-        for agent_id in self.agents:
-            builder.add_node(agent_id, self.agent_node)
-            builder.add_edge(agent_id, END)
+        # One agent node serves every agent, it runs the agent_id set by the
+        # classifier so the graph shape doesn't depend on the user's agents
+        builder.add_node("agent", cls.agent_node)
+        builder.add_edge("agent", END)
 
         builder.set_entry_point("classifier")
-        return builder.compile()
+        return builder
 
     async def process_query(
         self,
@@ -222,8 +225,10 @@ class SimplifiedAgentSupervisor:
             "agent_id": agent_id,
         }
 
-        graph = self.build_graph()
-        async for chunk in graph.astream(state, stream_mode="custom"):
+        graph = get_compiled_graph("agent_supervisor", self.build_graph)
+        async for chunk in graph.astream(
+            state, {"configurable": {"supervisor": self}}, stream_mode="custom"
+        ):
             yield chunk
 
 
@@ -611,7 +616,11 @@ class ConversationService:
 
         agent_id = conversation.agent_ids[0]
         project_id = conversation.project_ids[0] if conversation.project_ids else None
-        supervisor = SimplifiedAgentSupervisor(self.sql_db, self.provider_service)
+        supervisor = SimplifiedAgentSupervisor(
+            self.sql_db,
+            self.provider_service,
+            self.agent_injector_service.registry,
+        )
         await supervisor.initialize(user_id)
         try:
             agent = self.agent_injector_service.get_agent(agent_id)
@@ -0,0 +1,96 @@
+from typing import Any, Callable, Dict
+
+from sqlalchemy.orm import Session
+
+from app.modules.intelligence.agents.chat_agents.code_changes_chat_agent import (
+    CodeChangesChatAgent,
+)
+from app.modules.intelligence.agents.chat_agents.code_gen_chat_agent import (
+    CodeGenerationChatAgent,
+)
+from app.modules.intelligence.agents.chat_agents.debugging_chat_agent import (
+    DebuggingChatAgent,
+)
+from app.modules.intelligence.agents.chat_agents.integration_test_chat_agent import (
+    IntegrationTestChatAgent,
+)
+from app.modules.intelligence.agents.chat_agents.lld_chat_agent import LLDChatAgent
+from app.modules.intelligence.agents.chat_agents.qna_chat_agent import QNAChatAgent
+from app.modules.intelligence.agents.chat_agents.unit_test_chat_agent import (
+    UnitTestAgent,
+)
+from app.modules.intelligence.agents.custom_agents.custom_agent import CustomAgent
+from app.modules.intelligence.provider.provider_service import (
+    AgentType,
+    ProviderService,
+)
+
+# System agent templates, every one is constructed as cls(mini_llm, reasoning_llm, db)
+SYSTEM_AGENT_CLASSES: Dict[str, Callable[..., Any]] = {
+    "debugging_agent": DebuggingChatAgent,
+    "codebase_qna_agent": QNAChatAgent,
+    "unit_test_agent": UnitTestAgent,
+    "integration_test_agent": IntegrationTestChatAgent,
+    "code_changes_agent": CodeChangesChatAgent,
+    "LLD_agent": LLDChatAgent,
+    "code_generation_agent": CodeGenerationChatAgent,
+}
+
+
+def is_system_agent(agent_id: str) -> bool:
+    return agent_id in SYSTEM_AGENT_CLASSES
+
+
+class AgentRegistry:
+    """
+    Request-scoped view of the process-wide agent templates.
+
+    Agents are only built when a request actually asks for them, and each is
+    built once per registry. The LLMs they share are resolved once, on first
+    use, so a request that runs a single agent no longer constructs all of
+    them or queries the user's provider preferences for every agent.
+    """
+
+    def __init__(self, db: Session, provider_service: ProviderService, user_id: str):
+        self.db = db
+        self.provider_service = provider_service
+        self.user_id = user_id
+        self._agents: Dict[str, Any] = {}
+        self._mini_llm = None
+        self._reasoning_llm = None
+
+    @property
+    def mini_llm(self):
+        if self._mini_llm is None:
+            self._mini_llm = self.provider_service.get_small_llm(
+                agent_type=AgentType.LANGCHAIN
+            )
+        return self._mini_llm
+
+    @property
+    def reasoning_llm(self):
+        if self._reasoning_llm is None:
+            self._reasoning_llm = self.provider_service.get_large_llm(
+                agent_type=AgentType.LANGCHAIN
+            )
+        return self._reasoning_llm
+
+    def get_agent(self, agent_id: str) -> Any:
+        agent = self._agents.get(agent_id)
+        if agent is None:
+            agent = self._create_agent(agent_id)
+            self._agents[agent_id] = agent
+        return agent
+
+    def _create_agent(self, agent_id: str) -> Any:
+        agent_class = SYSTEM_AGENT_CLASSES.get(agent_id)
+        if agent_class is not None:
+            return agent_class(self.mini_llm, self.reasoning_llm, self.db)
+
+        # If not a system agent, create custom agent
+        return CustomAgent(
+            llm=self.reasoning_llm,
+            db=self.db,
+            agent_id=agent_id,
+            user_id=self.user_id,
+        )
@@ -3,6 +3,7 @@ import logging
 from typing import AsyncGenerator, List
 
 from langchain.schema import HumanMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
 from langgraph.types import StreamWriter
 from sqlalchemy.orm import Session
@@ -14,6 +15,7 @@ from app.modules.intelligence.agents.agents.code_gen_agent import (
     kickoff_code_generation_crew,
 )
 from app.modules.intelligence.agents.agents_service import AgentsService
+from app.modules.intelligence.agents.compiled_graphs import get_compiled_graph
 from app.modules.intelligence.memory.chat_history_service import ChatHistoryService
 from app.modules.intelligence.prompts.prompt_service import PromptService
 
@@ -37,8 +39,12 @@ class CodeGenerationChatAgent:
         conversation_id: str
         node_ids: List[NodeContext]
 
-    async def _stream_code_gen_agent(self, state: State, writer: StreamWriter):
-        async for chunk in self.execute(
+    @staticmethod
+    async def _stream_code_gen_agent(
+        state: State, config: RunnableConfig, writer: StreamWriter
+    ):
+        agent = config["configurable"]["agent"]
+        async for chunk in agent.execute(
             state["query"],
             state["project_id"],
             state["user_id"],
@@ -47,12 +53,13 @@ class CodeGenerationChatAgent:
         ):
             writer(chunk)
 
-    def _create_graph(self):
-        graph_builder = StateGraph(CodeGenerationChatAgent.State)
-        graph_builder.add_node("code_gen_agent", self._stream_code_gen_agent)
+    @classmethod
+    def _build_graph(cls) -> StateGraph:
+        graph_builder = StateGraph(cls.State)
+        graph_builder.add_node("code_gen_agent", cls._stream_code_gen_agent)
         graph_builder.add_edge(START, "code_gen_agent")
         graph_builder.add_edge("code_gen_agent", END)
-        return graph_builder.compile()
+        return graph_builder
 
     async def run(
         self,
@@ -69,8 +76,11 @@ class CodeGenerationChatAgent:
             "conversation_id": conversation_id,
             "node_ids": node_ids,
         }
-        graph = self._create_graph()
-        async for chunk in graph.astream(state, stream_mode="custom"):
+        # Compiled once per process, this agent is passed in through the config
+        graph = get_compiled_graph("code_gen_chat_agent", self._build_graph)
+        async for chunk in graph.astream(
+            state, {"configurable": {"agent": self}}, stream_mode="custom"
+        ):
             yield chunk
 
     async def execute(
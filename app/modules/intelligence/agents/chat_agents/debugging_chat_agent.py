@@ -12,7 +12,7 @@ from langchain_core.prompts import (
     MessagesPlaceholder,
     SystemMessagePromptTemplate,
 )
-from langchain_core.runnables import RunnableSequence
+from langchain_core.runnables import RunnableConfig, RunnableSequence
 from langgraph.graph import END, START, StateGraph
 from langgraph.types import StreamWriter
 from sqlalchemy.orm import Session
@@ -23,6 +23,7 @@ from app.modules.intelligence.agents.agents.debug_rag_agent import (
     kickoff_debug_rag_agent,
 )
 from app.modules.intelligence.agents.agents_service import AgentsService
+from app.modules.intelligence.agents.compiled_graphs import get_compiled_graph
 from app.modules.intelligence.memory.chat_history_service import ChatHistoryService
 from app.modules.intelligence.prompts.classification_prompts import (
     AgentType,
@@ -94,8 +95,12 @@ class DebuggingChatAgent:
         logs: str
         stacktrace: str
 
-    async def _stream_rag_agent(self, state: State, writer: StreamWriter):
-        async for chunk in self.execute(
+    @staticmethod
+    async def _stream_rag_agent(
+        state: State, config: RunnableConfig, writer: StreamWriter
+    ):
+        agent = config["configurable"]["agent"]
+        async for chunk in agent.execute(
             state["query"],
             state["project_id"],
             state["user_id"],
@@ -106,12 +111,13 @@ class DebuggingChatAgent:
         ):
             writer(chunk)
 
-    def _create_graph(self):
-        graph_builder = StateGraph(DebuggingChatAgent.State)
-        graph_builder.add_node("rag_agent", self._stream_rag_agent)
+    @classmethod
+    def _build_graph(cls) -> StateGraph:
+        graph_builder = StateGraph(cls.State)
+        graph_builder.add_node("rag_agent", cls._stream_rag_agent)
         graph_builder.add_edge(START, "rag_agent")
         graph_builder.add_edge("rag_agent", END)
-        return graph_builder.compile()
+        return graph_builder
 
     async def run(
         self,
@@ -132,8 +138,11 @@ class DebuggingChatAgent:
             "logs": logs,
             "stacktrace": stacktrace,
         }
-        graph = self._create_graph()
-        async for chunk in graph.astream(state, stream_mode="custom"):
+        # Compiled once per process, this agent is passed in through the config
+        graph = get_compiled_graph("debugging_chat_agent", self._build_graph)
+        async for chunk in graph.astream(
+            state, {"configurable": {"agent": self}}, stream_mode="custom"
+        ):
             yield chunk
 
     async def execute(
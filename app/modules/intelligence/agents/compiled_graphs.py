@@ -0,0 +1,30 @@
+import logging
+import threading
+from typing import Callable, Dict
+
+from langgraph.graph import StateGraph
+from langgraph.graph.state import CompiledStateGraph
+
+logger = logging.getLogger(__name__)
+
+_compiled_graphs: Dict[str, CompiledStateGraph] = {}
+_compiled_graphs_lock = threading.Lock()
+
+
+def get_compiled_graph(key: str, build: Callable[[], StateGraph]) -> CompiledStateGraph:
+    """
+    Compile the graph returned by build once per process and reuse it.
+
+    Compiled graphs hold no request state: nodes read the agent that owns
+    the invocation from config["configurable"], so one graph serves every
+    request.
+    """
+    graph = _compiled_graphs.get(key)
+    if graph is None:
+        with _compiled_graphs_lock:
+            graph = _compiled_graphs.get(key)
+            if graph is None:
+                graph = build().compile()
+                _compiled_graphs[key] = graph
+                logger.info(f"Compiled agent graph {key}")
+    return graph
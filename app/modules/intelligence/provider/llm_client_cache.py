@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+from redis import Redis
+from redis.exceptions import RedisError
+
+from app.core.config_provider import config_provider
+
+logger = logging.getLogger(__name__)
+
+
+class LLMPreferenceCache:
+    """
+    Per-user preferred LLM provider, read from UserPreferences at most once
+    per TTL.
+
+    set_global_ai_provider invalidates the user's entry. With a Redis client
+    that also bumps a per-user version key every process checks before
+    serving its entry, so gunicorn and Celery workers switch provider on
+    their next lookup. Without Redis, or while it is unreachable, other
+    processes keep their entry for up to ttl.
+    """
+
+    def __init__(self, ttl: Optional[int] = None, redis: Optional[Redis] = None):
+        self.ttl = ttl or int(os.getenv("LLM_PREFERENCE_CACHE_TTL", 300))
+        self.redis = redis
+        # user_id -> (provider, cached_at, shared version it was loaded at)
+        self._entries: Dict[str, Tuple[str, float, Optional[bytes]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(user_id: str) -> str:
+        return f"llm_preference:version:{user_id}"
+
+    def _shared_version(self, user_id: str) -> Optional[bytes]:
+        if self.redis is None:
+            return None
+        try:
+            return self.redis.get(self._version_key(user_id))
+        except RedisError as e:
+            logger.warning(f"LLM preference cache version lookup failed: {e}")
+            return None
+
+    def get(self, user_id: str, load: Callable[[], str]) -> str:
+        with self._lock:
+            cached = self._entries.get(user_id)
+        version = self._shared_version(user_id)
+        if (
+            cached is not None
+            and time.time() - cached[1] < self.ttl
+            and cached[2] == version
+        ):
+            return cached[0]
+        provider = load()
+        with self._lock:
+            self._entries[user_id] = (provider, time.time(), version)
+        return provider
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+        if self.redis is not None:
+            try:
+                pipeline = self.redis.pipeline()
+                pipeline.incr(self._version_key(user_id))
+                # Entries never outlive ttl, neither does the version they carry
+                pipeline.expire(self._version_key(user_id), max(self.ttl, 1) * 2)
+                pipeline.execute()
+            except RedisError as e:
+                logger.warning(
+                    f"LLM preference invalidation for {user_id} did not reach "
+                    f"other processes: {e}"
+                )
+
+
+class LLMClientCache:
+    """
+    LLM clients reused across requests, keyed by client class and settings.
+
+    The settings include provider, model, temperature, gateway headers and a
+    fingerprint of the API key, so a rotated key gets a new client. Async
+    HTTP connections are bound to the event loop that opened them, so clients
+    are cached per running loop and dropped along with it; clients requested
+    outside a loop are built fresh. OpenAI clients additionally share one
+    keep-alive connection pool per loop.
+    """
+
+    def __init__(self, max_clients: Optional[int] = None):
+        self.max_clients = max_clients or int(os.getenv("LLM_CLIENT_CACHE_SIZE", 256))
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(
+                os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+            ),
+        )
+        self._clients = weakref.WeakKeyDictionary()  # loop -> OrderedDict
+        self._async_http_clients = weakref.WeakKeyDictionary()  # loop -> client
+        self._http_client = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(llm_class: type, settings: Dict[str, Any]) -> Tuple:
+        parts = []
+        for name, value in sorted(settings.items()):
+            if name == "api_key":
+                # Never keep raw keys around as cache keys
+                value = (
+                    hashlib.sha256(value.encode()).hexdigest()[:16] if value else None
+                )
+            elif isinstance(value, dict):
+                value = tuple(sorted(value.items()))
+            parts.append((name, value))
+        return (llm_class.__module__, llm_class.__name__, tuple(parts))
+
+    @staticmethod
+    def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def http_clients(self) -> Tuple[httpx.Client, Optional[httpx.AsyncClient]]:
+        """Shared sync client, and the async client of the running loop if any."""
+        loop = self._running_loop()
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(limits=self.limits)
+            async_client = None
+            if loop is not None:
+                async_client = self._async_http_clients.get(loop)
+                if async_client is None:
+                    async_client = httpx.AsyncClient(limits=self.limits)
+                    self._async_http_clients[loop] = async_client
+            return self._http_client, async_client
+
+    def get(self, key: Tuple, build: Callable[[], Any]) -> Any:
+        loop = self._running_loop()
+        if loop is None:
+            return build()
+
+        with self._lock:
+            clients = self._clients.setdefault(loop, OrderedDict())
+            client = clients.get(key)
+            if client is not None:
+                clients.move_to_end(key)
+                self._hits += 1
+                return client
+            self._misses += 1
+
+        client = build()
+        with self._lock:
+            clients[key] = client
+            while len(clients) > self.max_clients:
+                clients.popitem(last=False)
+        return client
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "clients": sum(len(clients) for clients in self._clients.values()),
+            }
+
+
+_llm_preference_cache = None
+_llm_client_cache = None
+
+
+def get_llm_preference_cache() -> LLMPreferenceCache:
+    global _llm_preference_cache
+    if _llm_preference_cache is None:
+        _llm_preference_cache = LLMPreferenceCache(
+            redis=Redis.from_url(
+                config_provider.get_redis_url(),
+                socket_timeout=1,
+                socket_connect_timeout=1,
+            )
+        )
+    return _llm_preference_cache
+
+
+def get_llm_client_cache() -> LLMClientCache:
+    global _llm_client_cache
+    if _llm_client_cache is None:
+        _llm_client_cache = LLMClientCache()
+    return _llm_client_cache
@@ -8,6 +8,10 @@ from langchain_anthropic import ChatAnthropic
 from langchain_openai.chat_models import ChatOpenAI
 from portkey_ai import PORTKEY_GATEWAY_URL, createHeaders
 
+from app.modules.intelligence.provider.llm_client_cache import (
+    get_llm_client_cache,
+    get_llm_preference_cache,
+)
 from app.modules.key_management.secret_manager import SecretManager
 from app.modules.users.user_preferences_model import UserPreferences
 from app.modules.utils.posthog_helper import PostHogClient
@@ -75,22 +79,47 @@ class ProviderService:
         )
 
         self.db.commit()
+        get_llm_preference_cache().invalidate(user_id)
         return {"message": f"AI provider set to {provider}"}
 
-    def get_large_llm(self, agent_type: AgentType):
-        # Get user preferences from the database
-        user_pref = (
-            self.db.query(UserPreferences)
-            .filter(UserPreferences.user_id == self.user_id)
-            .first()
-        )
+    def _get_preferred_provider(self, user_id: str) -> str:
+        def load() -> str:
+            user_pref = (
+                self.db.query(UserPreferences)
+                .filter(UserPreferences.user_id == user_id)
+                .first()
+            )
+            # Determine preferred provider (default to 'openai')
+            return (
+                user_pref.preferences.get("llm_provider", "openai")
+                if user_pref and user_pref.preferences
+                else "openai"
+            )
 
-        # Determine preferred provider (default to 'openai')
-        preferred_provider = (
-            user_pref.preferences.get("llm_provider", "openai")
-            if user_pref
-            else "openai"
-        )
+        return get_llm_preference_cache().get(user_id, load)
+
+    def _get_client(self, llm_class, **settings):
+        """Reuse a client built with the same settings, see LLMClientCache."""
+        if llm_class is LLM:
+            # crewai executors modify their LLM (stop words), so never share one,
+            # litellm pools the underlying connections itself
+            return LLM(**settings)
+        client_cache = get_llm_client_cache()
+
+        def build():
+            if llm_class is ChatOpenAI:
+                http_client, http_async_client = client_cache.http_clients()
+                return llm_class(
+                    **settings,
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                )
+            return llm_class(**settings)
+
+        return client_cache.get(client_cache.make_key(llm_class, settings), build)
+
+    def get_large_llm(self, agent_type: AgentType):
+        preferred_provider = self._get_preferred_provider(self.user_id)
 
         if preferred_provider == "openai":
             logging.info("Initializing OpenAI LLM")
@@ -100,13 +129,15 @@ class ProviderService:
                 )
                 openai_key = os.getenv("OPENAI_API_KEY")
                 if agent_type == AgentType.CREWAI:
-                    self.llm = LLM(
+                    self.llm = self._get_client(
+                        LLM,
                         model="openai/gpt-4o-mini",
                         api_key=openai_key,
                         temperature=0.3,
                     )
                 else:
-                    self.llm = ChatOpenAI(
+                    self.llm = self._get_client(
+                        ChatOpenAI,
                         model_name="gpt-4o",
                         api_key=openai_key,
                         temperature=0.3,
@@ -130,11 +161,12 @@ class ProviderService:
                     },
                 )
                 if agent_type == AgentType.CREWAI:
-                    self.llm = LLM(
-                        model="openai/gpt-4o", api_key=openai_key, temperature=0.3
+                    self.llm = self._get_client(
+                        LLM, model="openai/gpt-4o", api_key=openai_key, temperature=0.3
                     )
                 else:
-                    self.llm = ChatOpenAI(
+                    self.llm = self._get_client(
+                        ChatOpenAI,
                         model_name="gpt-4o",
                         api_key=openai_key,
                         temperature=0.3,
@@ -150,13 +182,15 @@ class ProviderService:
                 )
                 anthropic_key = os.getenv("ANTHROPIC_API_KEY")
                 if agent_type == AgentType.CREWAI:
-                    self.llm = LLM(
+                    self.llm = self._get_client(
+                        LLM,
                         model="anthropic/claude-3-5-sonnet-20241022",
                         temperature=0.3,
                         api_key=anthropic_key,
                     )
                 else:
-                    self.llm = ChatAnthropic(
+                    self.llm = self._get_client(
+                        ChatAnthropic,
                         model="claude-3-5-sonnet-20241022",
                         temperature=0.3,
                         api_key=anthropic_key,
@@ -181,13 +215,15 @@ class ProviderService:
                 )
 
                 if agent_type == AgentType.CREWAI:
-                    self.llm = LLM(
+                    self.llm = self._get_client(
+                        LLM,
                         model="anthropic/claude-3-5-sonnet-20241022",
                         temperature=0.3,
                         api_key=anthropic_key,
                     )
                 else:
-                    self.llm = ChatAnthropic(
+                    self.llm = self._get_client(
+                        ChatAnthropic,
                         model="claude-3-5-sonnet-20241022",
                         temperature=0.3,
                         api_key=anthropic_key,
@@ -201,24 +237,7 @@ class ProviderService:
         return self.llm
 
     def get_small_llm(self, agent_type: AgentType):
-        # Get user preferences from the database
-        if self.user_id == "dummy":
-            user_pref = UserPreferences(
-                user_id=self.user_id, preferences={"llm_provider": "openai"}
-            )
-
-        user_pref = (
-            self.db.query(UserPreferences)
-            .filter(UserPreferences.user_id == self.user_id)
-            .first()
-        )
-
-        # Determine preferred provider (default to 'openai')
-        preferred_provider = (
-            user_pref.preferences.get("llm_provider", "openai")
-            if user_pref
-            else "openai"
-        )
+        preferred_provider = self._get_preferred_provider(self.user_id)
 
         if preferred_provider == "openai":
             if os.getenv("isDevelopmentMode") == "enabled":
@@ -227,13 +246,15 @@ class ProviderService:
                 )
                 openai_key = os.getenv("OPENAI_API_KEY")
                 if agent_type == AgentType.CREWAI:
-                    self.llm = LLM(
+                    self.llm = self._get_client(
+                        LLM,
                         model="openai/gpt-4o-mini",
                         api_key=openai_key,
                         temperature=0.3,
                     )
                 else:
-                    self.llm = ChatOpenAI(
+                    self.llm = self._get_client(
+                        ChatOpenAI,
                         model_name="gpt-4o-mini",
                         api_key=openai_key,
                         temperature=0.3,
@@ -257,13 +278,15 @@ class ProviderService:
                     },
                 )
                 if agent_type == AgentType.CREWAI:
-                    self.llm = LLM(
+                    self.llm = self._get_client(
+                        LLM,
                         model="openai/gpt-4o-mini",
                         api_key=openai_key,
                         temperature=0.3,
                     )
                 else:
-                    self.llm = ChatOpenAI(
+                    self.llm = self._get_client(
+                        ChatOpenAI,
                         model_name="gpt-4o-mini",
                         api_key=openai_key,
                         temperature=0.3,
@@ -278,13 +301,15 @@ class ProviderService:
                 )
                 anthropic_key = os.getenv("ANTHROPIC_API_KEY")
                 if agent_type == AgentType.CREWAI:
-                    self.llm = LLM(
+                    self.llm = self._get_client(
+                        LLM,
                         model="anthropic/claude-3-haiku-20240307",
                         temperature=0.3,
                         api_key=anthropic_key,
                     )
                 else:
-                    self.llm = ChatAnthropic(
+                    self.llm = self._get_client(
+                        ChatAnthropic,
                         model="claude-3-haiku-20240307",
                         temperature=0.3,
                         api_key=anthropic_key,
@@ -309,13 +334,15 @@ class ProviderService:
                 )
 
                 if agent_type == AgentType.CREWAI:
-                    self.llm = LLM(
+                    self.llm = self._get_client(
+                        LLM,
                         model="anthropic/claude-3-haiku-20240307",
                         temperature=0.3,
                         api_key=anthropic_key,
                     )
                 else:
-                    self.llm = ChatAnthropic(
+                    self.llm = self._get_client(
+                        ChatAnthropic,
                         model="claude-3-haiku-20240307",
                         temperature=0.3,
                         api_key=anthropic_key,
@@ -343,17 +370,7 @@ class ProviderService:
             return "Unknown"
 
     async def get_preferred_llm(self, user_id: str) -> Tuple[str, str]:
-        user_pref = (
-            self.db.query(UserPreferences)
-            .filter(UserPreferences.user_id == user_id)
-            .first()
-        )
-
-        preferred_provider = (
-            user_pref.preferences.get("llm_provider", "openai")
-            if user_pref
-            else "openai"
-        )
+        preferred_provider = self._get_preferred_provider(user_id)
 
         model_type = (
             "gpt-4o" if preferred_provider == "openai" else "claude-3-5-sonnet-20241022"
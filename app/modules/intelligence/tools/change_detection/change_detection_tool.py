@@ -8,6 +8,7 @@ from pydantic import BaseModel, Field
 from tree_sitter_languages import get_parser
 
 from app.core.database import get_db
+from app.core.neo4j_manager import get_neo4j_manager
 from app.modules.code_provider.code_provider_service import CodeProviderService
 from app.modules.code_provider.github.github_service import GithubService
 from app.modules.code_provider.local_repo.local_repo_service import LocalRepoService
@@ -163,10 +164,9 @@ class ChangeDetectionTool:
 
     def traverse(self, identifier, project_id, neighbors_fn):
         neighbors_query = neighbors_fn(with_bodies=False)
-        with self.driver.session() as session:
-            return session.read_transaction(
-                self._traverse, identifier, project_id, neighbors_query
-            )
+        return get_neo4j_manager().execute_read(
+            self._traverse, identifier, project_id, neighbors_query
+        )
 
     def find_entry_points(self, identifiers, project_id):
         all_inbound_nodes = set()
@@ -4,10 +4,9 @@ from typing import Any, Dict
 
 from fastapi import HTTPException
 from langchain_core.tools import StructuredTool, Tool
-from neo4j import GraphDatabase
 from sqlalchemy.orm import Session
 
-from app.core.config_provider import config_provider
+from app.core.neo4j_manager import get_neo4j_manager
 from app.modules.code_provider.code_provider_service import CodeProviderService
 from app.modules.projects.projects_model import Project
 from app.modules.projects.projects_service import ProjectService
@@ -33,14 +32,7 @@ class GetCodeFromNodeNameTool:
     def __init__(self, sql_db: Session, user_id: str):
         self.sql_db = sql_db
         self.user_id = user_id
-        self.neo4j_driver = self._create_neo4j_driver()
-
-    def _create_neo4j_driver(self) -> GraphDatabase.driver:
-        neo4j_config = config_provider.get_neo4j_config()
-        return GraphDatabase.driver(
-            neo4j_config["uri"],
-            auth=(neo4j_config["username"], neo4j_config["password"]),
-        )
+        self.neo4j_manager = get_neo4j_manager()
 
     async def arun(self, project_id: str, node_name: str) -> Dict[str, Any]:
         return await asyncio.to_thread(self.run, project_id, node_name)
@@ -87,9 +79,10 @@ class GetCodeFromNodeNameTool:
         WHERE toLower(n.name) = toLower($node_name)
         RETURN n.file_path AS file, n.start_line AS start_line, n.end_line AS end_line, n.node_id AS node_id
         """
-        with self.neo4j_driver.session() as session:
-            result = session.run(query, node_name=node_name, project_id=project_id)
-            return result.single()
+        records = self.neo4j_manager.run_read(
+            query, node_name=node_name, project_id=project_id
+        )
+        return records[0] if records else None
 
     def _get_project(self, project_id: str) -> Project:
         return self.sql_db.query(Project).filter(Project.id == project_id).first()
@@ -137,10 +130,6 @@ class GetCodeFromNodeNameTool:
             logger.warning(f"'projects' not found in file path: {file_path}")
             return file_path
 
-    def __del__(self):
-        if hasattr(self, "neo4j_driver"):
-            self.neo4j_driver.close()
-
 
 def get_code_from_node_name_tool(sql_db: Session, user_id: str) -> Tool:
     tool_instance = GetCodeFromNodeNameTool(sql_db, user_id)
@@ -3,10 +3,9 @@ import logging
 from typing import Any, Dict, List, Optional
 
 from langchain_core.tools import StructuredTool, Tool
-from neo4j import GraphDatabase
 from sqlalchemy.orm import Session
 
-from app.core.config_provider import config_provider
+from app.core.neo4j_manager import get_neo4j_manager
 from app.modules.projects.projects_model import Project
 
 
@@ -41,15 +40,7 @@ class GetCodeGraphFromNodeIdTool:
             sql_db (Session): SQLAlchemy database session.
         """
         self.sql_db = sql_db
-        self.neo4j_driver = self._create_neo4j_driver()
-
-    def _create_neo4j_driver(self) -> GraphDatabase.driver:
-        """Create and return a Neo4j driver instance."""
-        neo4j_config = config_provider.get_neo4j_config()
-        return GraphDatabase.driver(
-            neo4j_config["uri"],
-            auth=(neo4j_config["username"], neo4j_config["password"]),
-        )
+        self.neo4j_manager = get_neo4j_manager()
 
     async def arun(self, project_id: str, node_id: str) -> Dict[str, Any]:
         return await asyncio.to_thread(self.run, project_id, node_id)
@@ -119,12 +110,13 @@ class GetCodeGraphFromNodeIdTool:
             children: children
         } as node_data
         """
-        with self.neo4j_driver.session() as session:
-            result = session.run(query, node_id=node_id, project_id=project_id)
-            nodes = [record["node_data"] for record in result]
-            if not nodes:
-                return None
-            return self._build_tree(nodes, node_id)
+        records = self.neo4j_manager.run_read(
+            query, node_id=node_id, project_id=project_id
+        )
+        nodes = [record["node_data"] for record in records]
+        if not nodes:
+            return None
+        return self._build_tree(nodes, node_id)
 
     def _build_tree(
         self, nodes: List[Dict[str, Any]], root_id: str
@@ -202,11 +194,6 @@ class GetCodeGraphFromNodeIdTool:
         except ValueError:
             return file_path
 
-    def __del__(self):
-        """Ensure Neo4j driver is closed when the object is destroyed."""
-        if hasattr(self, "neo4j_driver"):
-            self.neo4j_driver.close()
-
 
 def get_code_graph_from_node_id_tool(sql_db: Session) -> Tool:
     tool_instance = GetCodeGraphFromNodeIdTool(sql_db)
@@ -3,10 +3,9 @@ import logging
 from typing import Any, Dict, List, Optional
 
 from langchain_core.tools import StructuredTool, Tool
-from neo4j import GraphDatabase
 from sqlalchemy.orm import Session
 
-from app.core.config_provider import config_provider
+from app.core.neo4j_manager import get_neo4j_manager
 
 
 class GetNodeNeighboursFromNodeIdTool:
@@ -34,15 +33,7 @@ class GetNodeNeighboursFromNodeIdTool:
             sql_db (Session): SQLAlchemy database session.
         """
         self.sql_db = sql_db
-        self.neo4j_driver = self._create_neo4j_driver()
-
-    def _create_neo4j_driver(self) -> GraphDatabase.driver:
-        """Create and return a Neo4j driver instance."""
-        neo4j_config = config_provider.get_neo4j_config()
-        return GraphDatabase.driver(
-            neo4j_config["uri"],
-            auth=(neo4j_config["username"], neo4j_config["password"]),
-        )
+        self.neo4j_manager = get_neo4j_manager()
 
     async def arun(self, project_id: str, node_ids: List[str]) -> Dict[str, Any]:
         return await asyncio.to_thread(self.run, project_id, node_ids)
@@ -95,18 +86,12 @@ class GetNodeNeighboursFromNodeIdTool:
             docstring: docstring
         }) as neighbors
         """
-        with self.neo4j_driver.session() as session:
-            result = session.run(query, project_id=project_id, node_ids=node_ids)
-            record = result.single()
-
-            if not record:
-                return None
-            return record["neighbors"]
-
-    def __del__(self):
-        """Ensure Neo4j driver is closed when the object is destroyed."""
-        if hasattr(self, "neo4j_driver"):
-            self.neo4j_driver.close()
+        records = self.neo4j_manager.run_read(
+            query, project_id=project_id, node_ids=node_ids
+        )
+        if not records:
+            return None
+        return records[0]["neighbors"]
 
 
 def get_node_neighbours_from_node_id_tool(sql_db: Session) -> Tool:
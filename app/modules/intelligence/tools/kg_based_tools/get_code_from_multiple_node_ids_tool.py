@@ -3,12 +3,14 @@ import logging
 from typing import Any, Dict, List
 
 from langchain.tools import StructuredTool
-from neo4j import GraphDatabase
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from app.core.config_provider import config_provider
+from app.core.neo4j_manager import get_neo4j_manager
 from app.modules.code_provider.code_provider_service import CodeProviderService
+from app.modules.parsing.graph_construction.source_blob_store import (
+    get_source_blob_store,
+)
 from app.modules.projects.projects_model import Project
 
 logger = logging.getLogger(__name__)
@@ -40,17 +42,10 @@ class GetCodeFromMultipleNodeIdsTool:
     def __init__(self, sql_db: Session, user_id: str):
         self.sql_db = sql_db
         self.user_id = user_id
-        self.neo4j_driver = self._create_neo4j_driver()
-
-    def _create_neo4j_driver(self) -> GraphDatabase.driver:
-        neo4j_config = config_provider.get_neo4j_config()
-        return GraphDatabase.driver(
-            neo4j_config["uri"],
-            auth=(neo4j_config["username"], neo4j_config["password"]),
-        )
+        self.neo4j_manager = get_neo4j_manager()
 
     async def arun(self, project_id: str, node_ids: List[str]) -> Dict[str, Any]:
-        return await asyncio.to_thread(self.run, project_id, node_ids)
+        return await self.run_multiple(project_id, node_ids)
 
     def run(self, project_id: str, node_ids: List[str]) -> Dict[str, Any]:
         return asyncio.run(self.run_multiple(project_id, node_ids))
@@ -70,46 +65,58 @@ class GetCodeFromMultipleNodeIdsTool:
                     f"Project with ID '{project_id}' not found in database for user '{self.user_id}'"
                 )
 
-            tasks = [
-                self._retrieve_node_data(project_id, node_id, project)
-                for node_id in node_ids
-            ]
-            completed_tasks = await asyncio.gather(*tasks)
-
-            return {
-                node_id: result for node_id, result in zip(node_ids, completed_tasks)
-            }
+            return await asyncio.to_thread(
+                self._retrieve_nodes_data, project_id, node_ids, project
+            )
         except Exception as e:
             logger.error(
                 f"Unexpected error in GetCodeFromMultipleNodeIdsTool: {str(e)}"
             )
             return {"error": f"An unexpected error occurred: {str(e)}"}
 
-    async def _retrieve_node_data(
-        self, project_id: str, node_id: str, project: Project
+    def _retrieve_nodes_data(
+        self, project_id: str, node_ids: List[str], project: Project
     ) -> Dict[str, Any]:
-        node_data = self._get_node_data(project_id, node_id)
-        if node_data:
-            return self._process_result(node_data, project, node_id)
-        else:
-            return {
-                "error": f"Node with ID '{node_id}' not found in repo '{project_id}'"
-            }
+        nodes_data = self._get_nodes_data(project_id, list(dict.fromkeys(node_ids)))
+        # Nodes from the same file share one fetch of the whole file
+        file_contents = {}
+        results = {}
+        for node_id in node_ids:
+            node_data = nodes_data.get(node_id)
+            if node_data:
+                results[node_id] = self._process_result(
+                    node_data, project, node_id, file_contents
+                )
+            else:
+                results[node_id] = {
+                    "error": f"Node with ID '{node_id}' not found in repo '{project_id}'"
+                }
+        return results
 
-    def _get_node_data(self, project_id: str, node_id: str) -> Dict[str, Any]:
+    def _get_nodes_data(
+        self, project_id: str, node_ids: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        if not node_ids:
+            return {}
         query = """
-        MATCH (n:NODE {node_id: $node_id, repoId: $project_id})
-        RETURN n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.text as code, n.docstring as docstring
+        UNWIND $node_ids AS node_id
+        MATCH (n:NODE {node_id: node_id, repoId: $project_id})
+        RETURN n.node_id AS node_id, n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.text as code, n.docstring as docstring, n.content_hash AS content_hash
         """
-        with self.neo4j_driver.session() as session:
-            result = session.run(query, node_id=node_id, project_id=project_id)
-            return result.single()
+        records = self.neo4j_manager.run_read(
+            query, node_ids=node_ids, project_id=project_id
+        )
+        return {record["node_id"]: record for record in records}
 
     def _get_project(self, project_id: str) -> Project:
         return self.sql_db.query(Project).filter(Project.id == project_id).first()
 
     def _process_result(
-        self, node_data: Dict[str, Any], project: Project, node_id: str
+        self,
+        node_data: Dict[str, Any],
+        project: Project,
+        node_id: str,
+        file_contents: Dict[str, List[str]],
     ) -> Dict[str, Any]:
         file_path = node_data["file_path"]
         start_line = node_data["start_line"]
@@ -117,14 +124,27 @@ class GetCodeFromMultipleNodeIdsTool:
 
         relative_file_path = self._get_relative_file_path(file_path)
 
-        code_content = CodeProviderService(self.sql_db).get_file_content(
-            project.repo_name,
-            relative_file_path,
-            start_line,
-            end_line,
-            project.branch_name,
-            project.id,
+        # Prefer the source stored at parse time, fall back to the code provider
+        code_content = get_source_blob_store().read_file_lines(
+            node_data.get("content_hash"), start_line, end_line
         )
+        if code_content is None:
+            if relative_file_path not in file_contents:
+                file_contents[relative_file_path] = (
+                    CodeProviderService(self.sql_db)
+                    .get_file_content(
+                        project.repo_name,
+                        relative_file_path,
+                        0,
+                        0,
+                        project.branch_name,
+                        project.id,
+                    )
+                    .splitlines()
+                )
+            code_content = CodeProviderService.select_lines(
+                file_contents[relative_file_path], start_line, end_line
+            )
 
         docstring = None
         if node_data.get("docstring", None):
@@ -149,10 +169,6 @@ class GetCodeFromMultipleNodeIdsTool:
             logger.warning(f"'projects' not found in file path: {file_path}")
             return file_path
 
-    def __del__(self):
-        if hasattr(self, "neo4j_driver"):
-            self.neo4j_driver.close()
-
 
 def get_code_from_multiple_node_ids_tool(
     sql_db: Session, user_id: str
@@ -3,12 +3,14 @@ import logging
 from typing import Any, Dict
 
 from langchain.tools import StructuredTool
-from neo4j import GraphDatabase
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from app.core.config_provider import config_provider
+from app.core.neo4j_manager import get_neo4j_manager
 from app.modules.code_provider.code_provider_service import CodeProviderService
+from app.modules.parsing.graph_construction.source_blob_store import (
+    get_source_blob_store,
+)
 from app.modules.projects.projects_model import Project
 
 logger = logging.getLogger(__name__)
@@ -37,14 +39,7 @@ class GetCodeFromNodeIdTool:
     def __init__(self, sql_db: Session, user_id: str):
         self.sql_db = sql_db
         self.user_id = user_id
-        self.neo4j_driver = self._create_neo4j_driver()
-
-    def _create_neo4j_driver(self) -> GraphDatabase.driver:
-        neo4j_config = config_provider.get_neo4j_config()
-        return GraphDatabase.driver(
-            neo4j_config["uri"],
-            auth=(neo4j_config["username"], neo4j_config["password"]),
-        )
+        self.neo4j_manager = get_neo4j_manager()
 
     async def arun(self, project_id: str, node_id: str) -> Dict[str, Any]:
         return await asyncio.to_thread(self.run, project_id, node_id)
@@ -80,11 +75,12 @@ class GetCodeFromNodeIdTool:
     def _get_node_data(self, project_id: str, node_id: str) -> Dict[str, Any]:
         query = """
         MATCH (n:NODE {node_id: $node_id, repoId: $project_id})
-        RETURN n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.text as code, n.docstring as docstring
+        RETURN n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.text as code, n.docstring as docstring, n.content_hash AS content_hash
         """
-        with self.neo4j_driver.session() as session:
-            result = session.run(query, node_id=node_id, project_id=project_id)
-            return result.single()
+        records = self.neo4j_manager.run_read(
+            query, node_id=node_id, project_id=project_id
+        )
+        return records[0] if records else None
 
     def _get_project(self, project_id: str) -> Project:
         return self.sql_db.query(Project).filter(Project.id == project_id).first()
@@ -98,14 +94,19 @@ class GetCodeFromNodeIdTool:
 
         relative_file_path = self._get_relative_file_path(file_path)
 
-        code_content = CodeProviderService(self.sql_db).get_file_content(
-            project.repo_name,
-            relative_file_path,
-            start_line,
-            end_line,
-            project.branch_name,
-            project.id,
+        # Prefer the source stored at parse time, fall back to the code provider
+        code_content = get_source_blob_store().read_file_lines(
+            node_data.get("content_hash"), start_line, end_line
         )
+        if code_content is None:
+            code_content = CodeProviderService(self.sql_db).get_file_content(
+                project.repo_name,
+                relative_file_path,
+                start_line,
+                end_line,
+                project.branch_name,
+                project.id,
+            )
 
         docstring = None
         if node_data.get("docstring", None):
@@ -130,10 +131,6 @@ class GetCodeFromNodeIdTool:
             logger.warning(f"'projects' not found in file path: {file_path}")
             return file_path
 
-    def __del__(self):
-        if hasattr(self, "neo4j_driver"):
-            self.neo4j_driver.close()
-
 
 def get_code_from_node_id_tool(sql_db: Session, user_id: str) -> StructuredTool:
     tool_instance = GetCodeFromNodeIdTool(sql_db, user_id)
@@ -1,16 +1,17 @@
 import asyncio
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from langchain.tools import StructuredTool
-from neo4j import GraphDatabase
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from app.core.config_provider import config_provider
+from app.core.neo4j_manager import get_neo4j_manager
 from app.modules.code_provider.code_provider_service import CodeProviderService
+from app.modules.parsing.graph_construction.source_blob_store import (
+    get_source_blob_store,
+)
 from app.modules.projects.projects_model import Project
-from app.modules.projects.projects_service import ProjectService
 from app.modules.search.search_service import SearchService
 
 logger = logging.getLogger(__name__)
@@ -44,79 +45,85 @@ class GetCodeFromProbableNodeNameTool:
     def __init__(self, sql_db: Session, user_id: str):
         self.sql_db = sql_db
         self.user_id = user_id
-        self.neo4j_driver = self._create_neo4j_driver()
+        self.neo4j_manager = get_neo4j_manager()
         self.search_service = SearchService(self.sql_db)
 
-    def _create_neo4j_driver(self) -> GraphDatabase.driver:
-        neo4j_config = config_provider.get_neo4j_config()
-        return GraphDatabase.driver(
-            neo4j_config["uri"],
-            auth=(neo4j_config["username"], neo4j_config["password"]),
+    def find_node_from_probable_name(
+        self, project_id: str, probable_node_names: List[str], project: Project
+    ) -> List[Dict[str, Any]]:
+        matches = self.search_service.resolve_probable_names(
+            project_id, probable_node_names
+        )
+        node_ids = list(dict.fromkeys(match["node_id"] for match in matches if match))
+        nodes_data = self._get_nodes_data(project_id, node_ids) if node_ids else {}
+        return self._process_results(
+            project_id, probable_node_names, matches, nodes_data, project
         )
 
-    async def process_probable_node_name(
-        self, project_id: str, probable_node_name: str
-    ):
-        try:
-            node_id_query = " ".join(
-                probable_node_name.replace("/", " ").replace(":", " ").split()
-            )
-            relevance_search = await self.search_service.search_codebase(
-                project_id, node_id_query
-            )
-            node_id = None
-            if relevance_search:
-                node_id = relevance_search[0]["node_id"]
-
-            if not node_id:
-                return {
-                    "error": f"Node with name '{probable_node_name}' not found in project '{project_id}'"
-                }
-
-            return await self.execute(project_id, node_id)
-        except Exception as e:
-            logger.error(
-                f"Unexpected error in GetCodeFromProbableNodeNameTool: {str(e)}"
-            )
-            return {"error": f"An unexpected error occurred: {str(e)}"}
-
-    async def find_node_from_probable_name(
-        self, project_id: str, probable_node_names: List[str]
+    def _process_results(
+        self,
+        project_id: str,
+        probable_node_names: List[str],
+        matches: List[Optional[Dict[str, Any]]],
+        nodes_data: Dict[str, Dict[str, Any]],
+        project: Project,
     ) -> List[Dict[str, Any]]:
-        tasks = [
-            self.process_probable_node_name(project_id, name)
-            for name in probable_node_names
-        ]
-        return await asyncio.gather(*tasks)
+        # Several names often point into the same file, fetch each file once
+        file_contents = {}
+        results = []
+        for probable_node_name, match in zip(probable_node_names, matches):
+            if not match:
+                results.append(
+                    {
+                        "error": f"Node with name '{probable_node_name}' not found in project '{project_id}'"
+                    }
+                )
+                continue
+            node_id = match["node_id"]
+            node_data = nodes_data.get(node_id)
+            if not node_data:
+                logger.error(
+                    f"Node with ID '{node_id}' not found in repo '{project_id}'"
+                )
+                results.append(
+                    {
+                        "error": f"Node with ID '{node_id}' not found in repo '{project_id}'"
+                    }
+                )
+                continue
+            if not project:
+                logger.error(f"Project with ID '{project_id}' not found in database")
+                results.append(
+                    {"error": f"Project with ID '{project_id}' not found in database"}
+                )
+                continue
+            try:
+                results.append(
+                    self._process_result(node_data, project, node_id, file_contents)
+                )
+            except Exception as e:
+                logger.error(
+                    f"Unexpected error in GetCodeFromProbableNodeNameTool: {str(e)}"
+                )
+                results.append({"error": f"An unexpected error occurred: {str(e)}"})
+        return results
 
     async def arun(
         self, project_id: str, probable_node_names: List[str]
     ) -> List[Dict[str, Any]]:
+        # Symbol index loads and rebuilds, Postgres and Neo4j queries all block
         return await asyncio.to_thread(self.run, project_id, probable_node_names)
 
     def run(
         self, project_id: str, probable_node_names: List[str]
     ) -> List[Dict[str, Any]]:
-        return asyncio.run(
-            asyncio.to_thread(
-                self.get_code_from_probable_node_name, project_id, probable_node_names
-            )
-        )
-
-    def get_code_from_probable_node_name(
-        self, project_id: str, probable_node_names: List[str]
-    ) -> List[Dict[str, Any]]:
-        project = asyncio.run(
-            ProjectService(self.sql_db).get_project_repo_details_from_db(
-                project_id, self.user_id
-            )
-        )
+        project = self._get_user_project(project_id)
         if not project:
             raise ValueError(
                 f"Project with ID '{project_id}' not found in database for user '{self.user_id}'"
             )
-        return asyncio.run(
-            self.find_node_from_probable_name(project_id, probable_node_names)
+        return self.find_node_from_probable_name(
+            project_id, probable_node_names, project
         )
 
     async def execute(self, project_id: str, node_id: str) -> Dict[str, Any]:
@@ -150,17 +157,42 @@ class GetCodeFromProbableNodeNameTool:
     def _get_node_data(self, project_id: str, node_id: str) -> Dict[str, Any]:
         query = """
         MATCH (n:NODE {node_id: $node_id, repoId: $project_id})
-        RETURN n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.text as code, n.docstring as docstring
+        RETURN n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.text as code, n.docstring as docstring, n.content_hash AS content_hash
         """
-        with self.neo4j_driver.session() as session:
-            result = session.run(query, node_id=node_id, project_id=project_id)
-            return result.single()
+        records = self.neo4j_manager.run_read(
+            query, node_id=node_id, project_id=project_id
+        )
+        return records[0] if records else None
+
+    def _get_nodes_data(
+        self, project_id: str, node_ids: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        query = """
+        UNWIND $node_ids AS node_id
+        MATCH (n:NODE {node_id: node_id, repoId: $project_id})
+        RETURN n.node_id AS node_id, n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.text as code, n.docstring as docstring, n.content_hash AS content_hash
+        """
+        records = self.neo4j_manager.run_read(
+            query, node_ids=node_ids, project_id=project_id
+        )
+        return {record["node_id"]: record for record in records}
 
     def _get_project(self, project_id: str) -> Project:
         return self.sql_db.query(Project).filter(Project.id == project_id).first()
 
+    def _get_user_project(self, project_id: str) -> Optional[Project]:
+        return (
+            self.sql_db.query(Project)
+            .filter(Project.id == project_id, Project.user_id == self.user_id)
+            .first()
+        )
+
     def _process_result(
-        self, node_data: Dict[str, Any], project: Project, node_id: str
+        self,
+        node_data: Dict[str, Any],
+        project: Project,
+        node_id: str,
+        file_contents: Optional[Dict[str, List[str]]] = None,
     ) -> Dict[str, Any]:
         file_path = node_data["file_path"]
         start_line = node_data["start_line"]
@@ -168,14 +200,36 @@ class GetCodeFromProbableNodeNameTool:
 
         relative_file_path = self._get_relative_file_path(file_path)
 
-        code_content = CodeProviderService(self.sql_db).get_file_content(
-            project.repo_name,
-            relative_file_path,
-            start_line,
-            end_line,
-            project.branch_name,
-            project.id,
+        # Prefer the source stored at parse time, fall back to the code provider
+        code_content = get_source_blob_store().read_file_lines(
+            node_data.get("content_hash"), start_line, end_line
         )
+        if code_content is None and file_contents is not None:
+            if relative_file_path not in file_contents:
+                file_contents[relative_file_path] = (
+                    CodeProviderService(self.sql_db)
+                    .get_file_content(
+                        project.repo_name,
+                        relative_file_path,
+                        0,
+                        0,
+                        project.branch_name,
+                        project.id,
+                    )
+                    .splitlines()
+                )
+            code_content = CodeProviderService.select_lines(
+                file_contents[relative_file_path], start_line, end_line
+            )
+        elif code_content is None:
+            code_content = CodeProviderService(self.sql_db).get_file_content(
+                project.repo_name,
+                relative_file_path,
+                start_line,
+                end_line,
+                project.branch_name,
+                project.id,
+            )
 
         docstring = None
         if node_data.get("docstring", None):
@@ -200,10 +254,6 @@ class GetCodeFromProbableNodeNameTool:
             logger.warning(f"'projects' not found in file path: {file_path}")
             return file_path
 
-    def __del__(self):
-        if hasattr(self, "neo4j_driver"):
-            self.neo4j_driver.close()
-
 
 def get_code_from_probable_node_name_tool(
     sql_db: Session, user_id: str
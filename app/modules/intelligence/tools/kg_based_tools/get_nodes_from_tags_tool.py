@@ -4,7 +4,6 @@ from typing import List
 from langchain.tools import StructuredTool
 from pydantic import BaseModel, Field
 
-from app.core.config_provider import ConfigProvider
 from app.core.database import get_db
 from app.modules.parsing.graph_construction.code_graph_service import CodeGraphService
 from app.modules.projects.projects_service import ProjectService
@@ -92,13 +91,7 @@ class GetNodesFromTags:
         WHERE ({tag_conditions}) AND n.repoId = '{project_id}'
         RETURN n.file_path AS file_path, n.docstring AS docstring, n.text AS text, n.node_id AS node_id, n.name AS name
         """
-        neo4j_config = ConfigProvider().get_neo4j_config()
-        nodes = CodeGraphService(
-            neo4j_config["uri"],
-            neo4j_config["username"],
-            neo4j_config["password"],
-            next(get_db()),
-        ).query_graph(query)
+        nodes = CodeGraphService(next(get_db())).query_graph(query)
         return nodes
 
 
@@ -0,0 +1,181 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+from app.core.config_provider import config_provider
+
+logger = logging.getLogger(__name__)
+
+
+class SecretCache:
+    """
+    Short-lived in-memory cache of provider secrets keyed by
+    (provider, customer_id).
+
+    Lookups are single-flight: concurrent callers asking for the same secret
+    wait for one fetch instead of each calling the backend. Writes to a
+    secret invalidate its entry, and a fetch that was already running when
+    the secret changed doesn't repopulate the cache with the old value.
+    Values are whatever the fetch callable returns, including None for a
+    secret that doesn't exist, so any backend can be plugged in. Misses are
+    only kept for negative_ttl, so a key created through another path shows
+    up quickly.
+
+    With a Redis client, invalidate also bumps a per-secret version key that
+    every process checks before serving an entry, so a write in one worker
+    is seen by the others on their next lookup. Without Redis, or while it is
+    unreachable, other processes keep serving their entry for up to ttl
+    (negative_ttl for a missing secret).
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[int] = None,
+        negative_ttl: Optional[int] = None,
+        redis: Optional[Redis] = None,
+    ):
+        self.ttl = ttl if ttl is not None else int(os.getenv("SECRET_CACHE_TTL", 300))
+        self.negative_ttl = (
+            negative_ttl
+            if negative_ttl is not None
+            else int(os.getenv("SECRET_CACHE_NEGATIVE_TTL", 30))
+        )
+        self.redis = redis
+        # (value, cached_at, shared version it was fetched at)
+        self._entries: Dict[Tuple[str, str], Tuple[Any, float, Optional[bytes]]] = {}
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        # Only kept while a fetch is in flight
+        self._generations: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+        self._hits = 0
+        self._fetches = 0
+        self._coalesced = 0
+
+    @staticmethod
+    def _version_key(key: Tuple[str, str]) -> str:
+        return f"secret_cache:version:{key[0]}:{key[1]}"
+
+    def _shared_version(self, key: Tuple[str, str]) -> Optional[bytes]:
+        if self.redis is None:
+            return None
+        try:
+            return self.redis.get(self._version_key(key))
+        except RedisError as e:
+            logger.warning(f"Secret cache version lookup failed: {e}")
+            return None
+
+    def _fresh(self, cached, now: float) -> bool:
+        ttl = self.ttl if cached[0] is not None else self.negative_ttl
+        return now - cached[1] < ttl
+
+    def _prune(self, now: float):
+        # Called with the lock held, at most once per ttl
+        if now - self._last_prune < min(self.ttl, self.negative_ttl):
+            return
+        self._last_prune = now
+        for key in [k for k, v in self._entries.items() if not self._fresh(v, now)]:
+            del self._entries[key]
+
+    def get(self, provider: str, customer_id: str, fetch: Callable[[], Any]) -> Any:
+        key = (provider, customer_id)
+        with self._lock:
+            cached = self._entries.get(key)
+        # Read outside the lock, a slow Redis must not serialise every lookup
+        version = self._shared_version(key)
+
+        with self._lock:
+            now = time.monotonic()
+            if (
+                cached is not None
+                and self._entries.get(key) is cached
+                and self._fresh(cached, now)
+                and cached[2] == version
+            ):
+                self._hits += 1
+                return cached[0]
+            self._prune(now)
+            future = self._inflight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                owner = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                generation = self._generations.setdefault(key, 0)
+                self._fetches += 1
+                owner = True
+
+        if not owner:
+            # Raises the owner's exception if its fetch failed
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._generations.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if self._generations.pop(key, None) == generation:
+                self._entries[key] = (value, time.monotonic(), version)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, provider: str, customer_id: str):
+        key = (provider, customer_id)
+        with self._lock:
+            self._entries.pop(key, None)
+            if key in self._generations:
+                self._generations[key] += 1
+
+        if self.redis is not None:
+            try:
+                pipeline = self.redis.pipeline()
+                pipeline.incr(self._version_key(key))
+                # Entries never outlive ttl, neither does the version they carry
+                pipeline.expire(self._version_key(key), max(self.ttl, 1) * 2)
+                pipeline.execute()
+            except RedisError as e:
+                logger.warning(
+                    f"Secret cache invalidation of {provider} for {customer_id} "
+                    f"did not reach other processes: {e}"
+                )
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "fetches": self._fetches,
+                "coalesced": self._coalesced,
+                "entries": len(self._entries),
+            }
+
+
+_secret_cache = None
+_secret_cache_lock = threading.Lock()
+
+
+def get_secret_cache() -> SecretCache:
+    global _secret_cache
+    if _secret_cache is None:
+        with _secret_cache_lock:
+            if _secret_cache is None:
+                _secret_cache = SecretCache(
+                    redis=Redis.from_url(
+                        config_provider.get_redis_url(),
+                        socket_timeout=1,
+                        socket_connect_timeout=1,
+                    )
+                )
+    return _secret_cache
@@ -1,12 +1,15 @@
 import os
-from typing import Literal
+import threading
+from typing import Literal, Optional
 
 from fastapi import Depends, HTTPException
+from google.api_core.exceptions import NotFound
 from google.cloud import secretmanager
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.modules.auth.auth_service import AuthService
+from app.modules.key_management.secret_cache import get_secret_cache
 from app.modules.key_management.secrets_schema import (
     CreateSecretRequest,
     UpdateSecretRequest,
@@ -18,11 +21,30 @@ from app.modules.utils.posthog_helper import PostHogClient
 router = APIRouter()
 
 
+_secret_manager_client = None
+_secret_manager_client_pid = None
+_secret_manager_client_lock = threading.Lock()
+
+
+def _get_secret_manager_client() -> secretmanager.SecretManagerServiceClient:
+    global _secret_manager_client, _secret_manager_client_pid
+    # gRPC channels don't survive a fork, build one client per process
+    if _secret_manager_client is None or _secret_manager_client_pid != os.getpid():
+        with _secret_manager_client_lock:
+            if (
+                _secret_manager_client is None
+                or _secret_manager_client_pid != os.getpid()
+            ):
+                _secret_manager_client = secretmanager.SecretManagerServiceClient()
+                _secret_manager_client_pid = os.getpid()
+    return _secret_manager_client
+
+
 class SecretManager:
     @staticmethod
     def get_client_and_project():
         if os.getenv("isDevelopmentMode") == "disabled":
-            client = secretmanager.SecretManagerServiceClient()
+            client = _get_secret_manager_client()
             project_id = os.environ.get("GCP_PROJECT")
         else:
             client = None
@@ -65,6 +87,7 @@ class SecretManager:
         client.add_secret_version(
             request={"parent": response.name, "payload": version["payload"]}
         )
+        get_secret_cache().invalidate(request.provider, customer_id)
         PostHogClient().send_event(
             customer_id,
             "secret_creation_event",
@@ -111,19 +134,37 @@ class SecretManager:
     def get_secret(provider: Literal["openai", "anthropic"], customer_id: str):
         if os.getenv("isDevelopmentMode") == "enabled":
             return None
-        client, project_id = SecretManager.get_client_and_project()
-        secret_id = SecretManager.get_secret_id(provider, customer_id)
-        name = f"projects/{project_id}/secrets/{secret_id}/versions/latest"
-
         try:
-            response = client.access_secret_version(request={"name": name})
-            api_key = response.payload.data.decode("UTF-8")
-            return {"api_key": api_key}
+            api_key = get_secret_cache().get(
+                provider,
+                customer_id,
+                lambda: SecretManager._access_secret(provider, customer_id),
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=404,
                 detail=f"Secret not found in GCP Secret Manager: {str(e)}",
             )
+        if api_key is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Secret not found in GCP Secret Manager",
+            )
+        return {"api_key": api_key}
+
+    @staticmethod
+    def _access_secret(
+        provider: Literal["openai", "anthropic"], customer_id: str
+    ) -> Optional[str]:
+        client, project_id = SecretManager.get_client_and_project()
+        secret_id = SecretManager.get_secret_id(provider, customer_id)
+        name = f"projects/{project_id}/secrets/{secret_id}/versions/latest"
+        try:
+            response = client.access_secret_version(request={"name": name})
+        except NotFound:
+            # Cached as well, most users rely on the default keys
+            return None
+        return response.payload.data.decode("UTF-8")
 
     @router.put("/secrets/")
     def update_secret(
@@ -142,6 +183,7 @@ class SecretManager:
         client.add_secret_version(
             request={"parent": parent, "payload": version["payload"]}
         )
+        get_secret_cache().invalidate(request.provider, customer_id)
 
         # Update user preferences
         user_pref = (
@@ -172,6 +214,7 @@ class SecretManager:
 
         try:
             client.delete_secret(request={"name": name})
+            get_secret_cache().invalidate(provider, customer_id)
             # Remove provider from user preferences
             user_pref = (
                 db.query(UserPreferences)
@@ -1,18 +1,28 @@
 import hashlib
 import logging
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Set
 
-from neo4j import GraphDatabase
 from sqlalchemy.orm import Session
 
+from app.core.neo4j_manager import get_neo4j_manager
+from app.modules.parsing.graph_construction.code_graph_csv_importer import (
+    CodeGraphCsvImporter,
+)
+from app.modules.parsing.graph_construction.code_graph_loader import CodeGraphLoader
 from app.modules.parsing.graph_construction.parsing_repomap import RepoMap
+from app.modules.parsing.graph_construction.source_blob_store import (
+    get_source_blob_store,
+)
+from app.modules.parsing.knowledge_graph.local_vector_index import (
+    get_local_vector_index_store,
+)
 from app.modules.search.search_service import SearchService
 
 
 class CodeGraphService:
-    def __init__(self, neo4j_uri, neo4j_user, neo4j_password, db: Session):
-        self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+    def __init__(self, db: Session):
+        self.driver = get_neo4j_manager().driver
         self.db = db
 
     @staticmethod
@@ -29,9 +39,6 @@ class CodeGraphService:
 
         return node_id
 
-    def close(self):
-        self.driver.close()
-
     def create_and_store_graph(self, repo_dir, project_id, user_id):
         # Create the graph using RepoMap
         self.repo_map = RepoMap(
@@ -43,94 +50,222 @@ class CodeGraphService:
 
         nx_graph = self.repo_map.create_graph(repo_dir)
 
-        with self.driver.session() as session:
-            start_time = time.time()
-            node_count = nx_graph.number_of_nodes()
+        start_time = time.time()
+        node_count = nx_graph.number_of_nodes()
+
+        nodes = (
+            self._prepare_node(node_id, node_data, project_id, user_id)
+            for node_id, node_data in nx_graph.nodes(data=True)
+        )
+        nodes = (node for node in nodes if node)
+        edges = (
+            self._prepare_edge(source, target, data, project_id, user_id)
+            for source, target, data in nx_graph.edges(data=True)
+        )
+
+        if CodeGraphCsvImporter.should_import(node_count):
+            logging.info(f"Importing {node_count} nodes through LOAD CSV")
+            CodeGraphCsvImporter(self.driver).import_graph(project_id, nodes, edges)
+        else:
+            loader = CodeGraphLoader(self.driver)
             logging.info(f"Creating {node_count} nodes")
+            loader.load_nodes(nodes)
+            logging.info(f"Creating {nx_graph.number_of_edges()} relationships")
+            loader.load_edges(edges)
+
+        end_time = time.time()
+        logging.info(
+            f"Time taken to create graph and search index: {end_time - start_time:.2f} seconds"
+        )
+
+    @staticmethod
+    def generate_text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _prepare_node(self, node_id, node_data, project_id, user_id) -> Optional[Dict]:
+        # Get the node type and ensure it's one of our expected types
+        node_type = node_data.get("type", "UNKNOWN")
+        if node_type == "UNKNOWN":
+            return None
+        # Initialize labels with NODE
+        labels = ["NODE"]
+
+        # Add specific type label if it's a valid type
+        if node_type in ["FILE", "CLASS", "FUNCTION", "INTERFACE"]:
+            labels.append(node_type)
+
+        # Hash the source span so incremental parses can tell which nodes changed,
+        # the span itself is read lazily from the source blob store
+        content_hash = node_data.get("content_hash")
+        if node_type == "FILE" and content_hash:
+            text_hash = content_hash
+        else:
+            text = node_data.get("text")
+            if text is None and content_hash:
+                text = get_source_blob_store().read(
+                    content_hash,
+                    node_data.get("start_byte", 0),
+                    node_data.get("end_byte"),
+                )
+            text_hash = CodeGraphService.generate_text_hash(text or "")
+
+        # Prepare node data
+        processed_node = {
+            "name": node_data.get("name", node_id),  # Use node_id as fallback
+            "file_path": node_data.get("file", ""),
+            "start_line": node_data.get("line", -1),
+            "end_line": node_data.get("end_line", -1),
+            "repoId": project_id,
+            "node_id": CodeGraphService.generate_node_id(node_id, user_id),
+            "entityId": user_id,
+            "type": node_type,
+            "text": node_data.get("text"),
+            "content_hash": content_hash,
+            "start_byte": node_data.get("start_byte"),
+            "end_byte": node_data.get("end_byte"),
+            "text_hash": text_hash,
+            "labels": labels,
+        }
+
+        # Remove None values
+        return {k: v for k, v in processed_node.items() if v is not None}
+
+    @staticmethod
+    def _prepare_edge(source, target, data, project_id, user_id) -> Dict:
+        edge_data = {
+            "source_id": CodeGraphService.generate_node_id(source, user_id),
+            "target_id": CodeGraphService.generate_node_id(target, user_id),
+            "type": data.get("type", "REFERENCES"),
+            "repoId": project_id,
+        }
+        # Remove any null values from edge_data
+        return {k: v for k, v in edge_data.items() if v is not None}
+
+    def update_graph_incrementally(
+        self,
+        repo_dir,
+        project_id,
+        user_id,
+        modified_files: Set[str],
+        removed_files: Set[str],
+    ) -> Dict[str, List]:
+        """
+        Apply the changes between two commits to an existing project graph.
+
+        Only NODE records and edges belonging to the affected files are rewritten,
+        everything else in the stored graph is left untouched.
+
+        Returns:
+            Dict[str, List]: "changed_node_ids" whose source text hash changed,
+            "removed_node_ids" that no longer exist and "added_nodes" that are new.
+        """
+        self.repo_map = RepoMap(
+            root=repo_dir,
+            verbose=True,
+            main_model=SimpleTokenCounter(),
+            io=SimpleIO(),
+        )
+
+        nx_graph = self.repo_map.create_graph(repo_dir)
+        affected_files = set(modified_files) | set(removed_files)
+        start_time = time.time()
+
+        new_nodes = {}
+        for node_id, node_data in nx_graph.nodes(data=True):
+            if node_data.get("file") not in affected_files:
+                continue
+            processed_node = self._prepare_node(node_id, node_data, project_id, user_id)
+            if processed_node:
+                new_nodes[processed_node["node_id"]] = processed_node
+
+        edges_to_create = [
+            self._prepare_edge(source, target, data, project_id, user_id)
+            for source, target, data in nx_graph.edges(data=True)
+            if nx_graph.nodes[source].get("file") in affected_files
+            or nx_graph.nodes[target].get("file") in affected_files
+        ]
+
+        with self.driver.session() as session:
+            result = session.run(
+                """
+                MATCH (n:NODE {repoId: $project_id})
+                WHERE n.file_path IN $file_paths
+                RETURN n.node_id AS node_id, n.text_hash AS text_hash
+                """,
+                project_id=project_id,
+                file_paths=list(affected_files),
+            )
+            existing_hashes = {
+                record["node_id"]: record["text_hash"] for record in result
+            }
+
+            removed_node_ids = [
+                node_id for node_id in existing_hashes if node_id not in new_nodes
+            ]
+            changed_node_ids = [
+                node_id
+                for node_id, node in new_nodes.items()
+                if existing_hashes.get(node_id) != node["text_hash"]
+            ]
+            added_nodes = [
+                node
+                for node_id, node in new_nodes.items()
+                if node_id not in existing_hashes
+            ]
 
-            # Batch insert nodes
             batch_size = 300
-            for i in range(0, node_count, batch_size):
-                batch_nodes = list(nx_graph.nodes(data=True))[i : i + batch_size]
-                nodes_to_create = []
-
-                for node_id, node_data in batch_nodes:
-                    # Get the node type and ensure it's one of our expected types
-                    node_type = node_data.get("type", "UNKNOWN")
-                    if node_type == "UNKNOWN":
-                        continue
-                    # Initialize labels with NODE
-                    labels = ["NODE"]
-
-                    # Add specific type label if it's a valid type
-                    if node_type in ["FILE", "CLASS", "FUNCTION", "INTERFACE"]:
-                        labels.append(node_type)
-
-                    # Prepare node data
-                    processed_node = {
-                        "name": node_data.get(
-                            "name", node_id
-                        ),  # Use node_id as fallback
-                        "file_path": node_data.get("file", ""),
-                        "start_line": node_data.get("line", -1),
-                        "end_line": node_data.get("end_line", -1),
-                        "repoId": project_id,
-                        "node_id": CodeGraphService.generate_node_id(node_id, user_id),
-                        "entityId": user_id,
-                        "type": node_type,
-                        "text": node_data.get("text", ""),
-                        "labels": labels,
-                    }
-
-                    # Remove None values
-                    processed_node = {
-                        k: v for k, v in processed_node.items() if v is not None
-                    }
-                    nodes_to_create.append(processed_node)
-
-                # Create nodes with labels
+            for i in range(0, len(removed_node_ids), batch_size):
                 session.run(
                     """
-                    UNWIND $nodes AS node
-                    CALL apoc.create.node(node.labels, node) YIELD node AS n
-                    RETURN count(*) AS created_count
+                    UNWIND $node_ids AS node_id
+                    MATCH (n:NODE {repoId: $project_id, node_id: node_id})
+                    DETACH DELETE n
                     """,
-                    nodes=nodes_to_create,
+                    project_id=project_id,
+                    node_ids=removed_node_ids[i : i + batch_size],
                 )
 
-            relationship_count = nx_graph.number_of_edges()
-            logging.info(f"Creating {relationship_count} relationships")
-
-            # Create relationships in batches
-            for i in range(0, relationship_count, batch_size):
-                batch_edges = list(nx_graph.edges(data=True))[i : i + batch_size]
-                edges_to_create = []
-                for source, target, data in batch_edges:
-                    edge_data = {
-                        "source_id": CodeGraphService.generate_node_id(source, user_id),
-                        "target_id": CodeGraphService.generate_node_id(target, user_id),
-                        "type": data.get("type", "REFERENCES"),
-                        "repoId": project_id,
-                    }
-                    # Remove any null values from edge_data
-                    edge_data = {k: v for k, v in edge_data.items() if v is not None}
-                    edges_to_create.append(edge_data)
+            # Edges touching the affected files are rebuilt from the new graph below
+            surviving_node_ids = list(new_nodes)
+            for i in range(0, len(surviving_node_ids), batch_size):
+                session.run(
+                    """
+                    UNWIND $node_ids AS node_id
+                    MATCH (n:NODE {repoId: $project_id, node_id: node_id})-[r]-()
+                    DELETE r
+                    """,
+                    project_id=project_id,
+                    node_ids=surviving_node_ids[i : i + batch_size],
+                )
 
+            nodes_to_upsert = list(new_nodes.values())
+            for i in range(0, len(nodes_to_upsert), batch_size):
                 session.run(
                     """
-                    UNWIND $edges AS edge
-                    MATCH (source:NODE {node_id: edge.source_id, repoId: edge.repoId})
-                    MATCH (target:NODE {node_id: edge.target_id, repoId: edge.repoId})
-                    CALL apoc.create.relationship(source, edge.type, {repoId: edge.repoId}, target) YIELD rel
-                    RETURN count(rel) AS created_count
+                    UNWIND $nodes AS node
+                    MERGE (n:NODE {repoId: node.repoId, node_id: node.node_id})
+                    SET n += node
+                    REMOVE n.text
+                    WITH n, node
+                    CALL apoc.create.addLabels(n, node.labels) YIELD node AS labelled
+                    RETURN count(*) AS upserted_count
                     """,
-                    edges=edges_to_create,
+                    nodes=nodes_to_upsert[i : i + batch_size],
                 )
 
-            end_time = time.time()
-            logging.info(
-                f"Time taken to create graph and search index: {end_time - start_time:.2f} seconds"
-            )
+        CodeGraphLoader(self.driver).load_edges(edges_to_create)
+
+        logging.info(
+            f"Incremental update of project {project_id} over {len(affected_files)} files: "
+            f"{len(added_nodes)} added, {len(changed_node_ids)} changed, "
+            f"{len(removed_node_ids)} removed nodes in {time.time() - start_time:.2f} seconds"
+        )
+
+        return {
+            "changed_node_ids": changed_node_ids,
+            "removed_node_ids": removed_node_ids,
+            "added_nodes": added_nodes,
+        }
 
     def cleanup_graph(self, project_id: str):
         with self.driver.session() as session:
@@ -145,6 +280,27 @@ class CodeGraphService:
         # Clean up search index
         search_service = SearchService(self.db)
         search_service.delete_project_index(project_id)
+        get_local_vector_index_store().delete(project_id)
+        self.collect_source_blobs()
+
+    def collect_source_blobs(self):
+        """Drop source blobs no graph references, at most once per gc interval."""
+        blob_store = get_source_blob_store()
+        try:
+            if not blob_store.gc_due():
+                return
+            with self.driver.session() as session:
+                result = session.run(
+                    """
+                    MATCH (n:NODE)
+                    WHERE n.content_hash IS NOT NULL
+                    RETURN DISTINCT n.content_hash AS content_hash
+                    """
+                )
+                referenced_hashes = {record["content_hash"] for record in result}
+            blob_store.collect_garbage(referenced_hashes)
+        except Exception as e:
+            logging.warning(f"Source blob garbage collection failed: {e}")
 
     async def get_node_by_id(self, node_id: str, project_id: str) -> Optional[Dict]:
         with self.driver.session() as session:
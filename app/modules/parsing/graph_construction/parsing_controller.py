@@ -142,6 +142,11 @@ class ParsingController:
 
                 if not is_latest or project.status != ProjectStatusEnum.READY.value:
                     cleanup_graph = True
+                    # A ready project on an older commit only needs its diff applied
+                    incremental = (
+                        not is_latest
+                        and project.status == ProjectStatusEnum.READY.value
+                    )
                     logger.info(
                         f"Submitting parsing task for existing project {project_id}"
                     )
@@ -151,6 +156,7 @@ class ParsingController:
                         user_email,
                         project_id,
                         cleanup_graph,
+                        incremental,
                     )
 
                     await project_manager.update_project_status(
@@ -1,9 +1,10 @@
+import asyncio
 import json
 import logging
 import os
 import shutil
 import tarfile
-from typing import Any, Tuple
+from typing import Any, Optional, Set, Tuple
 
 import requests
 from fastapi import HTTPException
@@ -11,7 +12,13 @@ from git import GitCommandError, Repo
 from sqlalchemy.orm import Session
 
 from app.modules.code_provider.code_provider_service import CodeProviderService
+from app.modules.code_provider.github.github_client_pool import get_github_client_pool
 from app.modules.parsing.graph_construction.parsing_schema import RepoDetails
+from app.modules.parsing.graph_construction.repo_mirror_cache import (
+    RepoMirrorError,
+    get_repo_mirror_cache,
+    is_utf8_text,
+)
 from app.modules.projects.projects_schema import ProjectStatusEnum
 from app.modules.projects.projects_service import ProjectService
 
@@ -26,6 +33,61 @@ class ParsingFailedError(ParsingServiceError):
     """Raised when a parsing fails."""
 
 
+TEXT_FILE_EXCLUDE_EXTENSIONS = [
+    "png",
+    "jpg",
+    "jpeg",
+    "gif",
+    "bmp",
+    "tiff",
+    "webp",
+    "ico",
+    "svg",
+    "mp4",
+    "avi",
+    "mov",
+    "wmv",
+    "flv",
+    "ipynb",
+]
+TEXT_FILE_INCLUDE_EXTENSIONS = [
+    "py",
+    "js",
+    "ts",
+    "c",
+    "cs",
+    "cpp",
+    "el",
+    "ex",
+    "exs",
+    "elm",
+    "go",
+    "java",
+    "ml",
+    "mli",
+    "php",
+    "ql",
+    "rb",
+    "rs",
+    "md",
+    "txt",
+    "json",
+    "yaml",
+    "yml",
+    "toml",
+    "ini",
+    "cfg",
+    "conf",
+    "xml",
+    "html",
+    "css",
+    "sh",
+    "md",
+    "mdx",
+    "xsq",
+]
+
+
 class ParseHelper:
     def __init__(self, db_session: Session):
         self.project_manager = ProjectService(db_session)
@@ -82,66 +144,48 @@ class ParseHelper:
                 return False
 
         ext = file_path.split(".")[-1]
-        exclude_extensions = [
-            "png",
-            "jpg",
-            "jpeg",
-            "gif",
-            "bmp",
-            "tiff",
-            "webp",
-            "ico",
-            "svg",
-            "mp4",
-            "avi",
-            "mov",
-            "wmv",
-            "flv",
-            "ipynb",
-        ]
-        include_extensions = [
-            "py",
-            "js",
-            "ts",
-            "c",
-            "cs",
-            "cpp",
-            "el",
-            "ex",
-            "exs",
-            "elm",
-            "go",
-            "java",
-            "ml",
-            "mli",
-            "php",
-            "ql",
-            "rb",
-            "rs",
-            "md",
-            "txt",
-            "json",
-            "yaml",
-            "yml",
-            "toml",
-            "ini",
-            "cfg",
-            "conf",
-            "xml",
-            "html",
-            "css",
-            "sh",
-            "md",
-            "mdx",
-            "xsq",
-        ]
-        if ext in exclude_extensions:
+        if ext in TEXT_FILE_EXCLUDE_EXTENSIONS:
             return False
-        elif ext in include_extensions or open_text_file(file_path):
+        elif ext in TEXT_FILE_INCLUDE_EXTENSIONS or open_text_file(file_path):
             return True
         else:
             return False
 
+    @staticmethod
+    def is_text_blob(file_path: str, head: bytes) -> bool:
+        """is_text_file for content that is streamed rather than on disk."""
+        ext = file_path.split(".")[-1]
+        if ext in TEXT_FILE_EXCLUDE_EXTENSIONS:
+            return False
+        return ext in TEXT_FILE_INCLUDE_EXTENSIONS or is_utf8_text(head)
+
+    def get_mirror_token(self, full_name: str) -> Optional[str]:
+        try:
+            pool = get_github_client_pool()
+            return pool.get_installation_token(pool.get_installation(full_name)["id"])
+        except Exception as e:
+            # Public repositories are mirrored without the GitHub App
+            logger.info(f"No installation token for {full_name}: {e}")
+            return None
+
+    async def export_from_mirror(self, repo, branch, target_dir, user_id, commit_sha):
+        final_dir = os.path.join(
+            target_dir,
+            f"{repo.full_name.replace('/', '-').replace('.', '-')}-{branch.replace('/', '-').replace('.', '-')}-{user_id}",
+        )
+        mirror_cache = get_repo_mirror_cache()
+        token = await asyncio.to_thread(self.get_mirror_token, repo.full_name)
+        await asyncio.to_thread(
+            mirror_cache.update, repo.full_name, repo.clone_url, token, commit_sha
+        )
+        return await asyncio.to_thread(
+            mirror_cache.export,
+            repo.full_name,
+            commit_sha,
+            final_dir,
+            self.is_text_blob,
+        )
+
     async def download_and_extract_tarball(
         self, repo, branch, target_dir, auth, repo_details, user_id
     ):
@@ -202,6 +246,62 @@ class ParseHelper:
 
         return final_dir
 
+    def get_changed_files(
+        self, repo, base_commit: str, head_commit: str
+    ) -> Optional[Tuple[Set[str], Set[str]]]:
+        """
+        List the files that differ between two commits of a repository.
+
+        Args:
+            repo: A local git.Repo or a remote GitHub repository object.
+            base_commit (str): The commit the stored graph was built from.
+            head_commit (str): The commit being parsed now.
+        Returns:
+            Optional[Tuple[Set[str], Set[str]]]: (modified, removed) relative paths,
+            or None if the diff could not be computed and a full parse is needed.
+        """
+        modified, removed = set(), set()
+        if base_commit == head_commit:
+            return modified, removed
+
+        try:
+            if isinstance(repo, Repo):
+                output = repo.git.diff("--name-status", "-M", base_commit, head_commit)
+                for line in output.splitlines():
+                    parts = line.split("\t")
+                    status = parts[0]
+                    if status.startswith("R"):
+                        removed.add(parts[1])
+                        modified.add(parts[2])
+                    elif status.startswith("D"):
+                        removed.add(parts[1])
+                    else:
+                        modified.add(parts[-1])
+            else:
+                comparison = repo.compare(base_commit, head_commit)
+                files = list(comparison.files)
+                # The compare API truncates the file list at 300 entries
+                if len(files) >= 300:
+                    logger.info(
+                        f"Diff between {base_commit} and {head_commit} is too large for an incremental parse"
+                    )
+                    return None
+                for file in files:
+                    if file.status == "removed":
+                        removed.add(file.filename)
+                    elif file.status == "renamed":
+                        removed.add(file.previous_filename)
+                        modified.add(file.filename)
+                    else:
+                        modified.add(file.filename)
+        except Exception as e:
+            logger.error(
+                f"Error computing diff between {base_commit} and {head_commit}: {e}"
+            )
+            return None
+
+        return modified, removed
+
     @staticmethod
     def detect_repo_language(repo_dir):
         lang_count = {
@@ -341,11 +441,19 @@ class ParseHelper:
             branch_details = repo_details.head.commit
             latest_commit_sha = branch_details.hexsha
         else:
-            extracted_dir = await self.download_and_extract_tarball(
-                repo, branch, os.getenv("PROJECT_PATH"), auth, repo_details, user_id
-            )
             branch_details = repo_details.get_branch(branch)
             latest_commit_sha = branch_details.commit.sha
+            try:
+                extracted_dir = await self.export_from_mirror(
+                    repo, branch, os.getenv("PROJECT_PATH"), user_id, latest_commit_sha
+                )
+            except RepoMirrorError as e:
+                logger.warning(
+                    f"Repository mirror unavailable for {repo.full_name}, downloading tarball: {e}"
+                )
+                extracted_dir = await self.download_and_extract_tarball(
+                    repo, branch, os.getenv("PROJECT_PATH"), auth, repo_details, user_id
+                )
 
         repo_metadata = ParseHelper.extract_repository_metadata(repo_details)
         repo_metadata["error_message"] = None
@@ -1,10 +1,15 @@
+import hashlib
 import logging
 import math
 import os
+import threading
 import warnings
+from array import array
 from collections import Counter, defaultdict, namedtuple
+from functools import lru_cache
 from pathlib import Path
 
+import billiard
 import networkx as nx
 from grep_ast import TreeContext, filename_to_lang
 from pygments.lexers import guess_lexer_for_filename
@@ -17,6 +22,13 @@ from app.core.database import get_db
 from app.modules.parsing.graph_construction.parsing_helper import (  # noqa: E402
     ParseHelper,
 )
+from app.modules.parsing.graph_construction.parsing_tags_cache import (
+    TagsCache,
+    get_tags_cache,
+)
+from app.modules.parsing.graph_construction.source_blob_store import (
+    get_source_blob_store,
+)
 
 # tree_sitter is throwing a FutureWarning
 warnings.simplefilter("ignore", category=FutureWarning)
@@ -120,7 +132,11 @@ class RepoMap:
         return [path + ":"]
 
     def save_tags_cache(self):
-        pass
+        # Entries are committed as they are written, only report the counters
+        stats = get_tags_cache().stats()
+        logging.info(
+            f"Tags cache: {stats['hits']} hits, {stats['misses']} misses, hit rate {stats['hit_rate']:.2%}"
+        )
 
     def get_mtime(self, fname):
         try:
@@ -129,35 +145,41 @@ class RepoMap:
             self.io.tool_error(f"File not found error: {fname}")
 
     def get_tags(self, fname, rel_fname):
-        # Check if the file is in the cache and if the modification time has not changed
+        # Check the file still exists, then reuse the tags cached for its content
         file_mtime = self.get_mtime(fname)
         if file_mtime is None:
             return []
 
-        data = list(self.get_tags_raw(fname, rel_fname))
+        code = self.io.read_text(fname)
+        tag_records, _ = get_cached_tag_records(
+            fname,
+            code,
+            "repomap",
+            lambda: RepoMap.extract_tags(fname, rel_fname, code),
+        )
 
-        return data
+        return [Tag(rel_fname, fname, *record) for record in tag_records]
 
     def get_tags_raw(self, fname, rel_fname):
+        code = self.io.read_text(fname)
+        yield from RepoMap.extract_tags(fname, rel_fname, code)
+
+    @staticmethod
+    def extract_tags(fname, rel_fname, code):
         lang = filename_to_lang(fname)
         if not lang:
             return
 
-        language = get_language(lang)
-        parser = get_parser(lang)
-
-        query_scm = get_scm_fname(lang)
-        if not query_scm.exists():
+        language_tools = get_language_tools(lang)
+        if not language_tools:
             return
-        query_scm = query_scm.read_text()
+        _, parser, query = language_tools
 
-        code = self.io.read_text(fname)
         if not code:
             return
         tree = parser.parse(bytes(code, "utf-8"))
 
         # Run the tags queries
-        query = language.query(query_scm)
         captures = query.captures(tree.root_node)
         captures = list(captures)
         saw = set()
@@ -225,24 +247,31 @@ class RepoMap:
 
     @staticmethod
     def get_tags_from_code(fname, code):
+        tag_records, _ = get_cached_tag_records(
+            fname,
+            code,
+            "code",
+            lambda: RepoMap.extract_tags_from_code(fname, code),
+        )
+        for record in tag_records:
+            yield Tag(fname, fname, *record)
+
+    @staticmethod
+    def extract_tags_from_code(fname, code):
         lang = filename_to_lang(fname)
         if not lang:
             return
 
-        language = get_language(lang)
-        parser = get_parser(lang)
-
-        query_scm = get_scm_fname(lang)
-        if not query_scm.exists():
+        language_tools = get_language_tools(lang)
+        if not language_tools:
             return
-        query_scm = query_scm.read_text()
+        _, parser, query = language_tools
 
         if not code:
             return
         tree = parser.parse(bytes(code, "utf-8"))
 
         # Run the tags queries
-        query = language.query(query_scm)
         captures = query.captures(tree.root_node)
 
         captures = list(captures)
@@ -585,6 +614,7 @@ class RepoMap:
         references = defaultdict(set)
         seen_relationships = set()
 
+        files_to_parse = []
         for root, dirs, files in os.walk(repo_dir):
             if any(part.startswith(".") for part in root.split(os.sep)):
                 continue
@@ -596,91 +626,116 @@ class RepoMap:
                 if not self.parse_helper.is_text_file(file_path):
                     continue
 
-                logging.info(f"\nProcessing file: {rel_path}")
-
-                # Add file node
-                file_node_name = rel_path
-                if not G.has_node(file_node_name):
-                    G.add_node(
-                        file_node_name,
-                        file=rel_path,
-                        type="FILE",
-                        text=self.io.read_text(file_path) or "",
-                        line=0,
-                        end_line=0,
-                        name=rel_path.split("/")[-1],
-                    )
+                files_to_parse.append((file_path, rel_path))
+
+        cache_hits = 0
+        for (
+            file_path,
+            rel_path,
+            content_hash,
+            line_offsets,
+            tag_records,
+            cached,
+        ) in self.extract_tags_for_files(files_to_parse):
+            cache_hits += cached
+            logging.info(f"\nProcessing file: {rel_path}")
+
+            # Add file node, its text lives in the source blob store
+            file_node_name = rel_path
+            if not G.has_node(file_node_name):
+                G.add_node(
+                    file_node_name,
+                    file=rel_path,
+                    type="FILE",
+                    content_hash=content_hash,
+                    start_byte=0,
+                    end_byte=line_offsets[-1],
+                    line=0,
+                    end_line=0,
+                    name=rel_path.split("/")[-1],
+                )
+
+            current_class = None
+            current_method = None
+
+            # Process all tags in file
+            for tag in (Tag(rel_path, file_path, *record) for record in tag_records):
+                if tag.kind == "def":
+                    if tag.type == "class":
+                        node_type = "CLASS"
+                        current_class = tag.name
+                        current_method = None
+                    elif tag.type == "interface":
+                        node_type = "INTERFACE"
+                        current_class = tag.name
+                        current_method = None
+                    elif tag.type in ["method", "function"]:
+                        node_type = "FUNCTION"
+                        current_method = tag.name
+                    else:
+                        continue
 
-                current_class = None
-                current_method = None
-
-                # Process all tags in file
-                for tag in self.get_tags(file_path, rel_path):
-                    if tag.kind == "def":
-                        if tag.type == "class":
-                            node_type = "CLASS"
-                            current_class = tag.name
-                            current_method = None
-                        elif tag.type == "interface":
-                            node_type = "INTERFACE"
-                            current_class = tag.name
-                            current_method = None
-                        elif tag.type in ["method", "function"]:
-                            node_type = "FUNCTION"
-                            current_method = tag.name
-                        else:
-                            continue
-
-                        # Create fully qualified node name
-                        if current_class:
-                            node_name = f"{rel_path}:{current_class}.{tag.name}"
-                        else:
-                            node_name = f"{rel_path}:{tag.name}"
-
-                        # Add node
-                        if not G.has_node(node_name):
-                            G.add_node(
+                    # Create fully qualified node name
+                    if current_class:
+                        node_name = f"{rel_path}:{current_class}.{tag.name}"
+                    else:
+                        node_name = f"{rel_path}:{tag.name}"
+
+                    # Add node
+                    if not G.has_node(node_name):
+                        G.add_node(
+                            node_name,
+                            file=rel_path,
+                            line=tag.line,
+                            end_line=tag.end_line,
+                            type=node_type,
+                            name=tag.name,
+                            class_name=current_class,
+                            content_hash=content_hash,
+                            start_byte=line_offsets[
+                                min(tag.line, len(line_offsets) - 1)
+                            ],
+                            end_byte=line_offsets[
+                                min(tag.end_line + 1, len(line_offsets) - 1)
+                            ],
+                        )
+
+                        # Add CONTAINS relationship from file
+                        rel_key = (file_node_name, node_name, "CONTAINS")
+                        if rel_key not in seen_relationships:
+                            G.add_edge(
+                                file_node_name,
                                 node_name,
-                                file=rel_path,
-                                line=tag.line,
-                                end_line=tag.end_line,
-                                type=node_type,
-                                name=tag.name,
-                                class_name=current_class,
+                                type="CONTAINS",
+                                ident=tag.name,
                             )
+                            seen_relationships.add(rel_key)
 
-                            # Add CONTAINS relationship from file
-                            rel_key = (file_node_name, node_name, "CONTAINS")
-                            if rel_key not in seen_relationships:
-                                G.add_edge(
-                                    file_node_name,
-                                    node_name,
-                                    type="CONTAINS",
-                                    ident=tag.name,
-                                )
-                                seen_relationships.add(rel_key)
-
-                        # Record definition
-                        defines[tag.name].add(node_name)
-
-                    elif tag.kind == "ref":
-                        # Handle references
-                        if current_class and current_method:
-                            source = f"{rel_path}:{current_class}.{current_method}"
-                        elif current_method:
-                            source = f"{rel_path}:{current_method}"
-                        else:
-                            source = rel_path
-
-                        references[tag.name].add(
-                            (
-                                source,
-                                tag.line,
-                                tag.end_line,
-                                current_class,
-                                current_method,
-                            )
+                    # Record definition
+                    defines[tag.name].add(node_name)
+
+                elif tag.kind == "ref":
+                    # Handle references
+                    if current_class and current_method:
+                        source = f"{rel_path}:{current_class}.{current_method}"
+                    elif current_method:
+                        source = f"{rel_path}:{current_method}"
+                    else:
+                        source = rel_path
+
+                    references[tag.name].add(
+                        (
+                            source,
+                            tag.line,
+                            tag.end_line,
+                            current_class,
+                            current_method,
                         )
+                    )
+
+        logging.info(
+            f"Tags cache: {cache_hits} hits, {len(files_to_parse) - cache_hits} misses over {len(files_to_parse)} files"
+        )
 
         for ident, refs in references.items():
             target_nodes = defines.get(ident, set())
@@ -706,6 +761,35 @@ class RepoMap:
 
         return G
 
+    def extract_tags_for_files(self, files_to_parse):
+        """
+        Read and tag every file, fanning the work out to a process pool for big repos.
+
+        Yields (file_path, rel_path, content_hash, line_offsets, tag_records, cached)
+        in the order of files_to_parse.
+        """
+        workers = int(os.getenv("PARSING_WORKERS", os.cpu_count() or 1))
+        min_files = int(os.getenv("PARSING_PARALLEL_MIN_FILES", 200))
+
+        if workers > 1 and len(files_to_parse) >= min_files:
+            chunksize = max(1, len(files_to_parse) // (workers * 8))
+            # Celery prefork workers are daemonic, multiprocessing refuses to
+            # start children there but billiard (Celery's fork of it) doesn't
+            pool = billiard.Pool(processes=workers)
+            try:
+                yield from pool.imap(
+                    extract_file_tags, files_to_parse, chunksize=chunksize
+                )
+                pool.close()
+            except BaseException:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+        else:
+            for file in files_to_parse:
+                yield extract_file_tags(file)
+
     @staticmethod
     def get_language_for_file(file_path):
         # Map file extensions to tree-sitter languages
@@ -799,6 +883,96 @@ class RepoMap:
         return output
 
 
+# Tree-sitter parsers and compiled queries, cached per thread of every process
+_language_tools = threading.local()
+
+
+def get_language_tools(lang):
+    cache = getattr(_language_tools, "cache", None)
+    if cache is None:
+        cache = _language_tools.cache = {}
+
+    if lang not in cache:
+        query_scm = get_scm_fname(lang)
+        if not query_scm or not query_scm.exists():
+            cache[lang] = None
+        else:
+            language = get_language(lang)
+            cache[lang] = (
+                language,
+                get_parser(lang),
+                language.query(query_scm.read_text()),
+            )
+    return cache[lang]
+
+
+def extract_file_tags(file):
+    """
+    Read, store and tag a single file. Runs inside the parsing worker processes.
+
+    The file is written to the source blob store and only its content hash and
+    line start offsets (ending with the total size) are returned to the parent.
+    """
+    file_path, rel_path = file
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            code = f.read()
+    except UnicodeDecodeError:
+        logging.warning(f"Could not read {file_path} as UTF-8. Skipping this file.")
+        code = ""
+
+    data = code.encode("utf-8")
+    content_hash = get_source_blob_store().put(data)
+    line_offsets = array("q", [0])
+    position = data.find(b"\n")
+    while position != -1:
+        line_offsets.append(position + 1)
+        position = data.find(b"\n", position + 1)
+    if line_offsets[-1] != len(data):
+        line_offsets.append(len(data))
+
+    tag_records, cached = get_cached_tag_records(
+        file_path,
+        code,
+        "repomap",
+        lambda: RepoMap.extract_tags(file_path, rel_path, code),
+    )
+    return file_path, rel_path, content_hash, line_offsets, tag_records, cached
+
+
+@lru_cache(maxsize=None)
+def get_query_version(lang):
+    query_scm = get_scm_fname(lang)
+    if not query_scm or not query_scm.exists():
+        return None
+    return hashlib.sha256(query_scm.read_bytes()).hexdigest()[:16]
+
+
+def get_cached_tag_records(fname, code, variant, extract):
+    """
+    Return (tag_records, cached) for code, parsing it with extract() on a cache miss.
+
+    Records are compact (line, end_line, name, kind, type) tuples, which also keeps
+    the payload sent back from the parsing worker processes small.
+    """
+    lang = filename_to_lang(fname)
+    query_version = get_query_version(lang) if lang else None
+    if not code or not query_version:
+        return [], False
+
+    tags_cache = get_tags_cache()
+    key = TagsCache.make_key(code, lang, query_version, variant)
+    tag_records = tags_cache.get(key)
+    if tag_records is not None:
+        return tag_records, True
+
+    tag_records = [
+        (tag.line, tag.end_line, tag.name, tag.kind, tag.type) for tag in extract()
+    ]
+    tags_cache.put(key, tag_records)
+    return tag_records, False
+
+
 def get_scm_fname(lang):
     # Load the tags queries
     try:
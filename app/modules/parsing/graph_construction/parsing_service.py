@@ -11,7 +11,6 @@ from fastapi import HTTPException
 from git import Repo
 from sqlalchemy.orm import Session
 
-from app.core.config_provider import config_provider
 from app.modules.code_provider.code_provider_service import CodeProviderService
 from app.modules.parsing.graph_construction.code_graph_service import CodeGraphService
 from app.modules.parsing.graph_construction.parsing_helper import (
@@ -57,25 +56,19 @@ class ParsingService:
         user_email: str,
         project_id: int,
         cleanup_graph: bool = True,
+        incremental: bool = False,
     ):
         project_manager = ProjectService(self.db)
         extracted_dir = None
+        previous_commit_id = None
         try:
-            if cleanup_graph:
-                neo4j_config = config_provider.get_neo4j_config()
-
-                try:
-                    code_graph_service = CodeGraphService(
-                        neo4j_config["uri"],
-                        neo4j_config["username"],
-                        neo4j_config["password"],
-                        self.db,
-                    )
+            if incremental:
+                project = await project_manager.get_project_from_db_by_id(project_id)
+                previous_commit_id = project.get("commit_id") if project else None
 
-                    code_graph_service.cleanup_graph(project_id)
-                except Exception as e:
-                    logger.error(f"Error in cleanup_graph: {e}")
-                    raise HTTPException(status_code=500, detail="Internal server error")
+            # Incremental parses defer the cleanup until the diff is known
+            if cleanup_graph and not previous_commit_id:
+                self.cleanup_project_graph(project_id)
 
             repo, owner, auth = await self.parse_helper.clone_or_copy_repository(
                 repo_details, user_id
@@ -109,9 +102,34 @@ class ParsingService:
                 else:
                     language = self.parse_helper.detect_repo_language(extracted_dir)
 
-            await self.analyze_directory(
-                extracted_dir, project_id, user_id, self.db, language, user_email
-            )
+            changes = None
+            if previous_commit_id and language not in [
+                "python",
+                "javascript",
+                "typescript",
+                "other",
+            ]:
+                project = await project_manager.get_project_from_db_by_id(project_id)
+                changes = self.parse_helper.get_changed_files(
+                    repo, previous_commit_id, project.get("commit_id")
+                )
+
+            if changes is not None:
+                modified_files, removed_files = changes
+                await self.analyze_directory_incrementally(
+                    extracted_dir,
+                    project_id,
+                    user_id,
+                    user_email,
+                    modified_files,
+                    removed_files,
+                )
+            else:
+                if previous_commit_id and cleanup_graph:
+                    self.cleanup_project_graph(project_id)
+                await self.analyze_directory(
+                    extracted_dir, project_id, user_id, self.db, language, user_email
+                )
             message = "The project has been parsed successfully"
             return {"message": message, "id": project_id}
 
@@ -141,6 +159,15 @@ class ParsingService:
             ):
                 shutil.rmtree(extracted_dir, ignore_errors=True)
 
+    def cleanup_project_graph(self, project_id: str):
+        try:
+            code_graph_service = CodeGraphService(self.db)
+
+            code_graph_service.cleanup_graph(project_id)
+        except Exception as e:
+            logger.error(f"Error in cleanup_graph: {e}")
+            raise HTTPException(status_code=500, detail="Internal server error")
+
     def create_neo4j_indices(self, graph_manager):
         graph_manager.create_entityId_index()
         graph_manager.create_node_id_index()
@@ -223,13 +250,7 @@ class ParsingService:
                 graph_manager.close()
         elif language != "other":
             try:
-                neo4j_config = config_provider.get_neo4j_config()
-                service = CodeGraphService(
-                    neo4j_config["uri"],
-                    neo4j_config["username"],
-                    neo4j_config["password"],
-                    db,
-                )
+                service = CodeGraphService(db)
 
                 service.create_and_store_graph(extracted_dir, project_id, user_id)
 
@@ -249,8 +270,6 @@ class ParsingService:
                 logger.info(f"DEBUGNEO4J: After update project status {project_id}")
                 self.inference_service.log_graph_stats(project_id)
             finally:
-                service.close()
-                logger.info(f"DEBUGNEO4J: After close service {project_id}")
                 self.inference_service.log_graph_stats(project_id)
         else:
             await self.project_service.update_project_status(
@@ -263,6 +282,65 @@ class ParsingService:
                 "Repository doesn't consist of a language currently supported."
             )
 
+    async def analyze_directory_incrementally(
+        self,
+        extracted_dir: str,
+        project_id: str,
+        user_id: str,
+        user_email: str,
+        modified_files,
+        removed_files,
+    ):
+        logger.info(
+            f"Parsing project {project_id}: Incremental update of {len(modified_files)} modified and {len(removed_files)} removed files"
+        )
+        project_details = await self.project_service.get_project_from_db_by_id(
+            project_id
+        )
+        if not project_details:
+            logger.error(f"Project with ID {project_id} not found.")
+            raise HTTPException(status_code=404, detail="Project not found.")
+
+        service = CodeGraphService(self.db)
+        changes = service.update_graph_incrementally(
+            extracted_dir, project_id, user_id, modified_files, removed_files
+        )
+
+        self.search_service.delete_node_indices(project_id, changes["removed_node_ids"])
+        await self.search_service.bulk_create_search_indices(
+            InferenceService.get_search_index_rows(project_id, changes["added_nodes"])
+        )
+        await self.search_service.commit_indices()
+        self.search_service.rebuild_symbol_index(project_id)
+
+        await self.project_service.update_project_status(
+            project_id, ProjectStatusEnum.PARSED
+        )
+        # Only nodes whose source changed need fresh docstrings
+        if changes["changed_node_ids"]:
+            await self.inference_service.run_inference(
+                project_id, changes["changed_node_ids"]
+            )
+        else:
+            # run_inference rebuilds the local vector index, without it removed
+            # nodes would keep coming back from vector queries
+            try:
+                self.inference_service.build_local_vector_index(project_id)
+            except Exception as e:
+                logger.error(
+                    f"Failed to build local vector index for {project_id}: {e}"
+                )
+        await self.project_service.update_project_status(
+            project_id, ProjectStatusEnum.READY
+        )
+        create_task(
+            EmailHelper().send_email(
+                user_email,
+                project_details.get("project_name"),
+                project_details.get("branch_name"),
+            )
+        )
+
     async def duplicate_graph(self, old_repo_id: str, new_repo_id: str):
         await self.search_service.clone_search_indices(old_repo_id, new_repo_id)
         node_batch_size = 3000  # Fixed batch size for nodes
@@ -275,6 +353,8 @@ class ParsingService:
                     nodes_query = """
                     MATCH (n:NODE {repoId: $old_repo_id})
                     RETURN n.node_id AS node_id, n.text AS text, n.file_path AS file_path,
+                           n.content_hash AS content_hash, n.start_byte AS start_byte,
+                           n.end_byte AS end_byte, n.text_hash AS text_hash,
                            n.start_line AS start_line, n.end_line AS end_line, n.name AS name,
                            COALESCE(n.docstring, '') AS docstring,
                            COALESCE(n.embedding, []) AS embedding,
@@ -299,6 +379,10 @@ class ParsingService:
                         repoId: $new_repo_id,
                         node_id: node.node_id,
                         text: node.text,
+                        content_hash: node.content_hash,
+                        start_byte: node.start_byte,
+                        end_byte: node.end_byte,
+                        text_hash: node.text_hash,
                         file_path: node.file_path,
                         start_line: node.start_line,
                         end_line: node.end_line,
@@ -346,6 +430,7 @@ class ParsingService:
             logger.info(
                 f"Successfully duplicated graph from {old_repo_id} to {new_repo_id}"
             )
+            self.inference_service.build_local_vector_index(new_repo_id)
 
         except Exception as e:
             logger.error(
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TagsCache:
+    """
+    On-disk cache of parsed tags shared by every parse running on this host.
+
+    Entries are keyed by the file content hash, the tree-sitter language and the
+    version of the .scm query, so the same file is only parsed once no matter
+    how many branches, users or demo projects it shows up in.
+
+    Hits don't write: last_access only drives LRU eviction, so it is refreshed
+    at most once per touch_interval per entry, and those touches are batched
+    into the next put, eviction or every touch_batch_size of them.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or os.getenv(
+            "TAGS_CACHE_PATH",
+            os.path.join(os.getenv("PROJECT_PATH", "projects/"), ".tags_cache.db"),
+        )
+        self.max_bytes = max_bytes or int(
+            os.getenv("TAGS_CACHE_MAX_BYTES", 1024 * 1024 * 1024)
+        )
+        self.eviction_interval = 500
+        self.touch_interval = int(os.getenv("TAGS_CACHE_TOUCH_INTERVAL", 3600))
+        self.touch_batch_size = 256
+        self.hits = 0
+        self.misses = 0
+        self._writes_since_eviction = 0
+        self._touched = {}  # key -> access time not yet written
+        self._touched_lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def make_key(code: str, lang: str, query_version: str, variant: str) -> str:
+        content_hash = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        return f"{variant}:{lang}:{query_version}:{content_hash}"
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are per thread and must not survive a fork into the workers
+        if getattr(self._local, "pid", None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tags (
+                    key TEXT PRIMARY KEY,
+                    records TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS tags_last_access ON tags (last_access)"
+            )
+            connection.commit()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def get(self, key: str) -> Optional[List[tuple]]:
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT records, last_access FROM tags WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row and now - row[1] >= self.touch_interval:
+                with self._touched_lock:
+                    self._touched[key] = now
+                    flush = len(self._touched) >= self.touch_batch_size
+                if flush:
+                    self._flush_touches(connection)
+                    connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Tags cache lookup failed: {e}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return [tuple(record) for record in json.loads(row[0])]
+
+    def put(self, key: str, records: List[tuple]):
+        payload = json.dumps(records)
+        try:
+            connection = self._connection()
+            self._flush_touches(connection)
+            connection.execute(
+                "INSERT OR REPLACE INTO tags (key, records, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time()),
+            )
+            connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Tags cache write failed: {e}")
+            return
+
+        self._writes_since_eviction += 1
+        if self._writes_since_eviction >= self.eviction_interval:
+            self._writes_since_eviction = 0
+            self.evict()
+
+    def _flush_touches(self, connection: sqlite3.Connection):
+        """Write pending access times, the caller commits."""
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            connection.executemany(
+                "UPDATE tags SET last_access = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in touched.items()],
+            )
+
+    def evict(self):
+        """Drop the least recently used entries once the cache outgrows max_bytes."""
+        try:
+            connection = self._connection()
+            self._flush_touches(connection)
+            connection.commit()
+            total_size = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM tags"
+            ).fetchone()[0]
+            if total_size <= self.max_bytes:
+                return
+
+            # Free a little extra so eviction doesn't run on every write
+            to_free = total_size - int(self.max_bytes * 0.9)
+            keys = []
+            for key, size in connection.execute(
+                "SELECT key, size FROM tags ORDER BY last_access"
+            ):
+                keys.append((key,))
+                to_free -= size
+                if to_free <= 0:
+                    break
+            connection.executemany("DELETE FROM tags WHERE key = ?", keys)
+            connection.commit()
+            logger.info(f"Evicted {len(keys)} entries from the tags cache")
+        except sqlite3.Error as e:
+            logger.warning(f"Tags cache eviction failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_tags_cache = None
+
+
+def get_tags_cache() -> TagsCache:
+    global _tags_cache
+    if _tags_cache is None:
+        _tags_cache = TagsCache()
+    return _tags_cache
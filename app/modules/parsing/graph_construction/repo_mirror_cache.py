@@ -0,0 +1,309 @@
+import base64
+import codecs
+import fcntl
+import logging
+import os
+import shutil
+import subprocess
+import tarfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RepoMirrorError(Exception):
+    """Raised when a repository mirror can't be created, updated or exported."""
+
+
+class RepoMirrorCache:
+    """
+    Bare git mirrors of remote repositories kept under PROJECT_PATH.
+
+    The first parse of a repository clones a mirror, later parses only fetch
+    the delta. Commits are exported straight from `git archive` into the
+    project directory, filtering files while the archive streams in, so no
+    tarball or intermediate copy of the tree is written.
+
+    Mirrors unused for max_age, then the least recently used ones beyond
+    max_bytes in total, are evicted at most once per eviction_interval.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv(
+            "REPO_MIRROR_PATH",
+            os.path.join(os.getenv("PROJECT_PATH", "projects/"), ".mirrors"),
+        )
+        self.timeout = int(os.getenv("REPO_MIRROR_TIMEOUT", 900))
+        self.max_age = int(os.getenv("REPO_MIRROR_MAX_AGE", 30 * 24 * 3600))
+        self.max_bytes = int(
+            os.getenv("REPO_MIRROR_MAX_BYTES", 50 * 1024 * 1024 * 1024)
+        )
+        self.eviction_interval = int(os.getenv("REPO_MIRROR_EVICTION_INTERVAL", 3600))
+
+    def _path(self, full_name: str) -> str:
+        return os.path.join(self.root, f"{full_name.replace('/', '--')}.git")
+
+    @contextmanager
+    def _locked(self, full_name: str):
+        with self._locked_path(self._path(full_name)):
+            yield
+
+    @contextmanager
+    def _locked_path(
+        self, mirror_path: str, blocking: bool = True, shared: bool = False
+    ):
+        # Parsing workers run in separate processes, lock the mirror on disk.
+        # Yields whether the lock was taken, always True when blocking.
+        os.makedirs(self.root, exist_ok=True)
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        with open(f"{mirror_path}.lock", "a") as lock_file:
+            try:
+                fcntl.flock(
+                    lock_file, operation if blocking else operation | fcntl.LOCK_NB
+                )
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _auth_env(token: Optional[str]) -> Dict[str, str]:
+        if not token:
+            return {}
+        # Passed through the environment (git 2.31+) rather than argv, so the
+        # token is neither visible in ps nor written to the mirror config
+        credentials = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        return {
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": "http.extraHeader",
+            "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+        }
+
+    def _git(self, args: List[str], token: Optional[str] = None):
+        try:
+            result = subprocess.run(
+                ["git", *args],
+                capture_output=True,
+                timeout=self.timeout,
+                env={**os.environ, "GIT_TERMINAL_PROMPT": "0", **self._auth_env(token)},
+            )
+        except (subprocess.SubprocessError, OSError) as e:
+            raise RepoMirrorError(f"git {args[0]} failed: {e}")
+        if result.returncode != 0:
+            raise RepoMirrorError(
+                f"git {args[0]} failed: {result.stderr.decode('utf-8', 'replace')}"
+            )
+        return result.stdout
+
+    def _has_commit(self, mirror_path: str, commit_sha: str) -> bool:
+        return (
+            subprocess.run(
+                [
+                    "git",
+                    "-C",
+                    mirror_path,
+                    "cat-file",
+                    "-e",
+                    f"{commit_sha}^{{commit}}",
+                ],
+                capture_output=True,
+            ).returncode
+            == 0
+        )
+
+    def update(
+        self,
+        full_name: str,
+        clone_url: str,
+        token: Optional[str] = None,
+        commit_sha: Optional[str] = None,
+    ) -> str:
+        """Create or fetch the mirror of a repository and return its path."""
+        mirror_path = self._path(full_name)
+        with self._locked(full_name):
+            if not os.path.exists(os.path.join(mirror_path, "HEAD")):
+                shutil.rmtree(mirror_path, ignore_errors=True)
+                logger.info(f"Creating repository mirror for {full_name}")
+                self._git(["clone", "--mirror", clone_url, mirror_path], token)
+            elif commit_sha is None or not self._has_commit(mirror_path, commit_sha):
+                logger.info(f"Fetching repository mirror updates for {full_name}")
+                self._git(
+                    [
+                        "-C",
+                        mirror_path,
+                        "fetch",
+                        "--prune",
+                        clone_url,
+                        "+refs/heads/*:refs/heads/*",
+                    ],
+                    token,
+                )
+            # The directory mtime records the last use for eviction
+            os.utime(mirror_path)
+
+        if self.eviction_due():
+            self.evict(keep=mirror_path)
+        return mirror_path
+
+    def export(
+        self,
+        full_name: str,
+        commit_sha: str,
+        target_dir: str,
+        include: Callable[[str, bytes], bool],
+    ) -> str:
+        """
+        Write the files of a commit into target_dir.
+
+        include is called with each file's path and its first bytes, files it
+        rejects are skipped. target_dir is replaced as a whole once the export
+        has finished.
+        """
+        mirror_path = self._path(full_name)
+        temp_dir = f"{target_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+
+        process = None
+        # Shared, so exports run side by side but eviction leaves the mirror alone
+        with self._locked_path(mirror_path, shared=True):
+            try:
+                process = subprocess.Popen(
+                    ["git", "-C", mirror_path, "archive", "--format=tar", commit_sha],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+                with tarfile.open(fileobj=process.stdout, mode="r|") as archive:
+                    for member in archive:
+                        if not member.isfile():
+                            continue
+                        relative_path = os.path.normpath(member.name)
+                        if (
+                            os.path.basename(relative_path).startswith(".")
+                            or relative_path.startswith("..")
+                            or os.path.isabs(relative_path)
+                        ):
+                            continue
+                        source = archive.extractfile(member)
+                        head = source.read(4096)
+                        if not include(relative_path, head):
+                            continue
+                        dest_path = os.path.join(temp_dir, relative_path)
+                        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                        with open(dest_path, "wb") as dest:
+                            dest.write(head)
+                            shutil.copyfileobj(source, dest)
+                stderr = process.stderr.read()
+                if process.wait() != 0:
+                    raise RepoMirrorError(
+                        f"git archive failed: {stderr.decode('utf-8', 'replace')}"
+                    )
+
+                shutil.rmtree(target_dir, ignore_errors=True)
+                os.replace(temp_dir, target_dir)
+            except (tarfile.TarError, OSError) as e:
+                raise RepoMirrorError(f"Error exporting {full_name}@{commit_sha}: {e}")
+            finally:
+                # Whatever failed, don't leave git running or a half-written tree
+                if process is not None:
+                    if process.poll() is None:
+                        process.kill()
+                        process.wait()
+                    process.stdout.close()
+                    process.stderr.close()
+                shutil.rmtree(temp_dir, ignore_errors=True)
+        return target_dir
+
+    def eviction_due(self) -> bool:
+        """Whether eviction_interval has passed since the last eviction, claiming it if so."""
+        marker = os.path.join(self.root, ".last_eviction")
+        try:
+            if time.time() - os.path.getmtime(marker) < self.eviction_interval:
+                return False
+        except OSError:
+            pass
+        os.makedirs(self.root, exist_ok=True)
+        with open(marker, "a"):
+            os.utime(marker)
+        return True
+
+    @staticmethod
+    def _size(path: str) -> int:
+        size = 0
+        for root, _, names in os.walk(path):
+            for name in names:
+                try:
+                    size += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    pass
+        return size
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Delete mirrors unused for max_age, then the least recently used ones
+        until the rest fit in max_bytes. Mirrors locked by a running clone,
+        fetch or export are skipped, and so is keep, the mirror about to be
+        exported.
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        mirrors = []
+        for name in os.listdir(self.root):
+            mirror_path = os.path.join(self.root, name)
+            if (
+                not name.endswith(".git")
+                or not os.path.isdir(mirror_path)
+                or mirror_path == keep
+            ):
+                continue
+            try:
+                last_used = os.path.getmtime(mirror_path)
+            except OSError:
+                continue
+            mirrors.append((last_used, mirror_path, self._size(mirror_path)))
+        mirrors.sort()
+
+        cutoff = time.time() - self.max_age
+        total_size = sum(size for _, _, size in mirrors)
+        removed = 0
+        for last_used, mirror_path, size in mirrors:
+            if last_used >= cutoff and total_size <= self.max_bytes:
+                break
+            with self._locked_path(mirror_path, blocking=False) as locked:
+                if not locked:
+                    continue
+                # The lock file stays, another process may be waiting on it
+                shutil.rmtree(mirror_path, ignore_errors=True)
+            total_size -= size
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} repository mirrors")
+        return removed
+
+    def delete(self, full_name: str):
+        with self._locked(full_name):
+            shutil.rmtree(self._path(full_name), ignore_errors=True)
+
+
+def is_utf8_text(head: bytes) -> bool:
+    """Whether the first bytes of a file decode as UTF-8, tolerating a cut-off character."""
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+_repo_mirror_cache = None
+
+
+def get_repo_mirror_cache() -> RepoMirrorCache:
+    global _repo_mirror_cache
+    if _repo_mirror_cache is None:
+        _repo_mirror_cache = RepoMirrorCache()
+    return _repo_mirror_cache
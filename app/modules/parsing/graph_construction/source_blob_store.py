@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class SourceBlobStore:
+    """
+    Content-addressed store for the source files of parsed repositories.
+
+    Each distinct file is written once under its sha256, NODE records only keep
+    the hash plus byte/line offsets, and readers slice the blob through a
+    memory-mapped view instead of carrying the text around.
+    """
+
+    _mmaps = OrderedDict()
+    _mmaps_lock = threading.Lock()
+    max_open_mmaps = 256
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv(
+            "SOURCE_BLOB_PATH",
+            os.path.join(os.getenv("PROJECT_PATH", "projects/"), ".blobs"),
+        )
+        # Unreferenced blobs younger than this may belong to a parse whose
+        # graph isn't in Neo4j yet, garbage collection leaves them alone
+        self.gc_grace_period = int(os.getenv("SOURCE_BLOB_GC_GRACE_PERIOD", 86400))
+        self.gc_interval = int(os.getenv("SOURCE_BLOB_GC_INTERVAL", 3600))
+
+    @staticmethod
+    def hash_content(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], content_hash)
+
+    def put(self, data: bytes) -> str:
+        content_hash = self.hash_content(data)
+        path = self._path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent parsers never see a partial blob
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        else:
+            # Reused blobs count as fresh for garbage collection
+            os.utime(path)
+        return content_hash
+
+    def has(self, content_hash: str) -> bool:
+        return os.path.exists(self._path(content_hash))
+
+    def _open(self, content_hash: str):
+        path = self._path(content_hash)
+        with self._mmaps_lock:
+            if path in self._mmaps:
+                self._mmaps.move_to_end(path)
+                return self._mmaps[path]
+
+            if not os.path.exists(path):
+                return None
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            self._mmaps[path] = mapped
+            if len(self._mmaps) > self.max_open_mmaps:
+                _, evicted = self._mmaps.popitem(last=False)
+                try:
+                    evicted.close()
+                except BufferError:
+                    # A reader still holds a view, the map closes once it's released
+                    pass
+            return mapped
+
+    def view(
+        self, content_hash: str, start_byte: int = 0, end_byte: Optional[int] = None
+    ) -> Optional[memoryview]:
+        """Return a zero-copy view over a byte range of a blob, or None if it's missing."""
+        mapped = self._open(content_hash)
+        if mapped is None:
+            return None
+        return memoryview(mapped)[start_byte:end_byte]
+
+    def read(
+        self, content_hash: str, start_byte: int = 0, end_byte: Optional[int] = None
+    ) -> Optional[str]:
+        view = self.view(content_hash, start_byte, end_byte)
+        if view is None:
+            return None
+        with view:
+            return str(view, "utf-8", errors="replace")
+
+    def read_node_text(self, node) -> Optional[str]:
+        """Read the source span of a NODE record that carries content_hash and byte offsets."""
+        content_hash = node.get("content_hash")
+        if not content_hash:
+            return None
+        return self.read(
+            content_hash, node.get("start_byte") or 0, node.get("end_byte")
+        )
+
+    def read_file_lines(
+        self,
+        content_hash: Optional[str],
+        start_line: Optional[int],
+        end_line: Optional[int],
+    ) -> Optional[str]:
+        """
+        Read a line range from a file blob with the same semantics as
+        CodeProviderService.get_file_content, or None if the blob isn't stored here.
+        """
+        if not content_hash:
+            return None
+        mapped = self._open(content_hash)
+        if mapped is None:
+            return None
+
+        if (start_line == end_line == 0) or (start_line is None and end_line is None):
+            return self.read(content_hash)
+        # Include the definition/decorator lines above the node, as the providers do
+        start = start_line - 2 if start_line - 2 > 0 else 0
+        if end_line <= start:
+            return ""
+        text = self.read(
+            content_hash,
+            self._line_offset(mapped, start),
+            self._line_offset(mapped, end_line),
+        )
+        return "\n".join(text.splitlines())
+
+    def gc_due(self) -> bool:
+        """Whether gc_interval has passed since the last collection, claiming it if so."""
+        marker = os.path.join(self.root, ".last_gc")
+        try:
+            if time.time() - os.path.getmtime(marker) < self.gc_interval:
+                return False
+        except OSError:
+            pass
+        os.makedirs(self.root, exist_ok=True)
+        with open(marker, "a"):
+            os.utime(marker)
+        return True
+
+    def collect_garbage(self, referenced_hashes: Set[str]) -> int:
+        """
+        Delete blobs no graph references any more.
+
+        Blobs written or reused within gc_grace_period are kept, so parses
+        that haven't stored their graph yet don't lose their sources.
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        cutoff = time.time() - self.gc_grace_period
+        removed = 0
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if name in referenced_hashes:
+                    continue
+                path = os.path.join(prefix_dir, name)
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    with self._mmaps_lock:
+                        mapped = self._mmaps.pop(path, None)
+                    if mapped is not None:
+                        try:
+                            mapped.close()
+                        except BufferError:
+                            pass
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    continue
+        logger.info(f"Removed {removed} unreferenced source blobs")
+        return removed
+
+    @staticmethod
+    def _line_offset(mapped, line: int) -> int:
+        position = 0
+        for _ in range(line):
+            position = mapped.find(b"\n", position)
+            if position == -1:
+                return len(mapped)
+            position += 1
+        return position
+
+
+_source_blob_store = None
+
+
+def get_source_blob_store() -> SourceBlobStore:
+    global _source_blob_store
+    if _source_blob_store is None:
+        _source_blob_store = SourceBlobStore()
+    return _source_blob_store
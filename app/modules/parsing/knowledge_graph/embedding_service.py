@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingService:
+    """
+    Process-wide sentence embedding model.
+
+    The model is loaded once per process on first use (or at worker startup
+    through warm_up). Encode requests from any thread or event loop are put on
+    a queue and a single worker thread coalesces whatever is waiting into one
+    forward pass, so concurrent callers share batches instead of contending for
+    the model.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        max_batch_texts: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+    ):
+        self.model_name = model_name or os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+        self.batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+        self.max_batch_texts = max_batch_texts or int(
+            os.getenv("EMBEDDING_MAX_BATCH_TEXTS", 512)
+        )
+        self.max_wait = (
+            max_wait_ms
+            if max_wait_ms is not None
+            else float(os.getenv("EMBEDDING_MAX_WAIT_MS", 5))
+        ) / 1000
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        self._latencies = deque(maxlen=1000)
+        self._requests_served = 0
+        self._batches_run = 0
+        self._texts_encoded = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    start_time = time.time()
+                    self._model = SentenceTransformer(self.model_name)
+                    logger.info(
+                        f"Loaded embedding model {self.model_name} in {time.time() - start_time:.2f} seconds"
+                    )
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def warm_up(self):
+        self.encode(["warm up"])
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into a float32 matrix, blocking the calling thread."""
+        return self.submit(texts).result()
+
+    async def aencode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def submit(self, texts: List[str]) -> Future:
+        future = Future()
+        if not texts:
+            future.set_result(np.empty((0, self.dimension), dtype=np.float32))
+            return future
+        self._ensure_worker()
+        self._requests.put((list(texts), future, time.perf_counter()))
+        return future
+
+    def _ensure_worker(self):
+        # The worker thread doesn't survive a fork into a child process
+        if self._worker is None or not self._worker.is_alive():
+            with self._worker_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(
+                        target=self._run, name="embedding-service", daemon=True
+                    )
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            pending = []
+            pending_texts = 0
+            request = self._requests.get()
+            deadline = time.perf_counter() + self.max_wait
+            while True:
+                # Callers that were cancelled while queued (client disconnect,
+                # timeout) are dropped, the rest can't be cancelled any more
+                if request[1].set_running_or_notify_cancel():
+                    pending.append(request)
+                    pending_texts += len(request[0])
+                if pending_texts >= self.max_batch_texts:
+                    break
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+            if not pending:
+                continue
+            try:
+                self._encode_pending(pending)
+            except Exception as e:
+                # One bad request must not take the worker and the rest of
+                # the batch down with it
+                logger.error(f"Embedding worker failed on a batch: {e}")
+                for _, future, _ in pending:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _encode_pending(self, pending):
+        texts = [text for request_texts, _, _ in pending for text in request_texts]
+        try:
+            embeddings = np.asarray(
+                self.model.encode(
+                    texts,
+                    batch_size=self.batch_size,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                ),
+                dtype=np.float32,
+            )
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+            for _, future, _ in pending:
+                future.set_exception(e)
+            return
+
+        finished_at = time.perf_counter()
+        offset = 0
+        for request_texts, future, submitted_at in pending:
+            future.set_result(embeddings[offset : offset + len(request_texts)])
+            offset += len(request_texts)
+            self._latencies.append(finished_at - submitted_at)
+
+        self._requests_served += len(pending)
+        self._batches_run += 1
+        self._texts_encoded += len(texts)
+
+    def metrics(self) -> dict:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(int(p * len(latencies)), len(latencies) - 1)]
+
+        return {
+            "queue_depth": self._requests.qsize(),
+            "requests": self._requests_served,
+            "batches": self._batches_run,
+            "texts": self._texts_encoded,
+            "mean_requests_per_batch": (
+                self._requests_served / self._batches_run if self._batches_run else 0.0
+            ),
+            "latency_p50_ms": percentile(0.5) * 1000,
+            "latency_p95_ms": percentile(0.95) * 1000,
+        }
+
+
+_embedding_service = None
+_embedding_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    global _embedding_service
+    if _embedding_service is None:
+        with _embedding_service_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService()
+    return _embedding_service
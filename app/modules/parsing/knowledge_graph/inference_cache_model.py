@@ -0,0 +1,14 @@
+from sqlalchemy import JSON, TIMESTAMP, Column, String, Text, func
+
+from app.core.base_model import Base
+
+
+class InferenceCache(Base):
+    __tablename__ = "inference_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    docstring = Column(Text, nullable=False)
+    tags = Column(JSON, nullable=False, default=[])
+    embedding = Column(JSON, nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), default=func.now(), nullable=False)
+    last_used_at = Column(TIMESTAMP(timezone=True), default=func.now(), index=True)
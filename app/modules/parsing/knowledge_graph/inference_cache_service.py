@@ -0,0 +1,137 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.modules.parsing.knowledge_graph.inference_cache_model import InferenceCache
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceCacheService:
+    """
+    Persistent cache of LLM docstring results shared across projects.
+
+    Entries are keyed by the normalized node text, the docstring prompt version
+    and the model name, so an unchanged function is only ever sent to the LLM
+    once per prompt/model pair regardless of branch or project.
+
+    Hits refresh last_used_at at most once per touch_interval, and entries
+    unused for max_age are deleted, at most once per eviction_interval per
+    process, when new results are stored.
+    """
+
+    _last_eviction = 0.0
+    _eviction_lock = threading.Lock()
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.touch_interval = int(os.getenv("INFERENCE_CACHE_TOUCH_INTERVAL", 86400))
+        self.max_age = int(os.getenv("INFERENCE_CACHE_MAX_AGE", 90 * 86400))
+        self.eviction_interval = int(
+            os.getenv("INFERENCE_CACHE_EVICTION_INTERVAL", 3600)
+        )
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        # Trailing whitespace and surrounding blank lines don't change the docstring
+        return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+    @staticmethod
+    def make_key(text: str, prompt_version: str, model_name: str) -> str:
+        normalized = InferenceCacheService.normalize_text(text)
+        return hashlib.sha256(
+            f"{prompt_version}:{model_name}:{normalized}".encode("utf-8")
+        ).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict]:
+        if not keys:
+            return {}
+        try:
+            entries = (
+                self.db.query(InferenceCache)
+                .filter(InferenceCache.cache_key.in_(keys))
+                .all()
+            )
+            now = datetime.now(timezone.utc)
+            stale = [
+                entry.cache_key
+                for entry in entries
+                if entry.last_used_at is None
+                or now - entry.last_used_at >= timedelta(seconds=self.touch_interval)
+            ]
+            if stale:
+                # Only eviction reads last_used_at, a coarse refresh is enough
+                self.db.query(InferenceCache).filter(
+                    InferenceCache.cache_key.in_(stale)
+                ).update({"last_used_at": now}, synchronize_session=False)
+                self.db.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Inference cache lookup failed: {e}")
+            self.db.rollback()
+            return {}
+
+        return {
+            entry.cache_key: {
+                "docstring": entry.docstring,
+                "tags": entry.tags or [],
+                "embedding": entry.embedding,
+            }
+            for entry in entries
+        }
+
+    def put_many(self, entries: List[Dict]):
+        """Store results given as dicts with cache_key, docstring, tags and embedding."""
+        if not entries:
+            return
+        # The same text can show up twice in one batch, keep a single row per key
+        rows = {entry["cache_key"]: entry for entry in entries}
+        try:
+            self.db.execute(
+                insert(InferenceCache)
+                .values(list(rows.values()))
+                .on_conflict_do_nothing(index_elements=["cache_key"])
+            )
+            self.db.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Inference cache write failed: {e}")
+            self.db.rollback()
+            return
+
+        if self._eviction_due():
+            self.evict_unused()
+
+    def _eviction_due(self) -> bool:
+        with InferenceCacheService._eviction_lock:
+            now = time.monotonic()
+            if (
+                InferenceCacheService._last_eviction
+                and now - InferenceCacheService._last_eviction < self.eviction_interval
+            ):
+                return False
+            InferenceCacheService._last_eviction = now
+            return True
+
+    def evict_unused(self) -> int:
+        """Delete entries no lookup has hit for max_age."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.max_age)
+        try:
+            result = self.db.execute(
+                delete(InferenceCache).where(InferenceCache.last_used_at < cutoff)
+            )
+            self.db.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Inference cache eviction failed: {e}")
+            self.db.rollback()
+            return 0
+        if result.rowcount:
+            logger.info(f"Evicted {result.rowcount} unused inference cache entries")
+        return result.rowcount
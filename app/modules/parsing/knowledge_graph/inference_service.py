@@ -1,48 +1,147 @@
 import asyncio
+import hashlib
 import logging
 import os
 import re
-from typing import Dict, List, Optional
+import threading
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
 
-import tiktoken
+import numpy as np
 from langchain.output_parsers import PydanticOutputParser
 from langchain.prompts import ChatPromptTemplate
-from neo4j import GraphDatabase
-from sentence_transformers import SentenceTransformer
 from sqlalchemy.orm import Session
 
-from app.core.config_provider import config_provider
+from app.core.neo4j_manager import get_neo4j_manager
 from app.modules.intelligence.provider.provider_service import (
     AgentType,
     ProviderService,
 )
+from app.modules.parsing.graph_construction.source_blob_store import (
+    get_source_blob_store,
+)
+from app.modules.parsing.knowledge_graph.embedding_service import get_embedding_service
+from app.modules.parsing.knowledge_graph.inference_cache_service import (
+    InferenceCacheService,
+)
 from app.modules.parsing.knowledge_graph.inference_schema import (
+    DocstringNode,
     DocstringRequest,
     DocstringResponse,
 )
+from app.modules.parsing.knowledge_graph.local_vector_index import (
+    get_local_vector_index_store,
+)
+from app.modules.parsing.knowledge_graph.token_batcher import TokenBatcher, get_encoding
 from app.modules.projects.projects_service import ProjectService
 from app.modules.search.search_service import SearchService
 
 logger = logging.getLogger(__name__)
 
+DOCSTRING_PROMPT = """
+        You are a senior software engineer with expertise in code analysis and documentation. Your task is to generate concise docstrings for each code snippet and tagging it based on its purpose. Approach this task methodically, following these steps:
+
+        1. **Node Identification**:
+        - Carefully parse the provided `code_snippets` to identify each `node_id` and its corresponding code block.
+        - Ensure that every `node_id` present in the `code_snippets` is accounted for and processed individually.
+
+        2. **For Each Node**:
+        Perform the following tasks for every identified `node_id` and its associated code:
+
+        You are a software engineer tasked with generating concise docstrings for each code snippet and tagging it based on its purpose.
+
+        **Instructions**:
+        2.1. **Identify Code Type**:
+        - Determine whether each code snippet is primarily **backend** or **frontend**.
+        - Use common indicators:
+            - **Backend**: Handles database interactions, API endpoints, configuration, or server-side logic.
+            - **Frontend**: Contains UI components, event handling, state management, or styling.
+
+        2.2. **Summarize the Purpose**:
+        - Based on the identified type, write a brief (1-2 sentences) summary of the code’s main purpose and functionality.
+        - Focus on what the code does, its role in the system, and any critical operations it performs.
+        - If the code snippet is related to **specific roles** like authentication, database access, or UI component, state management, explicitly mention this role.
+
+
+        2.3. **Assign Tags Based on Code Type**:
+        - Use these specific tags based on whether the code is identified as backend or frontend:
+
+        **Backend Tags**:
+            - **AUTH**: Handles authentication or authorization.
+            - **DATABASE**: Interacts with databases.
+            - **API**: Defines API endpoints.
+            - **UTILITY**: Provides helper or utility functions.
+            - **PRODUCER**: Sends messages to a queue or topic.
+            - **CONSUMER**: Processes messages from a queue or topic.
+            - **EXTERNAL_SERVICE**: Integrates with external services.
+            - **CONFIGURATION**: Manages configuration settings.
+
+        **Frontend Tags**:
+            - **UI_COMPONENT**: Renders a visual component in the UI.
+            - **FORM_HANDLING**: Manages form data submission and validation.
+            - **STATE_MANAGEMENT**: Manages application or component state.
+            - **DATA_BINDING**: Binds data to UI elements.
+            - **ROUTING**: Manages frontend navigation.
+            - **EVENT_HANDLING**: Handles user interactions.
+            - **STYLING**: Applies styling or theming.
+            - **MEDIA**: Manages media, like images or video.
+            - **ANIMATION**: Defines animations in the UI.
+            - **ACCESSIBILITY**: Implements accessibility features.
+            - **DATA_FETCHING**: Fetches data for frontend use.
+
+
+        3. **Output Compilation**:
+        - Collect the generated docstrings and classifications for each `node_id`.
+        - Ensure that the output includes an entry for every `node_id` provided in the `code_snippets`.
+
+        4. **Review and Verification**:
+        Before finalizing your response:
+        - Verify that every `node_id` from the input is present in the output.
+        - Ensure each docstring is clear, comprehensive, and technically accurate.
+        - Confirm that the assigned tags are justified by the code's functionality.
+        - Make sure all crucial technical details are captured without unnecessary verbosity.
+
+        Refine your output as needed to ensure high-quality, precise documentation that accurately represents the code's structure and functionality.
+
+        {format_instructions}
+        Ensure that the response is a valid DocstringResponse object. Every entry in the response must contain the key "docstring".
+        Even if the docstring is empty, you must still include the node_id and an empty docstring in your response.
+        Here are the code snippets:
+
+        {code_snippets}
+        """
+
+# Cached docstrings are invalidated whenever the prompt changes
+DOCSTRING_PROMPT_VERSION = hashlib.sha256(DOCSTRING_PROMPT.encode()).hexdigest()[:16]
+
+REFERENCE_MARKER = "Code replaced for brevity"
+REFERENCED_CODE_PATTERN = re.compile(
+    r"Code replaced for brevity\. See node_id ([a-f0-9]+)"
+)
+
 
 class InferenceService:
     def __init__(self, db: Session, user_id: Optional[str] = "dummy"):
-        neo4j_config = config_provider.get_neo4j_config()
-        self.driver = GraphDatabase.driver(
-            neo4j_config["uri"],
-            auth=(neo4j_config["username"], neo4j_config["password"]),
-        )
+        self.driver = get_neo4j_manager().driver
         self.llm = ProviderService(db, user_id).get_small_llm(
             agent_type=AgentType.LANGCHAIN
         )
-        self.embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+        self.embedding_service = get_embedding_service()
+        self.local_vector_index = get_local_vector_index_store()
         self.search_service = SearchService(db)
         self.project_manager = ProjectService(db)
+        self.source_blob_store = get_source_blob_store()
+        self.inference_cache = InferenceCacheService(db)
+        self.llm_model_name = (
+            getattr(self.llm, "model_name", None)
+            or getattr(self.llm, "model", None)
+            or type(self.llm).__name__
+        )
         self.parallel_requests = int(os.getenv("PARALLEL_REQUESTS", 50))
-
-    def close(self):
-        self.driver.close()
+        self.infer_definition_docstrings = (
+            os.getenv("INFER_DEFINITION_DOCSTRINGS") == "enabled"
+        )
 
     def log_graph_stats(self, repo_id):
         query = """
@@ -78,95 +177,92 @@ class InferenceService:
 
     def num_tokens_from_string(self, string: str, model: str = "gpt-4") -> int:
         """Returns the number of tokens in a text string."""
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-        except KeyError:
-            logger.warning("Warning: model not found. Using cl100k_base encoding.")
-            encoding = tiktoken.get_encoding("cl100k_base")
-        return len(encoding.encode(string, disallowed_special=set()))
+        return len(get_encoding(model).encode(string, disallowed_special=set()))
 
-    def fetch_graph(self, repo_id: str) -> List[Dict]:
+    def fetch_graph(
+        self, repo_id: str, node_ids: Optional[List[str]] = None
+    ) -> Iterator[Dict]:
+        """
+        Stream the nodes of a project, optionally restricted to node_ids.
+
+        Pages are read with keyset pagination over the (repoId, node_id) index,
+        so every page is an index seek instead of re-scanning the skipped rows.
+        """
         batch_size = 500
-        all_nodes = []
+        node_filter = "AND n.node_id IN $node_ids " if node_ids is not None else ""
+        fetched = 0
+        last_node_id = ""
         with self.driver.session() as session:
-            offset = 0
             while True:
                 result = session.run(
                     "MATCH (n:NODE {repoId: $repo_id}) "
-                    "RETURN n.node_id AS node_id, n.text AS text, n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.name AS name "
-                    "SKIP $offset LIMIT $limit",
+                    "WHERE n.node_id > $last_node_id "
+                    + node_filter
+                    + "RETURN n.node_id AS node_id, n.text AS text, n.content_hash AS content_hash, n.start_byte AS start_byte, n.end_byte AS end_byte, n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.name AS name, n.type AS type "
+                    "ORDER BY n.node_id LIMIT $limit",
                     repo_id=repo_id,
-                    offset=offset,
+                    node_ids=node_ids,
+                    last_node_id=last_node_id,
                     limit=batch_size,
                 )
                 batch = [dict(record) for record in result]
                 if not batch:
                     break
-                all_nodes.extend(batch)
-                offset += batch_size
-        logger.info(f"DEBUGNEO4J: Fetched {len(all_nodes)} nodes for repo {repo_id}")
-        return all_nodes
-
-    def get_entry_points(self, repo_id: str) -> List[str]:
-        batch_size = 400  # Define the batch size
-        all_entry_points = []
+                fetched += len(batch)
+                last_node_id = batch[-1]["node_id"]
+                yield from batch
+        logger.info(f"DEBUGNEO4J: Fetched {fetched} nodes for repo {repo_id}")
+
+    def fetch_node_text(self, repo_id: str, node_id: str) -> Optional[str]:
         with self.driver.session() as session:
-            offset = 0
-            while True:
-                result = session.run(
-                    f"""
-                    MATCH (f:FUNCTION)
-                    WHERE f.repoId = '{repo_id}'
-                    AND NOT ()-[:CALLS]->(f)
-                    AND (f)-[:CALLS]->()
-                    RETURN f.node_id as node_id
-                    SKIP $offset LIMIT $limit
-                    """,
-                    offset=offset,
-                    limit=batch_size,
-                )
-                batch = result.data()
-                if not batch:
-                    break
-                all_entry_points.extend([record["node_id"] for record in batch])
-                offset += batch_size
-        return all_entry_points
+            record = session.run(
+                """
+                MATCH (n:NODE {repoId: $repo_id, node_id: $node_id})
+                RETURN n.text AS text, n.content_hash AS content_hash,
+                       n.start_byte AS start_byte, n.end_byte AS end_byte
+                """,
+                repo_id=repo_id,
+                node_id=node_id,
+            ).single()
+        if record is None:
+            return None
+        node = dict(record)
+        return node.get("text") or self.source_blob_store.read_node_text(node)
+
+    def get_entry_points(self, repo_id: str) -> Iterator[str]:
+        # A single query whose records are consumed as the server streams them
+        with self.driver.session() as session:
+            result = session.run(
+                """
+                MATCH (f:FUNCTION {repoId: $repo_id})
+                WHERE NOT ()-[:CALLS]->(f)
+                AND (f)-[:CALLS]->()
+                RETURN f.node_id as node_id
+                """,
+                repo_id=repo_id,
+            )
+            for record in result:
+                yield record["node_id"]
 
-    def get_neighbours(self, node_id: str, repo_id: str):
+    def get_neighbours(self, node_id: str, repo_id: str) -> Iterator[str]:
         with self.driver.session() as session:
-            batch_size = 400  # Define the batch size
-            all_nodes_info = []
-            offset = 0
-            while True:
-                result = session.run(
-                    """
-                    MATCH (start {node_id: $node_id, repoId: $repo_id})
-                    OPTIONAL MATCH (start)-[:CALLS]->(direct_neighbour)
-                    OPTIONAL MATCH (start)-[:CALLS]->()-[:CALLS*0..]->(indirect_neighbour)
-                    WITH start, COLLECT(DISTINCT direct_neighbour) + COLLECT(DISTINCT indirect_neighbour) AS all_neighbours
-                    UNWIND all_neighbours AS neighbour
-                    WITH start, neighbour
-                    WHERE neighbour IS NOT NULL AND neighbour <> start
-                    RETURN DISTINCT neighbour.node_id AS node_id, neighbour.name AS function_name, labels(neighbour) AS labels
-                    SKIP $offset LIMIT $limit
-                    """,
-                    node_id=node_id,
-                    repo_id=repo_id,
-                    offset=offset,
-                    limit=batch_size,
-                )
-                batch = result.data()
-                if not batch:
-                    break
-                all_nodes_info.extend(
-                    [
-                        record["node_id"]
-                        for record in batch
-                        if "FUNCTION" in record["labels"]
-                    ]
-                )
-                offset += batch_size
-            return all_nodes_info
+            result = session.run(
+                """
+                MATCH (start {node_id: $node_id, repoId: $repo_id})
+                OPTIONAL MATCH (start)-[:CALLS]->(direct_neighbour)
+                OPTIONAL MATCH (start)-[:CALLS]->()-[:CALLS*0..]->(indirect_neighbour)
+                WITH start, COLLECT(DISTINCT direct_neighbour) + COLLECT(DISTINCT indirect_neighbour) AS all_neighbours
+                UNWIND all_neighbours AS neighbour
+                WITH start, neighbour
+                WHERE neighbour IS NOT NULL AND neighbour <> start
+                RETURN DISTINCT neighbour.node_id AS node_id, neighbour.name AS function_name, labels(neighbour) AS labels
+                """,
+                node_id=node_id,
+                repo_id=repo_id,
+            )
+            for record in result:
+                if "FUNCTION" in record["labels"]:
+                    yield record["node_id"]
 
     def get_entry_points_for_nodes(
         self, node_ids: List[str], repo_id: str
@@ -195,66 +291,90 @@ class InferenceService:
             }
 
     def batch_nodes(
-        self, nodes: List[Dict], max_tokens: int = 16000, model: str = "gpt-4"
-    ) -> List[List[DocstringRequest]]:
-        batches = []
-        current_batch = []
-        current_tokens = 0
-        node_dict = {node["node_id"]: node for node in nodes}
-
-        def replace_referenced_text(
-            text: str, node_dict: Dict[str, Dict[str, str]]
-        ) -> str:
-            pattern = r"Code replaced for brevity\. See node_id ([a-f0-9]+)"
-            regex = re.compile(pattern)
+        self,
+        nodes: Iterable[Dict],
+        max_tokens: int = 16000,
+        model: str = "gpt-4",
+        repo_id: Optional[str] = None,
+    ) -> Iterator[List[DocstringRequest]]:
+        """
+        Yield token-bounded docstring batches as nodes arrive from fetch_graph.
+        """
+        return self.batch_requests(
+            self.get_docstring_requests(nodes, repo_id), max_tokens, model
+        )
 
-            def replace_match(match):
-                node_id = match.group(1)
-                if node_id in node_dict:
-                    return "\n" + node_dict[node_id]["text"].split("\n", 1)[-1]
-                return match.group(0)
+    def get_docstring_requests(
+        self, nodes: Iterable[Dict], repo_id: Optional[str] = None
+    ) -> Iterator[DocstringRequest]:
+        """
+        Turn streamed nodes into docstring requests with referenced code inlined.
 
+        Referenced nodes that haven't been streamed yet are looked up in the
+        graph when repo_id is given.
+        """
+        node_dict = {}
+
+        def node_text(node: Dict) -> Optional[str]:
+            if node.get("text"):
+                return node["text"]
+            # Graphs built from the blob store don't carry text on the node.
+            # Only their FILE nodes had text before, so definitions stay out
+            # of inference unless explicitly enabled
+            if node.get("type") == "FILE" or self.infer_definition_docstrings:
+                return self.source_blob_store.read_node_text(node)
+            return None
+
+        def replace_match(match):
+            node_id = match.group(1)
+            if node_id not in node_dict and repo_id is not None:
+                referenced_text = self.fetch_node_text(repo_id, node_id)
+                if referenced_text is not None:
+                    node_dict[node_id] = {"text": referenced_text}
+            if node_id in node_dict:
+                referenced_text = node_text(node_dict[node_id]) or ""
+                return "\n" + referenced_text.split("\n", 1)[-1]
+            return match.group(0)
+
+        def replace_referenced_text(text: str) -> str:
+            # Only blar_graph nodes carry these markers, skip the regex otherwise
             previous_text = None
             current_text = text
-
-            while previous_text != current_text:
+            while previous_text != current_text and REFERENCE_MARKER in current_text:
                 previous_text = current_text
-                current_text = regex.sub(replace_match, current_text)
+                current_text = REFERENCED_CODE_PATTERN.sub(replace_match, current_text)
             return current_text
 
         for node in nodes:
-            if not node.get("text"):
+            node_dict[node["node_id"]] = node
+            text = node_text(node)
+            if not text:
                 logger.warning(f"Node {node['node_id']} has no text. Skipping...")
                 continue
-
-            updated_text = replace_referenced_text(node["text"], node_dict)
-            node_tokens = self.num_tokens_from_string(updated_text, model)
-
-            if node_tokens > max_tokens:
-                logger.warning(
-                    f"Node {node['node_id']} - {node_tokens} tokens, has exceeded the max_tokens limit. Skipping..."
-                )
-                continue
-
-            if current_tokens + node_tokens > max_tokens:
-                if current_batch:  # Only append if there are items
-                    batches.append(current_batch)
-                current_batch = []
-                current_tokens = 0
-
-            current_batch.append(
-                DocstringRequest(node_id=node["node_id"], text=updated_text)
+            yield DocstringRequest(
+                node_id=node["node_id"], text=replace_referenced_text(text)
             )
-            current_tokens += node_tokens
-
-        if current_batch:
-            batches.append(current_batch)
-
-        total_nodes = sum(len(batch) for batch in batches)
-        logger.info(f"Batched {total_nodes} nodes into {len(batches)} batches")
-        logger.info(f"Batch sizes: {[len(batch) for batch in batches]}")
 
-        return batches
+    def batch_requests(
+        self,
+        requests: Iterable[DocstringRequest],
+        max_tokens: int = 16000,
+        model: str = "gpt-4",
+    ) -> Iterator[List[DocstringRequest]]:
+        """Pack docstring requests tightly into batches with the TokenBatcher."""
+        batcher = TokenBatcher(max_tokens=max_tokens, model=model)
+        yield from batcher.pack(requests, lambda request: request.text)
+
+        for request in batcher.skipped:
+            logger.warning(
+                f"Node {request.node_id} has exceeded the max_tokens limit. Skipping..."
+            )
+        stats = batcher.stats()
+        logger.info(
+            f"Batched {stats['items']} nodes into {stats['batches']} batches, "
+            f"mean fill ratio {stats['mean_fill_ratio']:.2f}, min fill ratio {stats['min_fill_ratio']:.2f}"
+        )
+        logger.info(f"Batch sizes: {batcher.batch_sizes}")
 
     async def generate_docstrings_for_entry_points(
         self,
@@ -406,22 +526,9 @@ class InferenceService:
         result = await chain.ainvoke(input=inputs)
         return result
 
-    async def generate_docstrings(self, repo_id: str) -> Dict[str, DocstringResponse]:
-        logger.info(
-            f"DEBUGNEO4J: Function: {self.generate_docstrings.__name__}, Repo ID: {repo_id}"
-        )
-        self.log_graph_stats(repo_id)
-        nodes = self.fetch_graph(repo_id)
-        logger.info(
-            f"DEBUGNEO4J: After fetch graph, Repo ID: {repo_id}, Nodes: {len(nodes)}"
-        )
-        self.log_graph_stats(repo_id)
-        logger.info(
-            f"Creating search indices for project {repo_id} with nodes count {len(nodes)}"
-        )
-
-        # Prepare a list of nodes for bulk insert
-        nodes_to_index = [
+    @staticmethod
+    def get_search_index_rows(repo_id: str, nodes: List[Dict]) -> List[Dict]:
+        return [
             {
                 "project_id": repo_id,
                 "node_id": node["node_id"],
@@ -434,31 +541,119 @@ class InferenceService:
             and node.get("name") not in {None, ""}
         ]
 
-        # Perform bulk insert
-        await self.search_service.bulk_create_search_indices(nodes_to_index)
-
+    async def generate_docstrings(
+        self, repo_id: str, node_ids: Optional[List[str]] = None
+    ) -> Dict[str, DocstringResponse]:
         logger.info(
-            f"Project {repo_id}: Created search indices over {len(nodes_to_index)} nodes"
+            f"DEBUGNEO4J: Function: {self.generate_docstrings.__name__}, Repo ID: {repo_id}"
         )
+        self.log_graph_stats(repo_id)
+
+        # Incremental runs maintain the search index alongside the graph update
+        create_search_indices = node_ids is None
+        nodes_to_index = []
+        node_count = 0
 
-        await self.search_service.commit_indices()
-        # entry_points = self.get_entry_points(repo_id)
+        def stream_nodes():
+            nonlocal node_count
+            for node in self.fetch_graph(repo_id, node_ids):
+                node_count += 1
+                if create_search_indices:
+                    nodes_to_index.extend(self.get_search_index_rows(repo_id, [node]))
+                yield node
+
+        # entry_points = list(self.get_entry_points(repo_id))
         # logger.info(
         #     f"DEBUGNEO4J: After get entry points, Repo ID: {repo_id}, Entry points: {len(entry_points)}"
         # )
         # self.log_graph_stats(repo_id)
         # entry_points_neighbors = {}
         # for entry_point in entry_points:
-        #     neighbors = self.get_neighbours(entry_point, repo_id)
+        #     neighbors = list(self.get_neighbours(entry_point, repo_id))
         #     entry_points_neighbors[entry_point] = neighbors
 
         # logger.info(
         #     f"DEBUGNEO4J: After get neighbours, Repo ID: {repo_id}, Entry points neighbors: {len(entry_points_neighbors)}"
         # )
         # self.log_graph_stats(repo_id)
-        batches = self.batch_nodes(nodes)
         all_docstrings = {"docstrings": []}
 
+        # Docstrings for byte-identical code come from the inference cache, only
+        # the misses are batched and sent to the LLM
+        miss_cache_keys = {}
+        cache_lookups = 0
+        cache_hits = 0
+        # The graph is streamed and cache hits are written back on a producer
+        # thread while LLM batches persist theirs on worker threads, and all of
+        # them share this service's SQLAlchemy session
+        db_lock = threading.Lock()
+
+        def cache_misses(requests: Iterable[DocstringRequest]):
+            nonlocal cache_lookups, cache_hits
+            requests = iter(requests)
+            while True:
+                chunk = list(islice(requests, 500))
+                if not chunk:
+                    break
+                keys = {
+                    request.node_id: InferenceCacheService.make_key(
+                        request.text, DOCSTRING_PROMPT_VERSION, self.llm_model_name
+                    )
+                    for request in chunk
+                }
+                with db_lock:
+                    cached = self.inference_cache.get_many(list(set(keys.values())))
+                hits = []
+                for request in chunk:
+                    entry = cached.get(keys[request.node_id])
+                    if entry is None:
+                        miss_cache_keys[request.node_id] = keys[request.node_id]
+                        yield request
+                    else:
+                        hits.append((request.node_id, entry))
+                cache_lookups += len(chunk)
+                cache_hits += len(hits)
+                if hits:
+                    with db_lock:
+                        self.update_neo4j_with_docstrings(
+                            repo_id,
+                            DocstringResponse(
+                                docstrings=[
+                                    DocstringNode(
+                                        node_id=node_id,
+                                        docstring=entry["docstring"],
+                                        tags=entry["tags"],
+                                    )
+                                    for node_id, entry in hits
+                                ]
+                            ),
+                            embeddings={
+                                node_id: entry["embedding"]
+                                for node_id, entry in hits
+                                if entry["embedding"]
+                            },
+                        )
+
+        def store_results(
+            response: DocstringResponse, embeddings: Dict[str, List[float]]
+        ):
+            with db_lock:
+                docstring_list = self.update_neo4j_with_docstrings(
+                    repo_id, response, embeddings
+                )
+                self.inference_cache.put_many(
+                    [
+                        {
+                            "cache_key": miss_cache_keys.pop(item["node_id"]),
+                            "docstring": item["docstring"],
+                            "tags": item["tags"] or [],
+                            "embedding": item["embedding"],
+                        }
+                        for item in docstring_list
+                        if item["node_id"] in miss_cache_keys
+                    ]
+                )
+
         semaphore = asyncio.Semaphore(self.parallel_requests)
 
         async def process_batch(batch, batch_index: int):
@@ -471,10 +666,71 @@ class InferenceService:
                     )
                     response = await self.generate_response(batch, repo_id)
                 else:
-                    self.update_neo4j_with_docstrings(repo_id, response)
+                    vectors = await self.generate_embeddings_async(
+                        [n.docstring for n in response.docstrings]
+                    )
+                    embeddings = {
+                        n.node_id: vector.tolist()
+                        for n, vector in zip(response.docstrings, vectors)
+                    }
+                    await asyncio.to_thread(store_results, response, embeddings)
                 return response
 
-        tasks = [process_batch(batch, i) for i, batch in enumerate(batches)]
+        loop = asyncio.get_running_loop()
+        batch_queue = asyncio.Queue()
+
+        def produce_batches():
+            # Graph reads, cache lookups and cache hit writes all block, run
+            # them here and hand batches to the event loop as they are ready
+            try:
+                for batch in self.batch_requests(
+                    cache_misses(self.get_docstring_requests(stream_nodes(), repo_id))
+                ):
+                    loop.call_soon_threadsafe(batch_queue.put_nowait, batch)
+            finally:
+                loop.call_soon_threadsafe(batch_queue.put_nowait, None)
+
+        producer = asyncio.ensure_future(asyncio.to_thread(produce_batches))
+        tasks = []
+        while (batch := await batch_queue.get()) is not None:
+            # The LLM requests start while the rest of the graph is streamed
+            tasks.append(asyncio.create_task(process_batch(batch, len(tasks))))
+        await producer
+
+        logger.info(
+            f"DEBUGNEO4J: After fetch graph, Repo ID: {repo_id}, Nodes: {node_count}"
+        )
+        if create_search_indices:
+            logger.info(
+                f"Creating search indices for project {repo_id} with nodes count {node_count}"
+            )
+
+            # Batches still in flight write through the same session
+            await asyncio.to_thread(db_lock.acquire)
+            try:
+                # Perform bulk insert
+                await self.search_service.bulk_create_search_indices(nodes_to_index)
+
+                logger.info(
+                    f"Project {repo_id}: Created search indices over {len(nodes_to_index)} nodes"
+                )
+
+                await self.search_service.commit_indices()
+                symbol_count = self.search_service.rebuild_symbol_index(repo_id)
+            finally:
+                db_lock.release()
+            logger.info(
+                f"Project {repo_id}: Built symbol index over {symbol_count} nodes"
+            )
+
+        logger.info(
+            f"Project {repo_id}: Embedding service metrics {self.embedding_service.metrics()}"
+        )
+        logger.info(
+            f"Project {repo_id}: Inference cache hits {cache_hits}/{cache_lookups} "
+            f"({cache_hits / cache_lookups if cache_lookups else 0.0:.2%})"
+        )
+
         results = await asyncio.gather(*tasks)
 
         for result in results:
@@ -492,79 +748,6 @@ class InferenceService:
     async def generate_response(
         self, batch: List[DocstringRequest], repo_id: str
     ) -> str:
-        base_prompt = """
-        You are a senior software engineer with expertise in code analysis and documentation. Your task is to generate concise docstrings for each code snippet and tagging it based on its purpose. Approach this task methodically, following these steps:
-
-        1. **Node Identification**:
-        - Carefully parse the provided `code_snippets` to identify each `node_id` and its corresponding code block.
-        - Ensure that every `node_id` present in the `code_snippets` is accounted for and processed individually.
-
-        2. **For Each Node**:
-        Perform the following tasks for every identified `node_id` and its associated code:
-
-        You are a software engineer tasked with generating concise docstrings for each code snippet and tagging it based on its purpose.
-
-        **Instructions**:
-        2.1. **Identify Code Type**:
-        - Determine whether each code snippet is primarily **backend** or **frontend**.
-        - Use common indicators:
-            - **Backend**: Handles database interactions, API endpoints, configuration, or server-side logic.
-            - **Frontend**: Contains UI components, event handling, state management, or styling.
-
-        2.2. **Summarize the Purpose**:
-        - Based on the identified type, write a brief (1-2 sentences) summary of the code’s main purpose and functionality.
-        - Focus on what the code does, its role in the system, and any critical operations it performs.
-        - If the code snippet is related to **specific roles** like authentication, database access, or UI component, state management, explicitly mention this role.
-
-
-        2.3. **Assign Tags Based on Code Type**:
-        - Use these specific tags based on whether the code is identified as backend or frontend:
-
-        **Backend Tags**:
-            - **AUTH**: Handles authentication or authorization.
-            - **DATABASE**: Interacts with databases.
-            - **API**: Defines API endpoints.
-            - **UTILITY**: Provides helper or utility functions.
-            - **PRODUCER**: Sends messages to a queue or topic.
-            - **CONSUMER**: Processes messages from a queue or topic.
-            - **EXTERNAL_SERVICE**: Integrates with external services.
-            - **CONFIGURATION**: Manages configuration settings.
-
-        **Frontend Tags**:
-            - **UI_COMPONENT**: Renders a visual component in the UI.
-            - **FORM_HANDLING**: Manages form data submission and validation.
-            - **STATE_MANAGEMENT**: Manages application or component state.
-            - **DATA_BINDING**: Binds data to UI elements.
-            - **ROUTING**: Manages frontend navigation.
-            - **EVENT_HANDLING**: Handles user interactions.
-            - **STYLING**: Applies styling or theming.
-            - **MEDIA**: Manages media, like images or video.
-            - **ANIMATION**: Defines animations in the UI.
-            - **ACCESSIBILITY**: Implements accessibility features.
-            - **DATA_FETCHING**: Fetches data for frontend use.
-
-
-        3. **Output Compilation**:
-        - Collect the generated docstrings and classifications for each `node_id`.
-        - Ensure that the output includes an entry for every `node_id` provided in the `code_snippets`.
-
-        4. **Review and Verification**:
-        Before finalizing your response:
-        - Verify that every `node_id` from the input is present in the output.
-        - Ensure each docstring is clear, comprehensive, and technically accurate.
-        - Confirm that the assigned tags are justified by the code's functionality.
-        - Make sure all crucial technical details are captured without unnecessary verbosity.
-
-        Refine your output as needed to ensure high-quality, precise documentation that accurately represents the code's structure and functionality.
-
-        {format_instructions}
-        Ensure that the response is a valid DocstringResponse object. Every entry in the response must contain the key "docstring".
-        Even if the docstring is empty, you must still include the node_id and an empty docstring in your response.
-        Here are the code snippets:
-
-        {code_snippets}
-        """
-
         # Prepare the code snippets
         code_snippets = ""
         for request in batch:
@@ -575,14 +758,12 @@ class InferenceService:
         output_parser = PydanticOutputParser(pydantic_object=DocstringResponse)
 
         chat_prompt = ChatPromptTemplate.from_template(
-            template=base_prompt,
+            template=DOCSTRING_PROMPT,
             partial_variables={
                 "format_instructions": output_parser.get_format_instructions()
             },
         )
 
-        import time
-
         start_time = time.time()
         logger.info(f"Parsing project {repo_id}: Starting the inference process...")
 
@@ -603,10 +784,29 @@ class InferenceService:
         return result
 
     def generate_embedding(self, text: str) -> List[float]:
-        embedding = self.embedding_model.encode(text)
-        return embedding.tolist()
+        return self.generate_embeddings([text])[0].tolist()
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Encode many texts in one call, using the model's native batching."""
+        return self.embedding_service.encode(texts)
+
+    async def generate_embeddings_async(self, texts: List[str]) -> np.ndarray:
+        # Encoding is CPU bound, keep it off the event loop driving the LLM requests
+        return await self.embedding_service.aencode(texts)
+
+    def update_neo4j_with_docstrings(
+        self,
+        repo_id: str,
+        docstrings: DocstringResponse,
+        embeddings: Optional[Dict[str, List[float]]] = None,
+    ) -> List[Dict]:
+        embeddings = dict(embeddings or {})
+        missing = [n for n in docstrings.docstrings if not embeddings.get(n.node_id)]
+        if missing:
+            vectors = self.generate_embeddings([n.docstring for n in missing])
+            for n, vector in zip(missing, vectors):
+                embeddings[n.node_id] = vector.tolist()
 
-    def update_neo4j_with_docstrings(self, repo_id: str, docstrings: DocstringResponse):
         with self.driver.session() as session:
             batch_size = 300
             docstring_list = [
@@ -614,7 +814,7 @@ class InferenceService:
                     "node_id": n.node_id,
                     "docstring": n.docstring,
                     "tags": n.tags,
-                    "embedding": self.generate_embedding(n.docstring),
+                    "embedding": embeddings[n.node_id],
                 }
                 for n in docstrings.docstrings
             ]
@@ -635,6 +835,7 @@ class InferenceService:
                     batch=batch,
                     repo_id=repo_id,
                 )
+        return docstring_list
 
     def create_vector_index(self):
         with self.driver.session() as session:
@@ -650,13 +851,65 @@ class InferenceService:
                 """
             )
 
-    async def run_inference(self, repo_id: str):
-        docstrings = await self.generate_docstrings(repo_id)
+    async def run_inference(self, repo_id: str, node_ids: Optional[List[str]] = None):
+        docstrings = await self.generate_docstrings(repo_id, node_ids)
         logger.info(
             f"DEBUGNEO4J: After generate docstrings, Repo ID: {repo_id}, Docstrings: {len(docstrings)}"
         )
         self.log_graph_stats(repo_id)
         self.create_vector_index()
+        try:
+            self.build_local_vector_index(repo_id)
+        except Exception as e:
+            # Queries fall back to the Neo4j vector index without it
+            logger.error(f"Failed to build local vector index for {repo_id}: {e}")
+
+    def build_local_vector_index(self, repo_id: str):
+        start_time = time.time()
+        with self.driver.session() as session:
+            count = session.run(
+                """
+                MATCH (n:NODE {repoId: $repo_id})
+                WHERE n.embedding IS NOT NULL
+                RETURN count(n) AS count
+                """,
+                repo_id=repo_id,
+            ).single()["count"]
+            result = session.run(
+                """
+                MATCH (n:NODE {repoId: $repo_id})
+                WHERE n.embedding IS NOT NULL
+                RETURN n.node_id AS node_id,
+                    n.docstring AS docstring,
+                    n.file_path AS file_path,
+                    n.start_line AS start_line,
+                    n.end_line AS end_line,
+                    n.embedding AS embedding
+                """,
+                repo_id=repo_id,
+            )
+            rows = (
+                (
+                    {
+                        key: record[key]
+                        for key in (
+                            "node_id",
+                            "docstring",
+                            "file_path",
+                            "start_line",
+                            "end_line",
+                        )
+                    },
+                    record["embedding"],
+                )
+                for record in result
+            )
+            indexed = self.local_vector_index.build(
+                repo_id, count, self.embedding_service.dimension, rows
+            )
+        logger.info(
+            f"Built local vector index for {repo_id} over {indexed} nodes in {time.time() - start_time:.2f} seconds"
+        )
 
     def query_vector_index(
         self,
@@ -665,65 +918,146 @@ class InferenceService:
         node_ids: Optional[List[str]] = None,
         top_k: int = 5,
     ) -> List[Dict]:
-        embedding = self.generate_embedding(query)
+        embedding = self.generate_embeddings([query])[0]
 
+        # Projects with a local index are answered in process, Neo4j is the fallback
+        local_index = self.local_vector_index.load(project_id)
+        if local_index is not None:
+            context_node_ids = None
+            if node_ids:
+                context_node_ids = local_index.get_context(node_ids)
+                if context_node_ids is None:
+                    context_node_ids = self.get_context_node_ids(project_id, node_ids)
+                    local_index.put_context(node_ids, context_node_ids)
+            results = local_index.search(embedding, top_k, context_node_ids)
+            if results is not None:
+                return results
+
+        embedding = embedding.tolist()
         with self.driver.session() as session:
             if node_ids:
-                # Fetch context node IDs
-                result_neighbors = session.run(
-                    """
-                    MATCH (n:NODE)
-                    WHERE n.repoId = $project_id AND n.node_id IN $node_ids
-                    CALL {
-                        WITH n
-                        MATCH (n)-[*1..4]-(neighbor:NODE)
-                        RETURN COLLECT(DISTINCT neighbor.node_id) AS neighbor_ids
-                    }
-                    RETURN COLLECT(DISTINCT n.node_id) + REDUCE(acc = [], neighbor_ids IN COLLECT(neighbor_ids) | acc + neighbor_ids) AS context_node_ids
-                    """,
-                    project_id=project_id,
-                    node_ids=node_ids,
-                )
-                context_node_ids = result_neighbors.single()["context_node_ids"]
+                context_node_ids = self.get_context_node_ids(project_id, node_ids)
 
-                # Use vector index and filter by context_node_ids
-                result = session.run(
-                    """
-                    CALL db.index.vector.queryNodes('docstring_embedding', $initial_k, $embedding)
-                    YIELD node, score
-                    WHERE node.repoId = $project_id AND node.node_id IN $context_node_ids
-                    RETURN node.node_id AS node_id,
-                        node.docstring AS docstring,
-                        node.file_path AS file_path,
-                        node.start_line AS start_line,
-                        node.end_line AS end_line,
-                        score AS similarity
-                    ORDER BY similarity DESC
-                    LIMIT $top_k
-                    """,
-                    project_id=project_id,
-                    embedding=embedding,
-                    context_node_ids=context_node_ids,
-                    initial_k=top_k * 10,  # Adjust as needed
-                    top_k=top_k,
+                # The neighbourhood is small, score it exactly instead of hoping
+                # the global index returns enough of it
+                return self._query_vectors_exact(
+                    session, project_id, embedding, top_k, context_node_ids
                 )
-            else:
-                result = session.run(
-                    """
-                    CALL db.index.vector.queryNodes('docstring_embedding', $top_k, $embedding)
-                    YIELD node, score
-                    WHERE node.repoId = $project_id
-                    RETURN node.node_id AS node_id,
-                        node.docstring AS docstring,
-                        node.file_path AS file_path,
-                        node.start_line AS start_line,
-                        node.end_line AS end_line,
-                        score AS similarity
-                    """,
-                    project_id=project_id,
-                    embedding=embedding,
-                    top_k=top_k,
+
+            results = []
+            # Small projects are cheaper to scan exactly, and would mostly come
+            # back short from the global index anyway
+            exact_multiple = int(os.getenv("VECTOR_SEARCH_EXACT_MULTIPLE", 50))
+            if self._embedded_node_count(session, project_id) > top_k * exact_multiple:
+                results = self._query_vectors_ann(session, project_id, embedding, top_k)
+            if len(results) < top_k:
+                # The global index is crowded by other projects, fall back to
+                # an exact scan over this project's nodes
+                results = self._query_vectors_exact(
+                    session, project_id, embedding, top_k
                 )
+            return results
+
+    @staticmethod
+    def _embedded_node_count(session, project_id: str) -> int:
+        # The node_id predicate lets the (repoId, node_id) index serve the seek
+        result = session.run(
+            """
+            MATCH (n:NODE)
+            WHERE n.repoId = $project_id
+                AND n.node_id IS NOT NULL
+                AND n.embedding IS NOT NULL
+            RETURN count(n) AS count
+            """,
+            project_id=project_id,
+        )
+        return result.single()["count"]
+
+    def get_context_node_ids(self, project_id: str, node_ids: List[str]) -> List[str]:
+        """The given nodes plus everything within 4 hops of them."""
+        with self.driver.session() as session:
+            result_neighbors = session.run(
+                """
+                MATCH (n:NODE)
+                WHERE n.repoId = $project_id AND n.node_id IN $node_ids
+                CALL {
+                    WITH n
+                    MATCH (n)-[*1..4]-(neighbor:NODE)
+                    RETURN COLLECT(DISTINCT neighbor.node_id) AS neighbor_ids
+                }
+                RETURN COLLECT(DISTINCT n.node_id) + REDUCE(acc = [], neighbor_ids IN COLLECT(neighbor_ids) | acc + neighbor_ids) AS context_node_ids
+                """,
+                project_id=project_id,
+                node_ids=node_ids,
+            )
+            return result_neighbors.single()["context_node_ids"]
 
-            # Ensure all fields are included in the final output
-            return [dict(record) for record in result]
+    def _query_vectors_ann(
+        self, session, project_id: str, embedding: List[float], top_k: int
+    ) -> List[Dict]:
+        """
+        Query the global docstring_embedding index, over-fetching more each round
+        until enough of the top candidates belong to the project, for at most
+        VECTOR_SEARCH_MAX_ROUNDS rounds.
+        """
+        candidate_k = top_k * int(os.getenv("VECTOR_SEARCH_OVERFETCH", 10))
+        max_k = int(os.getenv("VECTOR_SEARCH_MAX_K", 5000))
+        max_rounds = max(int(os.getenv("VECTOR_SEARCH_MAX_ROUNDS", 2)), 1)
+        for round_number in range(1, max_rounds + 1):
+            result = session.run(
+                """
+                CALL db.index.vector.queryNodes('docstring_embedding', $candidate_k, $embedding)
+                YIELD node, score
+                WHERE node.repoId = $project_id
+                RETURN node.node_id AS node_id,
+                    node.docstring AS docstring,
+                    node.file_path AS file_path,
+                    node.start_line AS start_line,
+                    node.end_line AS end_line,
+                    score AS similarity
+                ORDER BY similarity DESC
+                LIMIT $top_k
+                """,
+                project_id=project_id,
+                embedding=embedding,
+                candidate_k=candidate_k,
+                top_k=top_k,
+            )
+            results = [dict(record) for record in result]
+            if (
+                len(results) >= top_k
+                or candidate_k >= max_k
+                or round_number == max_rounds
+            ):
+                return results
+            candidate_k = min(candidate_k * 4, max_k)
+
+    @staticmethod
+    def _query_vectors_exact(
+        session,
+        project_id: str,
+        embedding: List[float],
+        top_k: int,
+        node_ids: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        node_filter = "AND node.node_id IN $node_ids" if node_ids is not None else ""
+        result = session.run(
+            f"""
+            MATCH (node:NODE {{repoId: $project_id}})
+            WHERE node.embedding IS NOT NULL {node_filter}
+            WITH node, vector.similarity.cosine(node.embedding, $embedding) AS similarity
+            RETURN node.node_id AS node_id,
+                node.docstring AS docstring,
+                node.file_path AS file_path,
+                node.start_line AS start_line,
+                node.end_line AS end_line,
+                similarity
+            ORDER BY similarity DESC
+            LIMIT $top_k
+            """,
+            project_id=project_id,
+            embedding=embedding,
+            node_ids=node_ids,
+            top_k=top_k,
+        )
+        return [dict(record) for record in result]
@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectVectorIndex:
+    """
+    A loaded per-project index: a read-only memory-mapped float32 matrix of
+    unit-normalised docstring embeddings plus the node table for its rows.
+    """
+
+    def __init__(self, path: str, version: float):
+        self.path = path
+        self.version = version
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        with open(os.path.join(path, "nodes.json"), "r", encoding="utf-8") as f:
+            self.nodes = json.load(f)
+        self.rows_by_node_id = {
+            node["node_id"]: row for row, node in enumerate(self.nodes)
+        }
+        # Neighbourhood expansions only change when the graph (and so this index) does
+        self.context_cache = OrderedDict()
+        self.context_cache_size = 256
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        node_ids: Optional[List[str]] = None,
+    ) -> Optional[List[Dict]]:
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.embeddings.shape[1]:
+            return None
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        if node_ids is not None:
+            rows = np.fromiter(
+                (
+                    self.rows_by_node_id[node_id]
+                    for node_id in set(node_ids)
+                    if node_id in self.rows_by_node_id
+                ),
+                dtype=np.int64,
+            )
+            if rows.size == 0:
+                return []
+            rows = np.sort(rows)
+            scores = self.embeddings[rows] @ query
+        else:
+            scores = self.embeddings @ query
+            rows = None
+
+        k = min(top_k, scores.shape[0])
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        for position in best:
+            row = int(rows[position]) if rows is not None else int(position)
+            node = self.nodes[row]
+            results.append(
+                {
+                    **node,
+                    # Same (1 + cosine) / 2 scale as the Neo4j vector index
+                    "similarity": float((1 + scores[position]) / 2),
+                }
+            )
+        return results
+
+    def get_context(self, node_ids: List[str]) -> Optional[List[str]]:
+        key = tuple(sorted(node_ids))
+        if key in self.context_cache:
+            self.context_cache.move_to_end(key)
+            return self.context_cache[key]
+        return None
+
+    def put_context(self, node_ids: List[str], context_node_ids: List[str]):
+        self.context_cache[tuple(sorted(node_ids))] = context_node_ids
+        if len(self.context_cache) > self.context_cache_size:
+            self.context_cache.popitem(last=False)
+
+
+class LocalVectorIndexStore:
+    """
+    On-disk store of per-project docstring embedding indices.
+
+    Indices are written once at the end of inference and queried in process
+    with vectorised dot products over a memory-mapped matrix, so hot projects
+    don't round-trip to the Neo4j vector index on every knowledge graph query.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_loaded: Optional[int] = None):
+        self.root = root or os.getenv(
+            "VECTOR_INDEX_PATH",
+            os.path.join(os.getenv("PROJECT_PATH", "projects/"), ".vector_indices"),
+        )
+        self.max_loaded = max_loaded or int(os.getenv("VECTOR_INDEX_MAX_LOADED", 32))
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, project_id: str) -> str:
+        return os.path.join(self.root, project_id)
+
+    def build(
+        self,
+        project_id: str,
+        count: int,
+        dimension: int,
+        rows: Iterable[Tuple[Dict, List[float]]],
+    ) -> int:
+        """
+        Write the index for a project from (node, embedding) rows.
+
+        count is the expected number of rows and sizes the memory-mapped matrix,
+        rows beyond it are ignored and a shorter stream truncates the index.
+        """
+        if count == 0:
+            self.delete(project_id)
+            return 0
+
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(project_id)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+
+        try:
+            embeddings = np.lib.format.open_memmap(
+                os.path.join(temp_path, "embeddings.npy"),
+                mode="w+",
+                dtype=np.float32,
+                shape=(count, dimension),
+            )
+            nodes = []
+            for node, embedding in rows:
+                if len(nodes) >= count:
+                    break
+                vector = np.asarray(embedding, dtype=np.float32)
+                if vector.shape != (dimension,):
+                    continue
+                norm = np.linalg.norm(vector)
+                embeddings[len(nodes)] = vector / norm if norm else vector
+                nodes.append(node)
+            embeddings.flush()
+            del embeddings
+
+            if not nodes:
+                shutil.rmtree(temp_path, ignore_errors=True)
+                self.delete(project_id)
+                return 0
+            if len(nodes) < count:
+                # Fewer rows than counted, rewrite the matrix at its real size
+                matrix = np.load(os.path.join(temp_path, "embeddings.npy"))
+                np.save(os.path.join(temp_path, "embeddings.npy"), matrix[: len(nodes)])
+                del matrix
+
+            with open(
+                os.path.join(temp_path, "nodes.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(nodes, f)
+
+            # Swap the new index in, readers holding the old mmap keep working
+            old_path = f"{temp_path}.old"
+            if os.path.exists(path):
+                os.replace(path, old_path)
+            os.replace(temp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            raise
+
+        with self._lock:
+            self._loaded.pop(project_id, None)
+        return len(nodes)
+
+    def load(self, project_id: str) -> Optional[ProjectVectorIndex]:
+        path = self._path(project_id)
+        try:
+            version = os.path.getmtime(os.path.join(path, "nodes.json"))
+        except OSError:
+            return None
+
+        with self._lock:
+            index = self._loaded.get(project_id)
+            if index is not None and index.version == version:
+                self._loaded.move_to_end(project_id)
+                return index
+
+        try:
+            index = ProjectVectorIndex(path, version)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load vector index for project {project_id}: {e}")
+            return None
+
+        with self._lock:
+            self._loaded[project_id] = index
+            self._loaded.move_to_end(project_id)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return index
+
+    def delete(self, project_id: str):
+        with self._lock:
+            self._loaded.pop(project_id, None)
+        shutil.rmtree(self._path(project_id), ignore_errors=True)
+
+
+_local_vector_index_store = None
+
+
+def get_local_vector_index_store() -> LocalVectorIndexStore:
+    global _local_vector_index_store
+    if _local_vector_index_store is None:
+        _local_vector_index_store = LocalVectorIndexStore()
+    return _local_vector_index_store
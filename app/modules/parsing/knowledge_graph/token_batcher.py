@@ -0,0 +1,118 @@
+import logging
+import os
+from functools import lru_cache
+from typing import Callable, Generic, Iterable, Iterator, List, Optional, TypeVar
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = "gpt-4") -> tiktoken.Encoding:
+    """Load the tokenizer for a model once per process."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        logger.warning("Warning: model not found. Using cl100k_base encoding.")
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(texts: List[str], model: str = "gpt-4") -> List[int]:
+    """Count the tokens of many texts in one call, encoded across threads."""
+    if not texts:
+        return []
+    encoded = get_encoding(model).encode_batch(
+        texts,
+        num_threads=int(os.getenv("TOKEN_COUNT_THREADS", 8)),
+        disallowed_special=set(),
+    )
+    return [len(tokens) for tokens in encoded]
+
+
+class TokenBatcher(Generic[T]):
+    """
+    Packs a stream of items into batches that stay under a token budget.
+
+    Items are counted in chunks and placed with best-fit decreasing into a
+    small set of open batches, so batches come out nearly full without
+    waiting for the whole stream. The fullest open batch is emitted whenever
+    an item fits in none of them and no more batches may be opened.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 16000,
+        model: str = "gpt-4",
+        max_open_batches: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ):
+        self.max_tokens = max_tokens
+        self.model = model
+        self.max_open_batches = max_open_batches or int(
+            os.getenv("TOKEN_BATCHER_OPEN_BATCHES", 8)
+        )
+        self.chunk_size = chunk_size or int(os.getenv("TOKEN_BATCHER_CHUNK_SIZE", 256))
+        self.skipped: List[T] = []
+        self.batch_tokens: List[int] = []
+        self.batch_sizes: List[int] = []
+
+    def pack(
+        self, items: Iterable[T], text_of: Callable[[T], str]
+    ) -> Iterator[List[T]]:
+        open_batches = []  # [tokens, items]
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                yield from self._place_chunk(chunk, text_of, open_batches)
+                chunk = []
+        yield from self._place_chunk(chunk, text_of, open_batches)
+
+        for tokens, batch in sorted(open_batches, key=lambda b: -b[0]):
+            yield self._emit(tokens, batch)
+
+    def _place_chunk(self, chunk, text_of, open_batches) -> Iterator[List[T]]:
+        token_counts = count_tokens([text_of(item) for item in chunk], self.model)
+        for tokens, item in sorted(
+            zip(token_counts, chunk), key=lambda pair: pair[0], reverse=True
+        ):
+            if tokens > self.max_tokens:
+                self.skipped.append(item)
+                continue
+
+            # Best fit: the open batch with the least room that still fits
+            best = None
+            for open_batch in open_batches:
+                if open_batch[0] + tokens <= self.max_tokens and (
+                    best is None or open_batch[0] > best[0]
+                ):
+                    best = open_batch
+            if best is None:
+                if len(open_batches) >= self.max_open_batches:
+                    fullest = max(
+                        range(len(open_batches)), key=lambda i: open_batches[i][0]
+                    )
+                    yield self._emit(*open_batches.pop(fullest))
+                best = [0, []]
+                open_batches.append(best)
+            best[0] += tokens
+            best[1].append(item)
+
+    def _emit(self, tokens: int, batch: List[T]) -> List[T]:
+        self.batch_tokens.append(tokens)
+        self.batch_sizes.append(len(batch))
+        return batch
+
+    def stats(self) -> dict:
+        batches = len(self.batch_tokens)
+        fill_ratios = [tokens / self.max_tokens for tokens in self.batch_tokens]
+        return {
+            "batches": batches,
+            "items": sum(self.batch_sizes),
+            "skipped": len(self.skipped),
+            "mean_fill_ratio": sum(fill_ratios) / batches if batches else 0.0,
+            "min_fill_ratio": min(fill_ratios) if batches else 0.0,
+        }
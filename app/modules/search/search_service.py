@@ -1,118 +1,271 @@
 import os
-from typing import Dict, List
+import re
+from typing import Dict, List, Optional
 
-from sqlalchemy import delete, or_
+from sqlalchemy import Float, case, cast, delete, desc, func, or_
 from sqlalchemy.orm import Session
 
 from app.modules.search.search_models import SearchIndex
+from app.modules.search.symbol_index import get_symbol_index_store
 
 
 class SearchService:
     def __init__(self, db: Session):
         self.project_path = os.getenv("PROJECT_PATH", "projects/")
+        self.search_limit = 10
         self.db = db
+        self.symbol_index_store = get_symbol_index_store()
 
     async def commit_indices(self):
         self.db.commit()
 
+    def relative_file_path(self, file_path: str) -> str:
+        if not file_path or self.project_path not in file_path:
+            return file_path
+        # ensure that your project path value does not end with a /
+        return file_path.split(self.project_path, 1)[-1].split("/", 2)[-1]
+
     async def search_codebase(self, project_id: str, query: str) -> List[Dict]:
         # Split the query into words
         query_words = query.lower().split()
+        if not query_words:
+            return []
+
+        # Matching and ranking both run in Postgres, the ILIKE filters are
+        # served by the pg_trgm GIN indexes on name, file_path and content
+        name_matches = [SearchIndex.name.ilike(f"%{word}%") for word in query_words]
+        path_matches = [
+            SearchIndex.file_path.ilike(f"%{word}%") for word in query_words
+        ]
+        content_matches = [
+            SearchIndex.content.ilike(f"%{word}%") for word in query_words
+        ]
+
+        def count_matches(matches, weight=1):
+            return sum(case((match, weight), else_=0) for match in matches)
+
+        content_hits = count_matches(content_matches)
+        relevance = (
+            count_matches(name_matches, 3)  # Highest relevance for name match
+            + count_matches(path_matches, 2)  # Medium relevance for file path match
+            + content_hits  # Lowest relevance for content match
+        ) * cast(content_hits, Float) / len(query_words) + (
+            # Adjust relevance based on how close the match is to the full string
+            func.similarity(SearchIndex.name, " ".join(query_words))
+            + func.similarity(SearchIndex.file_path, " ".join(query_words))
+        ) / 2
 
-        # Perform the search
+        # Postgres keeps only the best rows with a top-N heap sort, the extra
+        # rows leave room for duplicate node ids
         results = (
-            self.db.query(SearchIndex)
+            self.db.query(
+                SearchIndex.node_id,
+                SearchIndex.name,
+                SearchIndex.file_path,
+                SearchIndex.content,
+                content_hits.label("content_hits"),
+                relevance.label("relevance"),
+            )
             .filter(
                 SearchIndex.project_id == project_id,
-                or_(
-                    *[
-                        or_(
-                            SearchIndex.name.ilike(f"%{word}%"),
-                            SearchIndex.file_path.ilike(f"%{word}%"),
-                            SearchIndex.content.ilike(f"%{word}%"),
-                        )
-                        for word in query_words
-                    ]
-                ),
+                or_(*name_matches, *path_matches, *content_matches),
             )
+            .order_by(desc("relevance"))
+            .limit(self.search_limit * 5)
             .all()
         )
 
-        # Format and sort the results
         formatted_results = []
-        ids = []
+        seen_node_ids = set()
         for result in results:
-            relevance = self._calculate_relevance(result, query_words)
-            if result.node_id not in ids:
-                formatted_results.append(
-                    {
-                        "node_id": result.node_id,
-                        "name": result.name,
-                        "file_path": (
-                            result.file_path.split(self.project_path, 1)[-1].split(
-                                "/", 2
-                            )[
-                                -1
-                            ]  # ensure that your project path value does not end with a /
-                            if self.project_path in result.file_path
-                            else result.file_path
-                        ),
-                        "content": result.content,
-                        "match_type": self._determine_match_type(result, query_words),
-                        "relevance": relevance,
-                    }
-                )
-            ids.append(result.node_id)
-
-        # Sort results by relevance
-        formatted_results.sort(key=lambda x: x["relevance"], reverse=True)
-
-        return formatted_results[:10]
-
-    def _calculate_relevance(
-        self, result: SearchIndex, query_words: List[str]
-    ) -> float:
-        relevance = 0
-
-        for word in query_words:
-            if word in result.name.lower():
-                relevance += 3  # Highest relevance for name match
-            if word in result.file_path.lower():
-                relevance += 2  # Medium relevance for file path match
-            if word in result.content.lower():
-                relevance += 1  # Lowest relevance for content match
-
-        # Adjust relevance based on how many query words match
-        relevance *= len(
-            [word for word in query_words if word in result.content.lower()]
-        ) / len(query_words)
-
-        # Adjust relevance based on how close the match is to the full string
-        name_similarity = self._string_similarity(" ".join(query_words), result.name)
-        file_path_similarity = self._string_similarity(
-            " ".join(query_words), result.file_path
+            if result.node_id in seen_node_ids:
+                continue
+            seen_node_ids.add(result.node_id)
+            formatted_results.append(
+                {
+                    "node_id": result.node_id,
+                    "name": result.name,
+                    "file_path": self.relative_file_path(result.file_path),
+                    "content": result.content,
+                    "match_type": (
+                        "Exact Match"
+                        if result.content_hits == len(query_words)
+                        else "Partial Match"
+                    ),
+                    "relevance": float(result.relevance),
+                }
+            )
+            if len(formatted_results) == self.search_limit:
+                break
+
+        return formatted_results
+
+    def search_index_watermark(self, project_id: str) -> Optional[List[int]]:
+        """
+        Version of a project's search indices, [max id, row count], or None
+        if it has none. Inserts raise the max id and deletes lower the count.
+        """
+        max_id, count = (
+            self.db.query(func.max(SearchIndex.id), func.count(SearchIndex.id))
+            .filter(SearchIndex.project_id == project_id)
+            .one()
+        )
+        return [max_id, count] if count else None
+
+    def rebuild_symbol_index(self, project_id: str) -> int:
+        """Rebuild the project's symbol index from its committed search indices."""
+        watermark = self.search_index_watermark(project_id)
+        rows = (
+            self.db.query(SearchIndex.node_id, SearchIndex.name, SearchIndex.file_path)
+            .filter(SearchIndex.project_id == project_id)
+            .yield_per(5000)
         )
+        entries = [
+            {
+                "node_id": row.node_id,
+                "name": row.name,
+                "file_path": self.relative_file_path(row.file_path),
+            }
+            for row in rows
+        ]
+        self.symbol_index_store.save(project_id, entries, watermark)
+        return len(entries)
+
+    def resolve_probable_names(
+        self, project_id: str, probable_names: List[str]
+    ) -> List[Optional[Dict]]:
+        """
+        Resolve many probable node names (`path/to/file.py:Symbol`, bare symbol
+        names, misspelt names) to search index entries in a single call. Names
+        the symbol index can't place fall back to one search over all of them.
+        """
+        symbol_index = self.symbol_index_store.load(project_id)
+        watermark = self.search_index_watermark(project_id)
+        if watermark is not None and (
+            symbol_index is None or symbol_index.watermark != watermark
+        ):
+            # Missing (parsed before symbol indices existed) or built from older
+            # search indices, e.g. on a host that doesn't share PROJECT_PATH
+            # with the parsing worker
+            self.rebuild_symbol_index(project_id)
+            symbol_index = self.symbol_index_store.load(project_id)
+        elif watermark is None:
+            return [None] * len(probable_names)
+
+        resolved = (
+            symbol_index.lookup_many(probable_names)
+            if symbol_index is not None
+            else [None] * len(probable_names)
+        )
+        unresolved = [
+            position for position, match in enumerate(resolved) if match is None
+        ]
+        if unresolved:
+            matches = self.search_probable_names(
+                project_id, [probable_names[position] for position in unresolved]
+            )
+            for position, match in zip(unresolved, matches):
+                resolved[position] = match
+        return resolved
 
-        relevance += (name_similarity + file_path_similarity) / 2
+    def search_probable_names(
+        self, project_id: str, probable_names: List[str]
+    ) -> List[Optional[Dict]]:
+        """
+        Best name/path match for each probable name, all found with one query.
 
-        return relevance
+        Every name gets its own relevance column (3 per word in the name, 2 per
+        word in the path, plus trigram similarity) and a row_number over it,
+        and only the rows ranked first for some name come back.
+        """
+        queries = [
+            " ".join(re.split(r"[:/]", name)).lower().split() for name in probable_names
+        ]
+        ranked = [(position, words) for position, words in enumerate(queries) if words]
+        if not ranked:
+            return [None] * len(probable_names)
 
-    def _determine_match_type(self, result: SearchIndex, query_words: List[str]) -> str:
-        if all(word in result.content.lower() for word in query_words):
-            return "Exact Match"
-        return "Partial Match"
+        def count_matches(matches, weight):
+            return sum(case((match, weight), else_=0) for match in matches)
 
-    def _string_similarity(self, a: str, b: str) -> float:
-        # Simple string similarity calculation
-        a = a.lower()
-        b = b.lower()
-        return len(set(a) & set(b)) / float(len(set(a) | set(b)))
+        columns = []
+        for position, words in ranked:
+            name_matches = [SearchIndex.name.ilike(f"%{word}%") for word in words]
+            path_matches = [SearchIndex.file_path.ilike(f"%{word}%") for word in words]
+            text = " ".join(words)
+            relevance = case(
+                (
+                    or_(*name_matches, *path_matches),
+                    count_matches(name_matches, 3)
+                    + count_matches(path_matches, 2)
+                    + (
+                        func.similarity(SearchIndex.name, text)
+                        + func.similarity(SearchIndex.file_path, text)
+                    )
+                    / 2,
+                ),
+                else_=None,
+            )
+            columns.append(relevance.label(f"relevance_{position}"))
+            columns.append(
+                func.row_number()
+                .over(order_by=(relevance.desc().nulls_last(), SearchIndex.id))
+                .label(f"rank_{position}")
+            )
+
+        # The ILIKE filters are served by the pg_trgm GIN indexes
+        words = sorted({word for _, words in ranked for word in words})
+        candidates = (
+            self.db.query(
+                SearchIndex.node_id, SearchIndex.name, SearchIndex.file_path, *columns
+            )
+            .filter(
+                SearchIndex.project_id == project_id,
+                or_(
+                    *[SearchIndex.name.ilike(f"%{word}%") for word in words],
+                    *[SearchIndex.file_path.ilike(f"%{word}%") for word in words],
+                ),
+            )
+            .subquery()
+        )
+        rows = (
+            self.db.query(candidates)
+            .filter(
+                or_(*[candidates.c[f"rank_{position}"] == 1 for position, _ in ranked])
+            )
+            .all()
+        )
+
+        resolved = [None] * len(probable_names)
+        for row in rows:
+            for position, _ in ranked:
+                if (
+                    getattr(row, f"rank_{position}") == 1
+                    and getattr(row, f"relevance_{position}") is not None
+                ):
+                    resolved[position] = {
+                        "node_id": row.node_id,
+                        "name": row.name,
+                        "file_path": self.relative_file_path(row.file_path),
+                    }
+        return resolved
 
     def delete_project_index(self, project_id: str):
         # Delete all search index entries for the given project_id
         delete_stmt = delete(SearchIndex).where(SearchIndex.project_id == project_id)
         self.db.execute(delete_stmt)
         self.db.commit()
+        self.symbol_index_store.delete(project_id)
+
+    def delete_node_indices(self, project_id: str, node_ids: List[str]):
+        # Delete the search index entries of nodes removed from the project graph
+        if not node_ids:
+            return
+        delete_stmt = delete(SearchIndex).where(
+            SearchIndex.project_id == project_id, SearchIndex.node_id.in_(node_ids)
+        )
+        self.db.execute(delete_stmt)
+        self.db.commit()
 
     async def bulk_create_search_indices(self, nodes: List[Dict]):
         # Create index entries for all nodes in bulk
@@ -143,3 +296,4 @@ class SearchService:
         if cloned_indices:
             self.db.bulk_insert_mappings(SearchIndex, cloned_indices)
             await self.commit_indices()
+            self.rebuild_symbol_index(output_project_id)
@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+IDENTIFIER_PARTS = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+SEPARATORS = re.compile(r"[^A-Za-z0-9]+")
+
+
+def split_identifier(text: str) -> List[str]:
+    """Split names like `getUserByID`, `user_service` or `HTTPServer2` into lowercase sub-tokens."""
+    tokens = []
+    for word in SEPARATORS.split(text):
+        tokens.extend(part.lower() for part in IDENTIFIER_PARTS.findall(word))
+    return tokens
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def normalize_qualified_name(name: str) -> str:
+    return name.strip().strip("/").lower()
+
+
+class SymbolIndex:
+    """
+    In-memory lookup structure over a project's code symbols.
+
+    Qualified names (`path/to/file.py:Symbol`, `path/to/file.py`) resolve in
+    O(1) through a hash map. Anything else is matched on identifier sub-tokens
+    of the symbol name and the path segments, with a trigram index over the
+    token vocabulary so misspelt tokens still find their closest matches.
+    """
+
+    def __init__(
+        self,
+        entries: List[Dict],
+        watermark: Optional[List[int]] = None,
+        min_score: Optional[float] = None,
+    ):
+        self.entries = entries
+        # Version of the search indices the entries were read from
+        self.watermark = watermark
+        # Fraction of the best possible score a fuzzy match needs, weaker
+        # matches are left to the codebase search
+        self.min_score = (
+            min_score
+            if min_score is not None
+            else float(os.getenv("SYMBOL_INDEX_MIN_SCORE", 0.5))
+        )
+        self.exact = {}
+        self.name_postings = defaultdict(list)
+        self.path_postings = defaultdict(list)
+        self.token_trigrams = defaultdict(set)
+
+        for position, entry in enumerate(entries):
+            file_path = entry["file_path"] or ""
+            name = entry["name"] or ""
+            for key in (f"{file_path}:{name}", name if not file_path else None):
+                if key:
+                    self.exact.setdefault(normalize_qualified_name(key), position)
+            if name == file_path.rsplit("/", 1)[-1]:
+                # FILE nodes are named after the file, let the bare path match them
+                self.exact.setdefault(normalize_qualified_name(file_path), position)
+
+            for token in set(split_identifier(name)):
+                self.name_postings[token].append(position)
+            for token in set(split_identifier(file_path)):
+                self.path_postings[token].append(position)
+
+        for token in set(self.name_postings) | set(self.path_postings):
+            for gram in trigrams(token):
+                self.token_trigrams[gram].add(token)
+
+    def _similar_tokens(self, token: str) -> Dict[str, float]:
+        """Vocabulary tokens matching `token`, exactly or by trigram similarity."""
+        if token in self.name_postings or token in self.path_postings:
+            return {token: 1.0}
+        grams = trigrams(token)
+        overlap = Counter()
+        for gram in grams:
+            for candidate in self.token_trigrams.get(gram, ()):
+                overlap[candidate] += 1
+        similar = {}
+        for candidate, shared in overlap.items():
+            similarity = shared / len(grams | trigrams(candidate))
+            if similarity >= 0.4:
+                similar[candidate] = similarity
+        return similar
+
+    def lookup(self, probable_name: str) -> Optional[Dict]:
+        position = self.exact.get(normalize_qualified_name(probable_name))
+        if position is not None:
+            return self.entries[position]
+
+        path_part, _, symbol_part = probable_name.rpartition(":")
+        # Only the last component of a dotted name is stored as the symbol name
+        symbol = re.split(r"[.#]", symbol_part)[-1] if symbol_part else ""
+        if path_part:
+            position = self.exact.get(normalize_qualified_name(f"{path_part}:{symbol}"))
+            if position is not None:
+                return self.entries[position]
+
+        name_tokens = set(split_identifier(symbol))
+        path_tokens = set(split_identifier(path_part or symbol_part))
+        scores = Counter()
+        name_matches = set()
+        for token in name_tokens:
+            for match, similarity in self._similar_tokens(token).items():
+                for position in self.name_postings.get(match, ()):
+                    scores[position] += 3 * similarity
+                    name_matches.add(position)
+        for token in path_tokens:
+            for match, similarity in self._similar_tokens(token).items():
+                for position in self.path_postings.get(match, ()):
+                    scores[position] += 2 * similarity
+        if not scores:
+            return None
+
+        best_position, best_score = max(
+            scores.items(),
+            # Prefer the exact symbol name, then the shortest (most specific) path
+            key=lambda item: (
+                item[1],
+                (self.entries[item[0]]["name"] or "").lower() == symbol.lower(),
+                -len(self.entries[item[0]]["file_path"] or ""),
+            ),
+        )
+        # Without a path the path postings are only a tie-breaker for the name
+        max_score = 3 * len(name_tokens) + (2 * len(path_tokens) if path_part else 0)
+        if best_score < self.min_score * max_score:
+            return None
+        if path_part and symbol and best_position not in name_matches:
+            # The path alone matched, some other symbol of that file isn't it
+            return None
+        return self.entries[best_position]
+
+    def lookup_many(self, probable_names: List[str]) -> List[Optional[Dict]]:
+        return [self.lookup(name) for name in probable_names]
+
+
+class SymbolIndexStore:
+    """
+    Per-project symbol tables kept on disk next to the parsed projects and
+    turned into SymbolIndex objects lazily in the processes that query them.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_loaded: Optional[int] = None):
+        self.root = root or os.getenv(
+            "SYMBOL_INDEX_PATH",
+            os.path.join(os.getenv("PROJECT_PATH", "projects/"), ".symbol_indices"),
+        )
+        self.max_loaded = max_loaded or int(os.getenv("SYMBOL_INDEX_MAX_LOADED", 32))
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, project_id: str) -> str:
+        return os.path.join(self.root, f"{project_id}.json")
+
+    def save(
+        self,
+        project_id: str,
+        entries: List[Dict],
+        watermark: Optional[List[int]] = None,
+    ):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(project_id)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"watermark": watermark, "entries": entries}, f)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._loaded.pop(project_id, None)
+
+    def load(self, project_id: str) -> Optional[SymbolIndex]:
+        path = self._path(project_id)
+        try:
+            version = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            loaded = self._loaded.get(project_id)
+            if loaded is not None and loaded[0] == version:
+                self._loaded.move_to_end(project_id)
+                return loaded[1]
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            index = SymbolIndex(data["entries"], data.get("watermark"))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not load symbol index for project {project_id}: {e}")
+            return None
+
+        with self._lock:
+            self._loaded[project_id] = (version, index)
+            self._loaded.move_to_end(project_id)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return index
+
+    def delete(self, project_id: str):
+        with self._lock:
+            self._loaded.pop(project_id, None)
+        try:
+            os.remove(self._path(project_id))
+        except FileNotFoundError:
+            pass
+
+
+_symbol_index_store = None
+
+
+def get_symbol_index_store() -> SymbolIndexStore:
+    global _symbol_index_store
+    if _symbol_index_store is None:
+        _symbol_index_store = SymbolIndexStore()
+    return _symbol_index_store
@@ -0,0 +1,97 @@
+"""
+Per-message LangGraph overhead: compiling the chat agent graph on every
+message versus reusing the graph compiled once per process.
+
+A stub agent that yields a single chunk stands in for the real one, so the
+numbers only contain graph construction and streaming, no LLM or database.
+
+    python -m benchmarks.agent_graph_benchmark --messages 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.modules.intelligence.agents.chat_agents.qna_chat_agent import QNAChatAgent
+from app.modules.intelligence.agents.compiled_graphs import get_compiled_graph
+
+STATE = {
+    "query": "What does this function do?",
+    "project_id": "project",
+    "user_id": "user",
+    "conversation_id": "conversation",
+    "node_ids": [],
+}
+
+
+class StubAgent:
+    async def execute(self, *args):
+        yield "chunk"
+
+
+async def stream(graph, agent):
+    async for _ in graph.astream(
+        STATE, {"configurable": {"agent": agent}}, stream_mode="custom"
+    ):
+        pass
+
+
+async def per_message_compile(agent, messages: int):
+    timings = []
+    for _ in range(messages):
+        start = time.perf_counter()
+        await stream(QNAChatAgent._build_graph().compile(), agent)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def compiled_once(agent, messages: int):
+    timings = []
+    for _ in range(messages):
+        start = time.perf_counter()
+        graph = get_compiled_graph("qna_chat_agent", QNAChatAgent._build_graph)
+        await stream(graph, agent)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings):
+    ordered = sorted(timings)
+    print(
+        f"{label:<22}{statistics.mean(timings) * 1000:>10.3f}"
+        f"{ordered[len(ordered) // 2] * 1000:>10.3f}"
+        f"{ordered[int(len(ordered) * 0.95)] * 1000:>10.3f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    args = parser.parse_args()
+
+    agent = StubAgent()
+    # Warm up imports and the process-wide graph
+    await per_message_compile(agent, 5)
+    await compiled_once(agent, 5)
+
+    compile_start = time.perf_counter()
+    for _ in range(args.messages):
+        QNAChatAgent._build_graph().compile()
+    compile_cost = (time.perf_counter() - compile_start) / args.messages
+
+    baseline = await per_message_compile(agent, args.messages)
+    cached = await compiled_once(agent, args.messages)
+
+    print(f"{'per message (ms)':<22}{'mean':>10}{'p50':>10}{'p95':>10}")
+    report("compile per message", baseline)
+    report("compiled once", cached)
+    print(f"compile alone: {compile_cost * 1000:.3f} ms per message")
+    print(
+        f"saved: {(statistics.mean(baseline) - statistics.mean(cached)) * 1000:.3f} ms"
+        " per message"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+CPU embedding throughput: encoding texts one at a time versus batching them
+through the process-wide EmbeddingService.
+
+Three modes encode the same synthetic docstrings with the configured model:
+
+- per item: one model.encode call per text, as inference did before batching
+- batched: one EmbeddingService.encode call with every text
+- coalesced: many threads each submitting a single text, which the service
+  worker merges into shared forward passes
+
+    python -m benchmarks.embedding_throughput_benchmark --texts 2000 --threads 32
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Measure CPU throughput even on a machine with a GPU
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+from app.modules.parsing.knowledge_graph.embedding_service import (  # noqa: E402
+    EmbeddingService,
+)
+
+WORDS = (
+    "parse load save request response user project node graph cache token "
+    "config file path query index embedding model batch worker queue session "
+    "handler client server error retry timeout value result list dict string"
+).split()
+
+
+def make_texts(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        f"Function {rng.choice(WORDS)}_{rng.choice(WORDS)} "
+        + " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 60)))
+        for _ in range(count)
+    ]
+
+
+def per_item(service: EmbeddingService, texts):
+    model = service.model
+    for text in texts:
+        model.encode([text], convert_to_numpy=True, show_progress_bar=False)
+
+
+def batched(service: EmbeddingService, texts):
+    service.encode(texts)
+
+
+def coalesced(service: EmbeddingService, texts, threads: int):
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda text: service.encode([text]), texts))
+
+
+def timed(run, *args):
+    start = time.perf_counter()
+    run(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    service = EmbeddingService(batch_size=args.batch_size)
+    texts = make_texts(args.texts)
+    # Load the model and let torch settle its thread pool before timing
+    service.encode(make_texts(64, seed=1))
+
+    results = [
+        ("per item", timed(per_item, service, texts)),
+        (f"batched ({service.batch_size})", timed(batched, service, texts)),
+        (
+            f"coalesced ({args.threads} threads)",
+            timed(coalesced, service, texts, args.threads),
+        ),
+    ]
+
+    print(f"{service.model_name}, {len(texts)} texts, CPU")
+    print(f"{'mode':<28}{'seconds':>10}{'texts/s':>12}{'speedup':>10}")
+    baseline = results[0][1]
+    for label, seconds in results:
+        print(
+            f"{label:<28}{seconds:>10.2f}{len(texts) / seconds:>12.1f}"
+            f"{baseline / seconds:>9.2f}x"
+        )
+    metrics = service.metrics()
+    print(
+        f"service: {metrics['batches']} batches, "
+        f"{metrics['mean_requests_per_batch']:.1f} requests per batch"
+    )
+
+
+if __name__ == "__main__":
+    main()
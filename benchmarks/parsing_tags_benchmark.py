@@ -0,0 +1,98 @@
+"""
+Serial vs parallel tag extraction for the tree-sitter parsing path.
+
+Runs RepoMap.extract_tags_for_files over a checked-out repository once with
+PARSING_WORKERS=1 and once with a worker pool, each in a fresh interpreter
+with an empty tags cache and blob store, then repeats each run warm to show
+the tags cache hit path.
+
+    python benchmarks/parsing_tags_benchmark.py /path/to/repo --workers 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def list_files(repo_dir):
+    from app.modules.parsing.graph_construction.parsing_helper import ParseHelper
+
+    files = []
+    for root, _, names in os.walk(repo_dir):
+        if any(part.startswith(".") for part in root.split(os.sep)):
+            continue
+        for name in names:
+            file_path = os.path.join(root, name)
+            with open(file_path, "rb") as f:
+                head = f.read(1024)
+            if ParseHelper.is_text_blob(file_path, head):
+                files.append((file_path, os.path.relpath(file_path, repo_dir)))
+    return files
+
+
+def run_once(repo_dir):
+    from app.modules.parsing.graph_construction.parsing_repomap import RepoMap
+
+    files = list_files(repo_dir)
+    # extract_tags_for_files only reads its settings from the environment,
+    # skip __init__ so no database session is needed
+    repo_map = RepoMap.__new__(RepoMap)
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        tags = sum(len(record[4]) for record in repo_map.extract_tags_for_files(files))
+        timings.append(time.perf_counter() - start)
+    print(json.dumps({"files": len(files), "tags": tags, "timings": timings}))
+
+
+def run_mode(repo_dir, workers):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {
+            **os.environ,
+            "PARSING_WORKERS": str(workers),
+            "PARSING_PARALLEL_MIN_FILES": "1",
+            "TAGS_CACHE_PATH": os.path.join(cache_dir, "tags.db"),
+            "SOURCE_BLOB_PATH": os.path.join(cache_dir, "blobs"),
+            "PYTHONPATH": REPO_ROOT,
+        }
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), repo_dir, "--run-once"],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("repo_dir")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--run-once", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_once:
+        run_once(args.repo_dir)
+        return
+
+    serial = run_mode(args.repo_dir, 1)
+    parallel = run_mode(args.repo_dir, args.workers)
+    print(f"{serial['files']} files, {serial['tags']} tags")
+    print(f"{'mode':<22}{'cold (s)':>12}{'warm (s)':>12}")
+    print(f"{'serial':<22}{serial['timings'][0]:>12.2f}{serial['timings'][1]:>12.2f}")
+    print(
+        f"{f'parallel ({args.workers} workers)':<22}"
+        f"{parallel['timings'][0]:>12.2f}{parallel['timings'][1]:>12.2f}"
+    )
+    print(f"cold speedup: {serial['timings'][0] / parallel['timings'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
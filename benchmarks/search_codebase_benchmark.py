@@ -0,0 +1,193 @@
+"""
+Codebase search latency on a large search_indices table.
+
+Seeds a throwaway user and project with synthetic rows (500k by default),
+then times SearchService.search_codebase, which filters and ranks in Postgres
+over the pg_trgm indexes, against the previous approach of loading every
+ILIKE match and ranking it in Python. Everything it inserts is deleted at the
+end. Needs the POSTGRES_SERVER database with migrations applied.
+
+    python -m benchmarks.search_codebase_benchmark --rows 500000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import insert, or_, text
+
+from app.core.database import SessionLocal
+from app.modules.projects.projects_model import Project
+from app.modules.search.search_models import SearchIndex
+from app.modules.search.search_service import SearchService
+from app.modules.users.user_model import User
+
+VERBS = "get set load save parse build create delete update fetch handle render".split()
+NOUNS = (
+    "user project node graph cache token config file query index session "
+    "request response client server worker queue message agent tool"
+).split()
+QUERIES = [
+    "parse config",
+    "fetch user token",
+    "graph node",
+    "handle request session",
+    "render",
+    "cache index worker",
+]
+
+
+def make_rows(project_id: str, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for row in range(count):
+        verb, noun = rng.choice(VERBS), rng.choice(NOUNS)
+        module = rng.choice(NOUNS)
+        yield {
+            "project_id": project_id,
+            "node_id": uuid.UUID(int=rng.getrandbits(128)).hex,
+            "name": f"{verb}_{noun}_{row % 997}",
+            "file_path": f"repo/src/{module}/{rng.choice(NOUNS)}_{row % 311}.py",
+            "content": " ".join(
+                rng.choice(VERBS + NOUNS) for _ in range(rng.randint(20, 120))
+            ),
+        }
+
+
+def seed(db, project_id: str, user_id: str, rows: int, chunk: int = 10000):
+    db.add(User(uid=user_id, email=f"{user_id}@benchmark.invalid"))
+    db.add(Project(id=project_id, user_id=user_id, repo_name="benchmark/search"))
+    db.commit()
+    batch = []
+    for row in make_rows(project_id, rows):
+        batch.append(row)
+        if len(batch) == chunk:
+            db.execute(insert(SearchIndex), batch)
+            batch = []
+    if batch:
+        db.execute(insert(SearchIndex), batch)
+    db.commit()
+    db.execute(text("ANALYZE search_indices"))
+    db.commit()
+
+
+def cleanup(db, project_id: str, user_id: str):
+    db.rollback()
+    db.query(SearchIndex).filter(SearchIndex.project_id == project_id).delete()
+    db.query(Project).filter(Project.id == project_id).delete()
+    db.query(User).filter(User.uid == user_id).delete()
+    db.commit()
+
+
+def python_ranking(db, project_id: str, query: str):
+    """Previous search_codebase: fetch every match, score and sort in Python."""
+    words = query.lower().split()
+    results = (
+        db.query(SearchIndex)
+        .filter(
+            SearchIndex.project_id == project_id,
+            or_(
+                *[
+                    or_(
+                        SearchIndex.name.ilike(f"%{word}%"),
+                        SearchIndex.file_path.ilike(f"%{word}%"),
+                        SearchIndex.content.ilike(f"%{word}%"),
+                    )
+                    for word in words
+                ]
+            ),
+        )
+        .all()
+    )
+
+    def similarity(a: str, b: str) -> float:
+        a, b = set(a.lower()), set(b.lower())
+        return len(a & b) / float(len(a | b))
+
+    scored = []
+    for result in results:
+        content = result.content.lower()
+        relevance = sum(
+            3 * (word in result.name.lower())
+            + 2 * (word in result.file_path.lower())
+            + (word in content)
+            for word in words
+        )
+        relevance *= len([word for word in words if word in content]) / len(words)
+        relevance += (
+            similarity(" ".join(words), result.name)
+            + similarity(" ".join(words), result.file_path)
+        ) / 2
+        scored.append((relevance, result.node_id))
+    scored.sort(reverse=True)
+    return scored[:10], len(results)
+
+
+def timed(run, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--skip-python",
+        action="store_true",
+        help="only time search_codebase, the Python ranking is slow on big tables",
+    )
+    args = parser.parse_args()
+
+    project_id = f"benchmark-{uuid.uuid4()}"
+    user_id = f"benchmark-{uuid.uuid4().hex[:12]}"
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        seed(db, project_id, user_id, args.rows)
+        print(f"seeded {args.rows} rows in {time.perf_counter() - start:.1f} s")
+
+        search_service = SearchService(db)
+        print(
+            f"{'query':<26}{'sql p50 ms':>12}{'sql max ms':>12}"
+            f"{'python p50 ms':>15}{'matches':>10}"
+        )
+        for query in QUERIES:
+            sql_timings, _ = timed(
+                lambda: asyncio.run(search_service.search_codebase(project_id, query)),
+                args.repeats,
+            )
+            python_median, matches = "-", "-"
+            if not args.skip_python:
+                python_timings, (_, matches) = timed(
+                    lambda: python_ranking(db, project_id, query), 1
+                )
+                python_median = f"{statistics.median(python_timings) * 1000:.1f}"
+            print(
+                f"{query:<26}{statistics.median(sql_timings) * 1000:>12.1f}"
+                f"{max(sql_timings) * 1000:>12.1f}{python_median:>15}{matches:>10}"
+            )
+
+        # The filter should be a bitmap scan over the trigram indexes
+        plan = db.execute(
+            text(
+                "EXPLAIN SELECT id FROM search_indices WHERE project_id = :project_id "
+                "AND (name ILIKE '%parse%' OR file_path ILIKE '%parse%' "
+                "OR content ILIKE '%parse%')"
+            ),
+            {"project_id": project_id},
+        )
+        print("\n".join(row[0] for row in plan))
+    finally:
+        cleanup(db, project_id, user_id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Docstring vector search recall@k and latency against brute force.
+
+local: builds a synthetic per-project index with LocalVectorIndexStore and
+compares ProjectVectorIndex.search with a full sort of every score. The local
+index is exact, so this checks recall stays at 1.0 and measures latency.
+
+neo4j: runs the adaptive over-fetch of the global docstring_embedding index
+(InferenceService._query_vectors_ann) for an already-parsed project, once per
+VECTOR_SEARCH_OVERFETCH / VECTOR_SEARCH_MAX_K setting, and scores it against
+the exact scan (_query_vectors_exact). Queries are the project's own
+embeddings with noise added. Reports recall@k, latency, over-fetch rounds and
+how often the ANN path came back short and query_vector_index would fall back
+to the exact scan. Use it to tune both settings per deployment.
+
+    python -m benchmarks.vector_search_recall_benchmark local --rows 200000
+    python -m benchmarks.vector_search_recall_benchmark neo4j --project-id <id>
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.modules.parsing.knowledge_graph.local_vector_index import LocalVectorIndexStore
+
+
+def percentile(timings, p):
+    ordered = sorted(timings)
+    return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+
+def report(label, recalls, timings, extra=""):
+    print(
+        f"{label:<24}{statistics.mean(recalls):>10.3f}"
+        f"{statistics.mean(timings) * 1000:>10.2f}"
+        f"{percentile(timings, 0.5) * 1000:>10.2f}"
+        f"{percentile(timings, 0.95) * 1000:>10.2f}{extra}"
+    )
+
+
+def make_queries(embeddings: np.ndarray, count: int, noise: float, rng):
+    rows = rng.choice(embeddings.shape[0], size=count, replace=False)
+    queries = embeddings[rows] + rng.normal(
+        scale=noise, size=(count, embeddings.shape[1])
+    )
+    return queries.astype(np.float32)
+
+
+def run_local(args):
+    rng = np.random.default_rng(0)
+    # Clustered vectors, closer to docstring embeddings than uniform noise
+    centers = rng.normal(size=(max(args.rows // 500, 1), args.dimension))
+    embeddings = centers[rng.integers(0, centers.shape[0], args.rows)] + rng.normal(
+        scale=0.5, size=(args.rows, args.dimension)
+    )
+    embeddings = (
+        embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    ).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = LocalVectorIndexStore(root=root)
+        store.build(
+            "project",
+            args.rows,
+            args.dimension,
+            (({"node_id": str(row)}, embeddings[row]) for row in range(args.rows)),
+        )
+        index = store.load("project")
+
+        recalls, index_timings, brute_timings = [], [], []
+        for query in make_queries(embeddings, args.queries, args.noise, rng):
+            start = time.perf_counter()
+            results = index.search(query, args.top_k)
+            index_timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            scores = embeddings @ (query / np.linalg.norm(query))
+            exact = np.argsort(-scores)[: args.top_k]
+            brute_timings.append(time.perf_counter() - start)
+
+            found = {int(result["node_id"]) for result in results}
+            recalls.append(len(found & set(exact.tolist())) / args.top_k)
+
+    print(f"local index, {args.rows} rows x {args.dimension}, top {args.top_k}")
+    print(f"{'mode':<24}{'recall':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    report("brute force sort", [1.0] * len(brute_timings), brute_timings)
+    report("ProjectVectorIndex", recalls, index_timings)
+
+
+class CountingSession:
+    """Counts the queries an over-fetch loop sends."""
+
+    def __init__(self, session):
+        self.session = session
+        self.runs = 0
+
+    def run(self, *args, **kwargs):
+        self.runs += 1
+        return self.session.run(*args, **kwargs)
+
+
+def run_neo4j(args):
+    from app.core.neo4j_manager import get_neo4j_manager
+    from app.modules.parsing.knowledge_graph.inference_service import InferenceService
+
+    rng = np.random.default_rng(0)
+    manager = get_neo4j_manager()
+    rows = manager.run_read(
+        """
+        MATCH (n:NODE {repoId: $project_id})
+        WHERE n.embedding IS NOT NULL
+        RETURN n.embedding AS embedding
+        """,
+        project_id=args.project_id,
+    )
+    if len(rows) < args.queries:
+        raise SystemExit(
+            f"Project {args.project_id} has {len(rows)} embedded nodes, "
+            f"fewer than {args.queries} queries"
+        )
+    embeddings = np.asarray([row["embedding"] for row in rows], dtype=np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    queries = [
+        query.tolist()
+        for query in make_queries(embeddings, args.queries, args.noise, rng)
+    ]
+    total = manager.run_read(
+        "MATCH (n:NODE) WHERE n.embedding IS NOT NULL RETURN count(n) AS count"
+    )[0]["count"]
+
+    # The over-fetch helpers only need a session, skip __init__ and its database
+    service = InferenceService.__new__(InferenceService)
+    with manager.read_session() as session:
+        exact_results, exact_timings = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results = service._query_vectors_exact(
+                session, args.project_id, query, args.top_k
+            )
+            exact_timings.append(time.perf_counter() - start)
+            exact_results.append({result["node_id"] for result in results})
+
+        print(
+            f"project {args.project_id}: {len(rows)} of {total} embedded nodes, "
+            f"top {args.top_k}"
+        )
+        print(
+            f"{'mode':<24}{'recall':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'rounds':>8}{'short':>8}"
+        )
+        report("exact scan", [1.0] * len(exact_timings), exact_timings)
+
+        for overfetch in args.overfetch:
+            for max_k in args.max_k:
+                os.environ["VECTOR_SEARCH_OVERFETCH"] = str(overfetch)
+                os.environ["VECTOR_SEARCH_MAX_K"] = str(max_k)
+                recalls, timings, rounds, short = [], [], [], 0
+                for query, exact in zip(queries, exact_results):
+                    counting = CountingSession(session)
+                    start = time.perf_counter()
+                    results = service._query_vectors_ann(
+                        counting, args.project_id, query, args.top_k
+                    )
+                    timings.append(time.perf_counter() - start)
+                    rounds.append(counting.runs)
+                    short += len(results) < args.top_k
+                    found = {result["node_id"] for result in results}
+                    recalls.append(len(found & exact) / max(len(exact), 1))
+                report(
+                    f"ann x{overfetch} max {max_k}",
+                    recalls,
+                    timings,
+                    f"{statistics.mean(rounds):>8.2f}{short:>8}",
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    local = subparsers.add_parser("local")
+    local.add_argument("--rows", type=int, default=200000)
+    local.add_argument("--dimension", type=int, default=384)
+
+    neo4j = subparsers.add_parser("neo4j")
+    neo4j.add_argument("--project-id", required=True)
+    neo4j.add_argument("--overfetch", type=int, nargs="+", default=[1, 4, 10, 40])
+    neo4j.add_argument("--max-k", type=int, nargs="+", default=[1000, 5000])
+
+    for subparser in (local, neo4j):
+        subparser.add_argument("--queries", type=int, default=100)
+        subparser.add_argument("--top-k", type=int, default=5)
+        subparser.add_argument("--noise", type=float, default=0.02)
+
+    args = parser.parse_args()
+    if args.mode == "local":
+        run_local(args)
+    else:
+        run_neo4j(args)
+
+
+if __name__ == "__main__":
+    main()
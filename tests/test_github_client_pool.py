@@ -0,0 +1,243 @@
+"""
+GithubClientPool against a local stub of the GitHub REST API.
+
+    python -m pytest tests/test_github_client_pool.py
+"""
+
+import json
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from fastapi import HTTPException
+
+from app.modules.code_provider.github.github_client_pool import GithubClientPool
+
+PAGE_SIZE = 100
+
+
+class StubGithub:
+    """State shared by the stub handlers: what was asked and how to answer."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.token_lifetime = 3600
+        self.token_delay = 0.0
+        self.token_status = 201
+        self.installations = [{"id": i} for i in range(1, 251)]
+        self.repositories = {7: [{"name": f"repo-{i}"} for i in range(130)]}
+        self.requests = []
+        self.tokens_issued = 0
+
+    def record(self, method: str, path: str):
+        with self.lock:
+            self.requests.append((method, path))
+
+    def count(self, method: str, prefix: str) -> int:
+        with self.lock:
+            return sum(
+                1
+                for m, path in self.requests
+                if m == method and path.startswith(prefix)
+            )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def stub(self) -> StubGithub:
+        return self.server.stub
+
+    def send_json(self, status: int, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_page(self, path: str, query, items, wrap=None):
+        page = int(query.get("page", ["1"])[0])
+        chunk = items[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]
+        headers = {}
+        if page * PAGE_SIZE < len(items):
+            host, port = self.server.server_address
+            headers["Link"] = (
+                f"<http://{host}:{port}{path}?per_page={PAGE_SIZE}&page={page + 1}>; "
+                'rel="next"'
+            )
+        self.send_json(200, {wrap: chunk} if wrap else chunk, headers)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        self.stub.record("GET", url.path)
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+
+        if url.path.startswith("/repos/") and url.path.endswith("/installation"):
+            self.send_json(200, {"id": 7, "account": {"login": "owner"}})
+        elif url.path == "/app/installations":
+            self.send_page(url.path, query, self.stub.installations)
+        elif url.path == "/installation/repositories":
+            installation_id = int(token.split("-")[1])
+            self.send_page(
+                url.path,
+                query,
+                self.stub.repositories.get(installation_id, []),
+                wrap="repositories",
+            )
+        else:
+            self.send_json(404, {"message": "Not Found"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        self.stub.record("POST", url.path)
+        parts = url.path.strip("/").split("/")
+        if parts[:2] != ["app", "installations"] or parts[3:] != ["access_tokens"]:
+            self.send_json(404, {"message": "Not Found"})
+            return
+
+        time.sleep(self.stub.token_delay)
+        if self.stub.token_status != 201:
+            self.send_json(self.stub.token_status, {"message": "Bad credentials"})
+            return
+        with self.stub.lock:
+            self.stub.tokens_issued += 1
+            token = f"token-{parts[2]}-{self.stub.tokens_issued}"
+        expires_at = datetime.fromtimestamp(
+            time.time() + self.stub.token_lifetime, timezone.utc
+        ).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.send_json(201, {"token": token, "expires_at": expires_at})
+
+
+class GithubClientPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.stub = self.stub = StubGithub()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        host, port = self.server.server_address
+        self.pool = GithubClientPool(api_url=f"http://{host}:{port}")
+        # Skip signing an app JWT, the stub doesn't check it
+        self.pool._jwt = "app-jwt"
+        self.pool._jwt_expires_at = time.time() + 3600
+
+    def tearDown(self):
+        self.pool.executor.shutdown(wait=True)
+        self.pool.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_token_reused_until_refresh_margin(self):
+        self.pool.token_refresh_margin = 300
+        first = self.pool.get_installation_token(7)
+        self.assertEqual(self.pool.get_installation_token(7), first)
+        self.assertEqual(self.stub.count("POST", "/app/installations/7/"), 1)
+
+        # The cached token now expires inside the margin and gets replaced
+        self.pool.token_refresh_margin = self.stub.token_lifetime + 60
+        second = self.pool.get_installation_token(7)
+        self.assertNotEqual(second, first)
+        self.assertEqual(self.stub.count("POST", "/app/installations/7/"), 2)
+
+        metrics = self.pool.metrics()
+        self.assertEqual(metrics["token_refreshes"], 2)
+        self.assertEqual(metrics["token_cache_hits"], 1)
+
+    def test_token_expiring_within_margin_is_never_cached(self):
+        self.stub.token_lifetime = 120
+        self.pool.token_refresh_margin = 300
+        tokens = {self.pool.get_installation_token(7) for _ in range(3)}
+        self.assertEqual(len(tokens), 3)
+        self.assertEqual(self.stub.count("POST", "/app/installations/7/"), 3)
+
+    def test_installation_client_follows_token(self):
+        client = self.pool.get_installation_client(7)
+        self.assertIs(self.pool.get_installation_client(7), client)
+        self.pool.token_refresh_margin = self.stub.token_lifetime + 60
+        self.assertIsNot(self.pool.get_installation_client(7), client)
+
+    def test_failed_token_exchange_raises_and_is_not_cached(self):
+        self.stub.token_status = 401
+        with self.assertRaises(HTTPException):
+            self.pool.get_installation_token(7)
+        self.stub.token_status = 201
+        self.assertTrue(self.pool.get_installation_token(7).startswith("token-7-"))
+        self.assertEqual(self.stub.count("POST", "/app/installations/7/"), 2)
+
+    def test_installation_cached_until_ttl_expires(self):
+        self.pool.installation_ttl = 3600
+        installation = self.pool.get_installation("owner/repo")
+        self.assertEqual(installation["id"], 7)
+        self.pool.get_installation("owner/repo")
+        self.assertEqual(self.stub.count("GET", "/repos/owner/repo/installation"), 1)
+
+        # Age the entry past the TTL instead of sleeping
+        with self.pool._lock:
+            cached, cached_at = self.pool._installations["owner/repo"]
+            self.pool._installations["owner/repo"] = (cached, cached_at - 3601)
+        self.pool.get_installation("owner/repo")
+        self.assertEqual(self.stub.count("GET", "/repos/owner/repo/installation"), 2)
+
+        metrics = self.pool.metrics()
+        self.assertEqual(metrics["installation_lookups"], 2)
+        self.assertEqual(metrics["installation_cache_hits"], 1)
+
+    def test_list_installations_follows_link_header(self):
+        installations = self.pool.list_installations()
+        self.assertEqual(installations, self.stub.installations)
+        self.assertEqual(self.stub.count("GET", "/app/installations"), 3)
+
+    def test_list_installation_repositories_pages_every_installation(self):
+        repos = self.pool.list_installation_repositories([{"id": 7}, {"id": 8}])
+        self.assertEqual(repos, self.stub.repositories[7])
+        # Two pages for installation 7, one empty page for installation 8
+        self.assertEqual(self.stub.count("GET", "/installation/repositories"), 3)
+
+    def test_concurrent_callers_share_one_refresh(self):
+        self.stub.token_delay = 0.2
+        barrier = threading.Barrier(10)
+        tokens = []
+
+        def fetch():
+            barrier.wait()
+            tokens.append(self.pool.get_installation_token(7))
+
+        threads = [threading.Thread(target=fetch) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(tokens)), 1)
+        self.assertEqual(self.stub.count("POST", "/app/installations/7/"), 1)
+        self.assertEqual(self.pool.metrics()["token_refreshes"], 1)
+
+    def test_installations_refresh_independently(self):
+        self.stub.token_delay = 0.3
+        threads = [
+            threading.Thread(target=self.pool.get_installation_token, args=(i,))
+            for i in (7, 8)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The lock is per installation, so the two exchanges overlap
+        self.assertLess(time.perf_counter() - start, 0.55)
+        self.assertEqual(self.stub.count("POST", "/app/installations/7/"), 1)
+        self.assertEqual(self.stub.count("POST", "/app/installations/8/"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+SecretCache with a fake secret backend and an in-memory stand-in for Redis.
+
+    python -m pytest tests/test_secret_cache.py
+"""
+
+import threading
+import time
+import unittest
+
+from app.modules.key_management.secret_cache import SecretCache
+
+
+class FakeBackend:
+    """Secret store whose fetches are counted and can be held mid-flight."""
+
+    def __init__(self):
+        self.secrets = {("openai", "user"): "key-1"}
+        self.fetches = 0
+        self.lock = threading.Lock()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def fetcher(self, provider: str, customer_id: str):
+        def fetch():
+            with self.lock:
+                self.fetches += 1
+                value = self.secrets.get((provider, customer_id))
+            self.started.set()
+            self.release.wait(5)
+            return value
+
+        return fetch
+
+    def hold(self):
+        self.started.clear()
+        self.release.clear()
+
+
+class FakeRedis:
+    """The GET / INCR / EXPIRE subset SecretCache uses."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def pipeline(self):
+        return self
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, b"0")) + 1).encode()
+
+    def expire(self, key, seconds):
+        pass
+
+    def execute(self):
+        pass
+
+
+class SecretCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = FakeBackend()
+        self.fetch = self.backend.fetcher("openai", "user")
+
+    def get_in_thread(self, cache, results):
+        thread = threading.Thread(
+            target=lambda: results.append(cache.get("openai", "user", self.fetch))
+        )
+        thread.start()
+        return thread
+
+    def test_hit_until_ttl_expires(self):
+        cache = SecretCache(ttl=0.2)
+        self.assertEqual(cache.get("openai", "user", self.fetch), "key-1")
+        self.backend.secrets[("openai", "user")] = "key-2"
+        self.assertEqual(cache.get("openai", "user", self.fetch), "key-1")
+        self.assertEqual(self.backend.fetches, 1)
+
+        time.sleep(0.25)
+        self.assertEqual(cache.get("openai", "user", self.fetch), "key-2")
+        self.assertEqual(self.backend.fetches, 2)
+        self.assertEqual(cache.metrics()["hits"], 1)
+
+    def test_concurrent_callers_share_one_fetch(self):
+        cache = SecretCache(ttl=60)
+        self.backend.hold()
+        results = []
+        threads = [self.get_in_thread(cache, results)]
+        self.assertTrue(self.backend.started.wait(5))
+        threads += [self.get_in_thread(cache, results) for _ in range(9)]
+        # Give the followers time to queue up behind the running fetch
+        while cache.metrics()["coalesced"] < 9:
+            time.sleep(0.01)
+        self.backend.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["key-1"] * 10)
+        self.assertEqual(self.backend.fetches, 1)
+        self.assertEqual(cache.metrics()["coalesced"], 9)
+
+    def test_missing_secret_cached_for_negative_ttl_only(self):
+        cache = SecretCache(ttl=60, negative_ttl=0.2)
+        fetch = self.backend.fetcher("anthropic", "user")
+        self.assertIsNone(cache.get("anthropic", "user", fetch))
+        self.assertIsNone(cache.get("anthropic", "user", fetch))
+        self.assertEqual(self.backend.fetches, 1)
+
+        self.backend.secrets[("anthropic", "user")] = "key-3"
+        time.sleep(0.25)
+        self.assertEqual(cache.get("anthropic", "user", fetch), "key-3")
+        self.assertEqual(self.backend.fetches, 2)
+
+    def test_fetch_errors_are_not_cached(self):
+        cache = SecretCache(ttl=60)
+
+        def failing_fetch():
+            self.backend.fetches += 1
+            raise ConnectionError("backend unavailable")
+
+        with self.assertRaises(ConnectionError):
+            cache.get("openai", "user", failing_fetch)
+        self.assertEqual(cache.get("openai", "user", self.fetch), "key-1")
+        self.assertEqual(self.backend.fetches, 2)
+
+    def test_invalidate_discards_fetch_in_flight(self):
+        cache = SecretCache(ttl=60)
+        self.backend.hold()
+        results = []
+        thread = self.get_in_thread(cache, results)
+        self.assertTrue(self.backend.started.wait(5))
+
+        # The secret changes while the old value is being fetched
+        self.backend.secrets[("openai", "user")] = "key-2"
+        cache.invalidate("openai", "user")
+        self.backend.release.set()
+        thread.join()
+
+        # Its caller gets the old value, but the cache doesn't keep it
+        self.assertEqual(results, ["key-1"])
+        self.assertEqual(cache.get("openai", "user", self.fetch), "key-2")
+        self.assertEqual(self.backend.fetches, 2)
+
+    def test_invalidate_in_one_process_reaches_another(self):
+        redis = FakeRedis()
+        serving = SecretCache(ttl=60, redis=redis)
+        other = SecretCache(ttl=60, redis=redis)
+        self.assertEqual(other.get("openai", "user", self.fetch), "key-1")
+
+        self.backend.secrets[("openai", "user")] = "key-2"
+        serving.invalidate("openai", "user")
+        self.assertEqual(other.get("openai", "user", self.fetch), "key-2")
+        self.assertEqual(self.backend.fetches, 2)
+
+    def test_version_bump_discards_fetch_in_flight(self):
+        redis = FakeRedis()
+        serving = SecretCache(ttl=60, redis=redis)
+        other = SecretCache(ttl=60, redis=redis)
+        self.backend.hold()
+        results = []
+        thread = self.get_in_thread(other, results)
+        self.assertTrue(self.backend.started.wait(5))
+
+        # Another process writes the secret while this fetch is running
+        serving.invalidate("openai", "user")
+        self.backend.release.set()
+        thread.join()
+        self.backend.secrets[("openai", "user")] = "key-2"
+
+        self.assertEqual(results, ["key-1"])
+        self.assertEqual(other.get("openai", "user", self.fetch), "key-2")
+        self.assertEqual(self.backend.fetches, 2)
+
+    def test_expired_entries_are_pruned(self):
+        cache = SecretCache(ttl=0.1, negative_ttl=0.1)
+        for customer_id in range(20):
+            cache.get("openai", str(customer_id), lambda: "key")
+        time.sleep(0.15)
+        cache.get("openai", "fresh", lambda: "key")
+        self.assertEqual(cache.metrics()["entries"], 1)
+        self.assertEqual(cache._generations, {})
+
+
+if __name__ == "__main__":
+    unittest.main()